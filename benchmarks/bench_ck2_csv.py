@@ -0,0 +1,92 @@
+"""
+Compare the time to load the translations of CK2 CSV files with DataFrame.iterrows, with the vectorised pandas
+ingestion and with the csv module.
+
+Run from the root directory: python benchmarks/bench_ck2_csv.py
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from paradox_localization_utils.extract_existing_translation import (
+    extract_translation_from_CK2_file,
+    read_CK2_file_with_csv,
+)
+
+SOURCE_COL = 1
+DEST_COL = 2
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Benchmark of the loading of CK2 CSV files")
+    parser.add_argument("-nb_files", type=int, help="Number of CSV files", default=40)
+    parser.add_argument("-nb_rows", type=int, help="Number of rows by file", default=3000)
+    return parser.parse_args()
+
+
+def generate_text(rng: random.Random) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(rng.randint(3, 12))
+    )
+
+
+def generate_ck2_files(directory: str, nb_files: int, nb_rows: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    file_paths = []
+    for i in range(nb_files):
+        file_path = os.path.join(directory, f"file_{i}.csv")
+        with open(file_path, "w", encoding="ISO-8859-1") as f:
+            f.write("#CODE;ENGLISH;FRENCH;GERMAN;;SPANISH;;;;;;;;;x\n")
+            for j in range(nb_rows):
+                f.write(f"KEY_{i}_{j};{generate_text(rng)};{generate_text(rng)};;;;;;;;;;;;x\n")
+        file_paths.append(file_path)
+    return file_paths
+
+
+def load_with_iterrows(file_paths: list[str]) -> dict[str, str]:
+    extracted_translation = dict()
+    for file_path in file_paths:
+        df = pd.read_csv(file_path, sep=";", header=None, encoding="ISO-8859-1")
+        for _, row in df.iterrows():
+            if isinstance(row[SOURCE_COL], str) and isinstance(row[DEST_COL], str):
+                extracted_translation[row[SOURCE_COL]] = row[DEST_COL]
+    return extracted_translation
+
+
+def load_vectorised(file_paths: list[str]) -> dict[str, str]:
+    extracted_translation = dict()
+    for file_path in file_paths:
+        extract_translation_from_CK2_file(file_path, extracted_translation, SOURCE_COL, DEST_COL, "pandas")
+    return extracted_translation
+
+
+def load_with_csv(file_paths: list[str]) -> dict[str, str]:
+    extracted_translation = dict()
+    for file_path in file_paths:
+        extracted_translation.update(read_CK2_file_with_csv(file_path, SOURCE_COL, DEST_COL))
+    return extracted_translation
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_paths = generate_ck2_files(tmp_dir, args.nb_files, args.nb_rows)
+        print(f"{args.nb_files} CSV files of {args.nb_rows} rows")
+        results = []
+        for name, function in [
+            ("iterrows", load_with_iterrows),
+            ("vectorised pandas", load_vectorised),
+            ("csv module", load_with_csv),
+        ]:
+            start = time.perf_counter()
+            results.append(function(file_paths))
+            print(f"{name}: {time.perf_counter() - start:.2f} s")
+        assert all(result == results[0] for result in results)
@@ -0,0 +1,73 @@
+"""
+Compare the cold start (time in a new process, imports included) and the peak memory of the extraction
+of translation from CK2 CSV files and YML files, with the csv reader and with the pandas reader.
+The peak memory is the maximum resident set size of the process, so this benchmark runs on Linux.
+
+Run from the root directory: python benchmarks/bench_extract_existing_translation.py
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from benchmarks.bench_ck2_csv import generate_ck2_files
+from benchmarks.utils import generate_localization_tree
+
+ROOT_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+# Run in a new process to measure the imports and the memory of the extraction alone
+EXTRACTION_CODE = """
+import resource
+import sys
+import time
+
+start = time.perf_counter()
+from paradox_localization_utils.extract_existing_translation import extract_translation_dir
+
+import_duration = time.perf_counter() - start
+source_dir, dest_dir, jobs, csv_reader = sys.argv[1:]
+extracted_translation = extract_translation_dir(source_dir, dest_dir, "english", "french", 1, 2, int(jobs), csv_reader)
+print(import_duration, time.perf_counter() - start, len(extracted_translation), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Benchmark of the extraction of existing translation")
+    parser.add_argument("-nb_csv_files", type=int, help="Number of CK2 CSV files", default=10)
+    parser.add_argument("-nb_yml_files", type=int, help="Number of YML files by language", default=100)
+    parser.add_argument("-nb_lines", type=int, help="Number of lines by file", default=1000)
+    parser.add_argument("-jobs", type=int, help="Number of processes to extract the files", default=1)
+    return parser.parse_args()
+
+
+def run_extraction(source_dir: str, dest_dir: str, jobs: int, csv_reader: str) -> tuple[float, float, int, int]:
+    """
+    :return: Duration of the imports and total duration in seconds, number of extracted texts, peak RSS in kB
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", EXTRACTION_CODE, source_dir, dest_dir, str(jobs), csv_reader],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=ROOT_DIR,
+    ).stdout.split()
+    return float(output[0]), float(output[1]), int(output[2]), int(output[3])
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_dir = os.path.join(tmp_dir, "source")
+        dest_dir = os.path.join(tmp_dir, "dest")
+        generate_localization_tree(source_dir, "english", args.nb_yml_files, args.nb_lines)
+        generate_localization_tree(dest_dir, "french", args.nb_yml_files, args.nb_lines, seed=1)
+        generate_ck2_files(source_dir, args.nb_csv_files, args.nb_lines)
+        print(f"{args.nb_csv_files} CSV files and {args.nb_yml_files} YML file pairs of {args.nb_lines} lines")
+        for csv_reader in ["csv", "pandas"]:
+            import_duration, duration, nb_texts, peak_rss = run_extraction(source_dir, dest_dir, args.jobs, csv_reader)
+            print(
+                f"{csv_reader} reader: imports {import_duration:.2f} s, total {duration:.2f} s, "
+                + f"{nb_texts} texts, peak memory {peak_rss / 1e3:.1f} MB"
+            )
@@ -0,0 +1,94 @@
+"""
+Compare the time and the peak memory of json.load and of the incremental parser to read the translations
+of a big Paratranz file.
+
+Run from the root directory: python benchmarks/bench_paratranz_json.py
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from paradox_localization_utils.lib.paratranz_json import REVIEWED_STAGE, read_paratranz_translations
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Benchmark of the parsing of Paratranz files")
+    parser.add_argument("-nb_entries", type=int, help="Number of entries in the Paratranz file", default=50000)
+    parser.add_argument("-history_size", type=int, help="Number of history items of each entry", default=5)
+    return parser.parse_args()
+
+
+def generate_text(rng: random.Random) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(rng.randint(3, 20))
+    )
+
+
+def generate_paratranz_file(file_path: str, nb_entries: int, history_size: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    with open(file_path, "w", encoding="utf8") as f:
+        f.write("[")
+        for i in range(nb_entries):
+            entry = {
+                "id": i,
+                "key": f"KEY_{i}:0",
+                "original": generate_text(rng),
+                "translation": generate_text(rng),
+                "stage": rng.choice([1, REVIEWED_STAGE]),
+                "context": generate_text(rng),
+                "history": [
+                    {"uid": rng.randint(1, 1000), "field": "translation", "from": generate_text(rng)}
+                    for _ in range(history_size)
+                ],
+            }
+            f.write(("," if i > 0 else "") + json.dumps(entry, ensure_ascii=False))
+        f.write("]")
+
+
+def read_with_json_load(file_path: str) -> dict[str, str]:
+    with open(file_path, "r", encoding="utf8") as f:
+        raw_paratranz_data = json.load(f)
+    translations = dict()
+    for line in raw_paratranz_data:
+        if len(line["translation"]) > 0 and line["stage"] == REVIEWED_STAGE:
+            translations[line["key"].split(":")[0]] = line["translation"]
+    return translations
+
+
+def read_incrementally(file_path: str) -> dict[str, str]:
+    with open(file_path, "r", encoding="utf8") as f:
+        return read_paratranz_translations(f, False)
+
+
+def measure_peak_memory(function, file_path: str) -> tuple[float, int]:
+    """
+    :return: Duration in seconds without tracing, and peak of the traced memory in bytes
+    """
+    start = time.perf_counter()
+    function(file_path)
+    duration = time.perf_counter() - start
+    tracemalloc.start()
+    function(file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "file_l_english.yml.json")
+        generate_paratranz_file(file_path, args.nb_entries, args.history_size)
+        print(f"Paratranz file of {args.nb_entries} entries: {os.path.getsize(file_path) / 1e6:.1f} MB")
+        assert read_with_json_load(file_path) == read_incrementally(file_path)
+        for name, function in [("json.load", read_with_json_load), ("incremental", read_incrementally)]:
+            duration, peak = measure_peak_memory(function, file_path)
+            print(f"{name}: {duration:.2f} s, peak memory {peak / 1e6:.1f} MB")
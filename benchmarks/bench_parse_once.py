@@ -0,0 +1,50 @@
+"""
+Compare parsing each destination file twice (file_to_keys_and_lines then file_to_keys_and_values)
+with the combined loader file_to_keys_values_and_lines on a synthetic 200k-line tree.
+
+Run from the root directory: python benchmarks/bench_parse_once.py
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from benchmarks.utils import generate_localization_tree, measure
+from paradox_localization_utils.lib.read_localization_file import (
+    file_to_keys_and_lines,
+    file_to_keys_and_values,
+    file_to_keys_values_and_lines,
+)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Benchmark of the combined localization loader")
+    parser.add_argument("-nb_files", type=int, help="Number of generated files", default=200)
+    parser.add_argument("-lines_per_file", type=int, help="Number of lines in each file", default=1000)
+    return parser.parse_args()
+
+
+def load_twice(file_paths):
+    for file_path in file_paths:
+        file_to_keys_and_lines(file_path)
+        file_to_keys_and_values(file_path)
+
+
+def load_once(file_paths):
+    for file_path in file_paths:
+        file_to_keys_values_and_lines(file_path)
+
+
+if __name__ == "__main__":
+    args = get_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_paths = generate_localization_tree(tmp_dir, "french", args.nb_files, args.lines_per_file)
+        tree_size = sum(os.path.getsize(file_path) for file_path in file_paths)
+        print(f"{args.nb_files * args.lines_per_file} lines in {len(file_paths)} files ({tree_size / 1e6:.1f} MB)")
+        twice = measure(load_twice, file_paths)
+        once = measure(load_once, file_paths)
+    print(f"Two loaders:     {twice:.3f} s, {2 * tree_size / 1e6:.1f} MB read")
+    print(f"Combined loader: {once:.3f} s, {tree_size / 1e6:.1f} MB read")
+    print(f"Speed-up: x{twice / once:.2f}")
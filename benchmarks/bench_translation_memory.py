@@ -0,0 +1,56 @@
+"""
+Measure the build time of a TranslationMemory and the time of fuzzy lookups of edited source texts.
+
+Run from the root directory: python benchmarks/bench_translation_memory.py
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from paradox_localization_utils.lib.translation_memory import DEFAULT_MIN_SIMILARITY, TranslationMemory
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Benchmark of the fuzzy translation memory")
+    parser.add_argument("-nb_entries", type=int, help="Number of entries in the translation memory", default=1000000)
+    parser.add_argument("-nb_queries", type=int, help="Number of fuzzy lookups", default=1000)
+    return parser.parse_args()
+
+
+def generate_text(rng: random.Random) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(rng.randint(3, 20))
+    )
+
+
+def edit_text(text: str, rng: random.Random) -> str:
+    position = rng.randrange(len(text))
+    return text[:position] + rng.choice(string.punctuation) + text[position + 1 :]
+
+
+if __name__ == "__main__":
+    args = get_args()
+    rng = random.Random(0)
+    sources = [generate_text(rng) for _ in range(args.nb_entries)]
+    translation_memory = TranslationMemory()
+    for i, source in enumerate(sources):
+        translation_memory.add(source, str(i))
+    queries = [(i, edit_text(sources[i], rng)) for i in rng.sample(range(args.nb_entries), args.nb_queries)]
+    start = time.perf_counter()
+    # The first lookup builds the index
+    translation_memory.find(queries[0][1])
+    print(f"Index of {len(translation_memory)} entries built in {time.perf_counter() - start:.1f} s")
+    start = time.perf_counter()
+    found = 0
+    for i, query in queries:
+        match = translation_memory.find(query, DEFAULT_MIN_SIMILARITY)
+        if match is not None and match[0] == str(i):
+            found += 1
+    duration = time.perf_counter() - start
+    print(f"{args.nb_queries} fuzzy lookups: {1000 * duration / args.nb_queries:.3f} ms by lookup")
+    print(f"{found / args.nb_queries:.1%} of the edited texts found")
@@ -0,0 +1,49 @@
+import os
+from pathlib import Path
+import random
+import string
+import time
+from typing import Callable
+
+
+def generate_localization_tree(
+    root_dir: str | Path, language: str, nb_files: int, lines_per_file: int, seed: int = 0
+) -> list[Path]:
+    """
+    Generate a synthetic tree of Paradox localization files
+    :param root_dir: Directory where the files are written
+    :param language: Language of the files (suffix and language line)
+    :param nb_files: Number of files to generate
+    :param lines_per_file: Number of localization lines in each file
+    :param seed: Seed of the random generator to have the same tree at each run
+    :return: Paths of the generated files
+    """
+    rng = random.Random(seed)
+    file_paths = []
+    for i in range(nb_files):
+        file_path = Path(root_dir) / f"dir_{i % 10}" / f"file_{i}_l_{language}.yml"
+        os.makedirs(file_path.parent, exist_ok=True)
+        with open(file_path, "w", encoding="utf8") as f:
+            f.write(f"\ufeffl_{language}:\n")
+            for j in range(lines_per_file):
+                if j % 50 == 0:
+                    f.write(f" # Section {j}\n")
+                words = " ".join(
+                    "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+                    for _ in range(rng.randint(3, 20))
+                )
+                f.write(f' KEY_{i}_{j}:{rng.randint(0, 3)} "{words} [Root.GetName]: $VALUE$"\n')
+        file_paths.append(file_path)
+    return file_paths
+
+
+def measure(function: Callable, *args, repeat: int = 3) -> float:
+    """
+    Return the best wall-clock time in seconds of several calls of function
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
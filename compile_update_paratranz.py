@@ -1,6 +1,6 @@
 from cx_Freeze import setup, Executable
 
-build_exe_options = {"build_exe": "update_paratranz/dist", "packages": ["requests"], "excludes": ["tkinter"]}
+build_exe_options = {"build_exe": "update_paratranz/dist", "packages": ["httpx"], "excludes": ["tkinter"]}
 
 setup(
     name="update_paratranz",
@@ -9,6 +9,7 @@ from paradox_localization_utils.lib.read_localization_file import (
     get_key_value_and_version,
     BadLocalizationException,
 )
+from paradox_localization_utils.lib.key_index import KeyIndex
 
 
 def get_args():
@@ -54,13 +55,14 @@ def add_missing_lines_imperator(source_dir, dest_dir):
     :return:
     """
     rel_to_dest_abs_path = dict()
-    dest_texts = dict()
+    dest_texts = KeyIndex()
     for root, _, files in os.walk(dest_dir):
         for file in files:
             abs_path = os.path.abspath(os.path.join(root, file))
             rel_to_dest_abs_path[abs_path[: abs_path.find("_l_")].replace(dest_dir, "")] = abs_path
             file_dest_texts, _ = file_to_keys_and_lines(abs_path)
-            dest_texts = {**dest_texts, **file_dest_texts}
+            dest_texts.add_file(abs_path, file_dest_texts)
+    dest_texts.print_duplicates(dest_dir)
     for root, _, files in os.walk(source_dir):
         for file in files:
             abs_path = os.path.abspath(os.path.join(root, file))
@@ -83,7 +85,7 @@ def add_missing_lines_eu_hoi_stellaris(source_dir, source_lang, dest_lang):
     :return:
     """
     rel_to_dest_abs_path = dict()
-    dest_texts = dict()
+    dest_texts = KeyIndex()
     for root, _, files in os.walk(source_dir):
         for file in files:
             if file.endswith(dest_lang + ".yml"):
@@ -91,7 +93,8 @@ def add_missing_lines_eu_hoi_stellaris(source_dir, source_lang, dest_lang):
                 rel_to_dest_abs_path[abs_path[: abs_path.find("_l_")].replace(source_dir, "")] = abs_path
                 file_dest_texts, _ = file_to_keys_and_lines(abs_path)
                 os.remove(abs_path)
-                dest_texts = {**dest_texts, **file_dest_texts}
+                dest_texts.add_file(abs_path, file_dest_texts)
+    dest_texts.print_duplicates(source_dir)
     for root, _, files in os.walk(source_dir):
         for file in files:
             if file.endswith(source_lang + ".yml"):
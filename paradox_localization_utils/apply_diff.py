@@ -5,10 +5,9 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
 from paradox_localization_utils.lib.read_localization_file import (
-    file_to_keys_and_lines,
+    file_to_keys_values_and_lines,
     get_key_value_and_version,
     BadLocalizationException,
-    file_to_keys_and_values,
 )
 
 
@@ -23,10 +22,8 @@ def get_args():
 
 
 def apply_diff(old_source_file, new_source_file, dest_file, space_prefix="  ", keep_edited=False):
-    dest_texts, dest_first_line = file_to_keys_and_lines(dest_file)
-    dest_values, _ = file_to_keys_and_values(dest_file)
-    old_source_texts, _ = file_to_keys_and_lines(old_source_file)
-    old_source_values, _ = file_to_keys_and_values(old_source_file)
+    dest_values, dest_texts, dest_first_line = file_to_keys_values_and_lines(dest_file)
+    old_source_values, old_source_texts, _ = file_to_keys_values_and_lines(old_source_file)
 
     with open(new_source_file, "r", encoding="utf8") as f:
         source_lines = f.readlines()
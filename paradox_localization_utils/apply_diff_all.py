@@ -1,17 +1,27 @@
 import argparse
 import shutil
-import Levenshtein
 import os
 
 import sys
 
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from paradox_localization_utils.lib.argument_types import positive_int
 from paradox_localization_utils.lib.read_localization_file import (
-    file_to_keys_and_lines,
+    file_to_keys_values_and_lines,
     get_key_value_and_version,
     BadLocalizationException,
-    file_to_keys_and_values,
 )
+from paradox_localization_utils.lib.change_classification import (
+    ChangeClass,
+    DEFAULT_MAJOR_EDIT_THRESHOLD,
+    classify_change,
+    classify_changes,
+)
+from paradox_localization_utils.lib.key_index import KeyIndex
+from paradox_localization_utils.lib.parallel_parsing import list_localization_files, load_localization_dir, parse_files
+from paradox_localization_utils.lib.parsed_file_cache import compute_file_hash, enable_parsed_file_cache
+from paradox_localization_utils.lib.translation_memory import FUZZY_MATCH_VERSION
+from paradox_localization_utils.lib.translation_memory_store import build_translation_memory
 
 DIR_TO_TRANSLATE = "to_translate"
 FILE_TO_TRANSLATE_PREFIX = "file_to_translate"
@@ -34,12 +44,46 @@ def get_args():
     parser.add_argument("-dest_lang", type=str, help="Destination language when EUIV, HoI4 or Stellaris game")
     parser.add_argument("-keys_to_ignore", type=str, help="File with at each lines a key to ignore")
     parser.add_argument("-old_format", action="store_true", help="Use old format for EUIV, HoI4 or Stellaris game")
+    parser.add_argument("-jobs", type=int, help="Number of processes to parse files (-1 for all CPUs)", default=1)
+    parser.add_argument(
+        "-cache_dir", type=str, help="Directory of the cache of parsed files, to not parse unchanged files again"
+    )
+    parser.add_argument(
+        "-edit_threshold",
+        type=positive_int,
+        help="Minimal Levenshtein distance between old and new source texts to discard the translation",
+        default=DEFAULT_MAJOR_EDIT_THRESHOLD,
+    )
+    parser.add_argument(
+        "-batch",
+        action="store_true",
+        help="Classify all source changes in one batch and print a summary of the changes by file",
+    )
+    parser.add_argument(
+        "-incremental", action="store_true", help="Keep destination files whose source file has not changed"
+    )
+    parser.add_argument(
+        "-fuzzy_similarity",
+        type=float,
+        help="Reuse the translation of similar source texts (similarity between 0 and 1, ex: 0.9), "
+        + f"written with version {FUZZY_MATCH_VERSION}",
+    )
+    parser.add_argument(
+        "-translation_memory_db", type=str, help="Translation memory database completing the existing translations"
+    )
     return parser.parse_args()
 
 
-def write_new_line_or_get_existing_translation(f, key, value, existing_translations, lines_to_translate):
+def write_new_line_or_get_existing_translation(
+    f, key, value, existing_translations, lines_to_translate, fuzzy_similarity=None
+):
     if value in existing_translations:
         f.write(" " + key + ':0 "' + existing_translations[value] + '"\n')
+        return
+    fuzzy_match = None if fuzzy_similarity is None else existing_translations.find(value, fuzzy_similarity)
+    if fuzzy_match is not None:
+        # Translation of a similar source text, to be reviewed
+        f.write(" " + key + f':{FUZZY_MATCH_VERSION} "' + fuzzy_match[0] + '"\n')
     else:
         line = " " + key + ':9 "' + value + '"\n'
         f.write(line)
@@ -65,7 +109,20 @@ def apply_diff_one_file(
     lines_to_update_source,
     lines_to_update_dest,
     keys_to_ignore,
+    edit_threshold=DEFAULT_MAJOR_EDIT_THRESHOLD,
+    change_classes=None,
+    fuzzy_similarity=None,
 ):
+    """
+    Write the destination file corresponding to a source file
+    :param existing_translations: TranslationMemory {old_source_text: dest_text}
+    :param edit_threshold: Minimal Levenshtein distance between old and new source texts to discard the translation
+    :param change_classes: Dict {key: ChangeClass} precomputed for keys in old and new source,
+    the missing keys are classified on the fly
+    :param fuzzy_similarity: Minimal similarity to reuse the translation of a similar source text, None to disable
+    """
+    if change_classes is None:
+        change_classes = dict()
     with open(source_file_path, "r", encoding="utf8") as f:
         source_lines = f.readlines()
 
@@ -94,18 +151,24 @@ def apply_diff_one_file(
                     # Write the new source line
                     f.write(source_line)
                     continue
-                if key in old_source_values and Levenshtein.distance(old_source_values[key]["value"], value) >= 10:
+                if key not in old_source_values:
+                    change = None
+                elif key in change_classes:
+                    change = change_classes[key]
+                else:
+                    change = classify_change(old_source_values[key]["value"], value, edit_threshold)
+                if change == ChangeClass.MAJOR_EDIT:
                     # The source has changed enough to replace destination by current source text
                     # OR translation if already translated elsewhere
                     write_new_line_or_get_existing_translation(
-                        f, key, value, existing_translations, lines_to_translate
+                        f, key, value, existing_translations, lines_to_translate, fuzzy_similarity
                     )
                 elif key in dest_texts and (dest_texts[key] != "" or value == ""):
                     try:
                         _, dest_text, _ = get_key_value_and_version(dest_texts[key])
                     except BadLocalizationException:
                         dest_text = ""
-                    if key in old_source_values and Levenshtein.distance(old_source_values[key]["value"], value) > 0:
+                    if change == ChangeClass.MINOR_EDIT:
                         if dest_text != old_source_values[key]["value"]:
                             # The source has little changed and has been translated,
                             # we keep translation but change version number
@@ -121,7 +184,7 @@ def apply_diff_one_file(
                             # Add current source text because the previous destination was not translated
                             # OR translation if already translated elsewhere
                             write_new_line_or_get_existing_translation(
-                                f, key, value, existing_translations, lines_to_translate
+                                f, key, value, existing_translations, lines_to_translate, fuzzy_similarity
                             )
                     else:
                         # Keep previous translation
@@ -130,13 +193,91 @@ def apply_diff_one_file(
                     # Add current source text
                     # OR translation if already translated elsewhere
                     write_new_line_or_get_existing_translation(
-                        f, key, value, existing_translations, lines_to_translate
+                        f, key, value, existing_translations, lines_to_translate, fuzzy_similarity
                     )
             first_line = False
 
 
+def get_unchanged_source_files(old_dir, current_dir, source_lang):
+    """
+    Get the source files which have the same content in the old and the current directories
+    :param old_dir: Directory with source Paradox files for previous version
+    :param current_dir: Directory with source Paradox files for new version
+    :param source_lang: Source language
+    :return: Set of the absolute paths of the unchanged files in current_dir
+    """
+    res = set()
+    for abs_path in list_localization_files(current_dir, source_lang + ".yml"):
+        old_path = os.path.join(old_dir, os.path.relpath(abs_path, current_dir))
+        if (
+            os.path.isfile(old_path)
+            and os.path.getsize(old_path) == os.path.getsize(abs_path)
+            and compute_file_hash(old_path) == compute_file_hash(abs_path)
+        ):
+            res.add(abs_path)
+    return res
+
+
+def compute_change_classes(old_source_values, new_source_values, edit_threshold, jobs=1):
+    """
+    Classify in one batch the changes of the keys present in old and new sources
+    :param old_source_values: Dict {key: {"value": value, "version": version}} of the old source
+    :param new_source_values: KeyIndex {key: {"value": value, "version": version}} of the new source
+    :param edit_threshold: Minimal Levenshtein distance between old and new source texts to discard the translation
+    :param jobs: Number of threads to compute the distances (-1 for all CPUs)
+    :return: Dict {key: ChangeClass value}, without the keys duplicated in the new source
+    """
+    keys = [key for key in new_source_values if key in old_source_values and key not in new_source_values.duplicates]
+    classes = classify_changes(
+        [old_source_values[key]["value"] for key in keys],
+        [new_source_values[key]["value"] for key in keys],
+        edit_threshold,
+        jobs,
+    )
+    return dict(zip(keys, classes))
+
+
+def print_change_summary(change_classes, old_source_values, new_source_values, source_dir):
+    """
+    Print a histogram of the proportion of changed keys in each new source file
+    :param change_classes: Dict {key: ChangeClass value}
+    :param old_source_values: Dict {key: {"value": value, "version": version}} of the old source
+    :param new_source_values: KeyIndex {key: {"value": value, "version": version}} of the new source
+    :param source_dir: Directory with source Paradox files for new version
+    """
+    # [unchanged, minor edits, major edits, new keys] by file
+    counts_by_file = dict()
+    for key, file_path in new_source_values.file_by_key.items():
+        counts = counts_by_file.setdefault(file_path, [0, 0, 0, 0])
+        if key not in old_source_values:
+            counts[3] += 1
+        elif key in change_classes:
+            counts[change_classes[key]] += 1
+    total = [sum(counts[i] for counts in counts_by_file.values()) for i in range(4)]
+    print(f"Source changes: {total[0]} unchanged, {total[1]} minor edits, {total[2]} major edits, {total[3]} new keys")
+    changed_files = [(file_path, counts) for file_path, counts in counts_by_file.items() if sum(counts[1:]) > 0]
+    changed_files.sort(key=lambda file_and_counts: sum(file_and_counts[1][1:]) / sum(file_and_counts[1]), reverse=True)
+    for file_path, counts in changed_files:
+        ratio = sum(counts[1:]) / sum(counts)
+        print(
+            f"{ratio:7.1%} {'#' * round(20 * ratio):<20} {os.path.relpath(file_path, source_dir)} "
+            + f"(minor: {counts[1]}, major: {counts[2]}, new: {counts[3]})"
+        )
+
+
 def apply_diff_all(
-    old_dir, current_paradox_localization_utils_dir, current_dest_dir, source_lang, dest_lang, keys_to_ignore
+    old_dir,
+    current_paradox_localization_utils_dir,
+    current_dest_dir,
+    source_lang,
+    dest_lang,
+    keys_to_ignore,
+    jobs=1,
+    incremental=False,
+    edit_threshold=DEFAULT_MAJOR_EDIT_THRESHOLD,
+    batch=False,
+    fuzzy_similarity=None,
+    translation_memory_db=None,
 ):
     """
     Apply diff for all files
@@ -146,35 +287,58 @@ def apply_diff_all(
     :param source_lang: Source language
     :param dest_lang: Destination language
     :param keys_to_ignore: List of keys to ignore
+    :param jobs: Number of processes to parse files (-1 for all CPUs)
+    :param incremental: Skip the source files identical to the old ones and keep their destination files,
+    assuming these destination files were up to date with the old source
+    :param edit_threshold: Minimal Levenshtein distance between old and new source texts to discard the translation
+    :param batch: Classify all source changes in one batch and print a summary of the changes by file
+    :param fuzzy_similarity: Minimal similarity (between 0 and 1) to reuse the translation of a similar source text,
+    written with version FUZZY_MATCH_VERSION, None to reuse only translations of identical source texts
+    :param translation_memory_db: Path of a TranslationMemoryStore database whose translations are reused too
     :return:
     """
+    # Find the source files to skip
+    unchanged_rel_paths = set()
+    if incremental:
+        for abs_path in get_unchanged_source_files(old_dir, current_paradox_localization_utils_dir, source_lang):
+            unchanged_rel_paths.add(
+                abs_path[: abs_path.find("_l_")].replace(current_paradox_localization_utils_dir, "")
+            )
     # Store old source texts
-    old_source_values = dict()
-    for root, _, files in os.walk(old_dir):
-        for file in files:
-            if file.endswith(source_lang + ".yml"):
-                abs_path = os.path.abspath(os.path.join(root, file))
-                file_old_source_texts, _ = file_to_keys_and_values(abs_path)
-                old_source_values = {**old_source_values, **file_old_source_texts}
+    old_source_values = load_localization_dir(old_dir, source_lang + ".yml", jobs)
+    old_source_values.print_duplicates(old_dir)
+    # Classify source changes
+    change_classes = None
+    if batch:
+        new_source_values = load_localization_dir(current_paradox_localization_utils_dir, source_lang + ".yml", jobs)
+        new_source_values.print_duplicates(current_paradox_localization_utils_dir)
+        change_classes = compute_change_classes(old_source_values, new_source_values, edit_threshold, jobs)
+        print_change_summary(
+            change_classes, old_source_values, new_source_values, current_paradox_localization_utils_dir
+        )
     # Store current dest texts and delete files
     rel_to_dest_abs_path = dict()
     dest_texts = dict()
-    dest_values = dict()
-    for root, _, files in os.walk(current_dest_dir):
-        for file in files:
-            if file.endswith(dest_lang + ".yml"):
-                abs_path = os.path.abspath(os.path.join(root, file))
-                rel_to_dest_abs_path[abs_path[: abs_path.find("_l_")].replace(current_dest_dir, "")] = abs_path
-                file_dest_texts, _ = file_to_keys_and_lines(abs_path)
-                file_dest_values, _ = file_to_keys_and_values(abs_path)
-                os.remove(abs_path)
-                dest_texts = {**dest_texts, **file_dest_texts}
-                dest_values = {**dest_values, **file_dest_values}
+    dest_values = KeyIndex()
+    dest_file_paths = list_localization_files(current_dest_dir, dest_lang + ".yml")
+    for abs_path, (file_dest_values, file_dest_texts, _) in zip(
+        dest_file_paths, parse_files(dest_file_paths, file_to_keys_values_and_lines, jobs)
+    ):
+        rel_path = abs_path[: abs_path.find("_l_")].replace(current_dest_dir, "")
+        rel_to_dest_abs_path[rel_path] = abs_path
+        if rel_path not in unchanged_rel_paths:
+            os.remove(abs_path)
+        dest_texts.update(file_dest_texts)
+        dest_values.add_file(abs_path, file_dest_values)
+    dest_values.print_duplicates(current_dest_dir)
     # Map current translation
     existing_translations = dict()
     for source_key in old_source_values.keys():
         if source_key in dest_values.keys() and old_source_values[source_key]["value"] != "":
             existing_translations[old_source_values[source_key]["value"]] = dest_values[source_key]["value"]
+    existing_translations = build_translation_memory(
+        existing_translations, translation_memory_db, source_lang, dest_lang, fuzzy_similarity is not None
+    )
     # Store lines to translate
     lines_to_translate = [f"\ufeffl_{source_lang}:\n"]
     # Store lines to update
@@ -182,31 +346,42 @@ def apply_diff_all(
     lines_to_update_source = [f"\ufeffl_{source_lang}:\n"]
     lines_to_update_dest = [f"\ufeffl_{dest_lang}:\n"]
     # Apply diff with current source texts
-    for root, _, files in os.walk(current_paradox_localization_utils_dir):
-        for file in files:
-            if file.endswith(source_lang + ".yml"):
-                abs_path = os.path.abspath(os.path.join(root, file))
-                rel_path = abs_path[: abs_path.find("_l_")].replace(current_paradox_localization_utils_dir, "")
-                if rel_path in rel_to_dest_abs_path:
-                    dest_file_path = rel_to_dest_abs_path[rel_path]
-                else:
-                    dest_file_path = abs_path.replace(
-                        current_paradox_localization_utils_dir, current_dest_dir
-                    ).replace(source_lang + ".yml", dest_lang + ".yml")
-                apply_diff_one_file(
-                    abs_path,
-                    dest_file_path,
-                    old_source_values,
-                    dest_texts,
-                    "\ufeffl_" + dest_lang + ":\n",
-                    source_lang,
-                    existing_translations,
-                    lines_to_translate,
-                    lines_to_update_old_source,
-                    lines_to_update_source,
-                    lines_to_update_dest,
-                    keys_to_ignore,
-                )
+    skipped_files = 0
+    # Close the translation memory store once every file is diffed
+    with existing_translations:
+        for root, _, files in os.walk(current_paradox_localization_utils_dir):
+            for file in files:
+                if file.endswith(source_lang + ".yml"):
+                    abs_path = os.path.abspath(os.path.join(root, file))
+                    rel_path = abs_path[: abs_path.find("_l_")].replace(current_paradox_localization_utils_dir, "")
+                    if rel_path in unchanged_rel_paths and rel_path in rel_to_dest_abs_path:
+                        skipped_files += 1
+                        continue
+                    if rel_path in rel_to_dest_abs_path:
+                        dest_file_path = rel_to_dest_abs_path[rel_path]
+                    else:
+                        dest_file_path = abs_path.replace(
+                            current_paradox_localization_utils_dir, current_dest_dir
+                        ).replace(source_lang + ".yml", dest_lang + ".yml")
+                    apply_diff_one_file(
+                        abs_path,
+                        dest_file_path,
+                        old_source_values,
+                        dest_texts,
+                        "\ufeffl_" + dest_lang + ":\n",
+                        source_lang,
+                        existing_translations,
+                        lines_to_translate,
+                        lines_to_update_old_source,
+                        lines_to_update_source,
+                        lines_to_update_dest,
+                        keys_to_ignore,
+                        edit_threshold,
+                        change_classes,
+                        fuzzy_similarity,
+                    )
+    if incremental:
+        print(f"{skipped_files} unchanged files skipped")
     # Export lines to  and to update
     lines_to_export = [lines_to_translate, lines_to_update_old_source, lines_to_update_source, lines_to_update_dest]
     directories = [
@@ -232,7 +407,19 @@ def apply_diff_all(
                 f.writelines(lines_to_export[i])
 
 
-def apply_diff_all_old_formats(old_dir, current_dir, source_lang, dest_lang, keys_to_ignore):
+def apply_diff_all_old_formats(
+    old_dir,
+    current_dir,
+    source_lang,
+    dest_lang,
+    keys_to_ignore,
+    jobs=1,
+    incremental=False,
+    edit_threshold=DEFAULT_MAJOR_EDIT_THRESHOLD,
+    batch=False,
+    fuzzy_similarity=None,
+    translation_memory_db=None,
+):
     """
     Apply diff for all files for old EUIV, HoI4 or Stellaris localisation format
     :param old_dir: Directory with source Paradox files for previous version
@@ -240,13 +427,34 @@ def apply_diff_all_old_formats(old_dir, current_dir, source_lang, dest_lang, key
     :param source_lang: Source language
     :param dest_lang: Destination language
     :param keys_to_ignore: List of keys to ignore
+    :param jobs: Number of processes to parse files (-1 for all CPUs)
+    :param incremental: Skip the source files identical to the old ones and keep their destination files
+    :param edit_threshold: Minimal Levenshtein distance between old and new source texts to discard the translation
+    :param batch: Classify all source changes in one batch and print a summary of the changes by file
+    :param fuzzy_similarity: Minimal similarity to reuse the translation of a similar source text, None to disable
+    :param translation_memory_db: Path of a TranslationMemoryStore database whose translations are reused too
     :return:
     """
-    return apply_diff_all(old_dir, current_dir, current_dir, source_lang, dest_lang, keys_to_ignore)
+    return apply_diff_all(
+        old_dir,
+        current_dir,
+        current_dir,
+        source_lang,
+        dest_lang,
+        keys_to_ignore,
+        jobs,
+        incremental,
+        edit_threshold,
+        batch,
+        fuzzy_similarity,
+        translation_memory_db,
+    )
 
 
 if __name__ == "__main__":
     args = get_args()
+    if args.cache_dir is not None:
+        enable_parsed_file_cache(args.cache_dir)
     answer = input(f"Do want apply diff with {args.old_source_dir} as old source directory ? [y/N]")
     if answer.lower() == "y":
         if args.keys_to_ignore is None:
@@ -256,11 +464,32 @@ if __name__ == "__main__":
                 keys_to_ignore = [line.replace("\n", "") for line in f.readlines()]
         if args.old_format:
             apply_diff_all_old_formats(
-                args.old_source_dir, args.source_dir, args.source_lang, args.dest_lang, keys_to_ignore
+                args.old_source_dir,
+                args.source_dir,
+                args.source_lang,
+                args.dest_lang,
+                keys_to_ignore,
+                args.jobs,
+                args.incremental,
+                args.edit_threshold,
+                args.batch,
+                args.fuzzy_similarity,
+                args.translation_memory_db,
             )
         else:
             apply_diff_all(
-                args.old_source_dir, args.source_dir, args.dest_dir, args.source_lang, args.dest_lang, keys_to_ignore
+                args.old_source_dir,
+                args.source_dir,
+                args.dest_dir,
+                args.source_lang,
+                args.dest_lang,
+                keys_to_ignore,
+                args.jobs,
+                args.incremental,
+                args.edit_threshold,
+                args.batch,
+                args.fuzzy_similarity,
+                args.translation_memory_db,
             )
             for root, _, files in os.walk(os.path.join(args.dest_dir, args.source_lang)):
                 dest_dir = root.replace(
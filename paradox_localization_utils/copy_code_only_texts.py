@@ -2,8 +2,9 @@
 from pathlib import Path
 import re
 
-from paradox_localization_utils.lib.read_localization_file import file_to_keys_and_values
-from paradox_localization_utils.lib.write_localization_file import edit_file_with_dict
+from paradox_localization_utils.lib.parallel_parsing import load_localization_dir
+from paradox_localization_utils.lib.parsed_file_cache import enable_parsed_file_cache
+from paradox_localization_utils.lib.write_localization_file import edit_files_with_dict, group_edits_by_file
 
 CODE_ONLY_REGEX = re.compile(r"(\[[^\]]+\]\s*)+")
 
@@ -14,25 +15,32 @@ def get_args():
     parser.add_argument("dest_dir", type=str, help="Directory with destination/target Paradox files")
     parser.add_argument("-source_lang", type=str, help="Source language")
     parser.add_argument("-dest_lang", type=str, help="Destination/target language")
+    parser.add_argument("-jobs", type=int, help="Number of processes to parse files (-1 for all CPUs)", default=1)
+    parser.add_argument(
+        "-cache_dir", type=str, help="Directory of the cache of parsed files, to not parse unchanged files again"
+    )
     return parser.parse_args()
 
 
-def extract_code_only_texts(source_dir: Path, source_lang: str) -> dict[str, str]:
+def extract_code_only_texts(source_dir: Path, source_lang: str, jobs: int = 1) -> dict[str, str]:
     res: dict[str, str] = dict()
-    for file_path in source_dir.rglob(f"*l_{source_lang}.yml"):
-        keys_and_values_versions, _ = file_to_keys_and_values(file_path)
-        for key, value_and_version in keys_and_values_versions.items():
-            if re.fullmatch(CODE_ONLY_REGEX, value_and_version["value"]):
-                res[key] = value_and_version["value"]
+    keys_and_values_versions = load_localization_dir(source_dir, f"l_{source_lang}.yml", jobs)
+    for key, value_and_version in keys_and_values_versions.items():
+        if re.fullmatch(CODE_ONLY_REGEX, value_and_version["value"]):
+            res[key] = value_and_version["value"]
     return res
 
 
-def copy_code_only_texts(source_dir: Path, dest_dir: Path, source_lang: str, dest_lang: str):
-    code_only_sources = extract_code_only_texts(source_dir, source_lang)
-    for file_path in dest_dir.rglob(f"*l_{dest_lang}.yml"):
-        edit_file_with_dict(file_path, code_only_sources)
+def copy_code_only_texts(source_dir: Path, dest_dir: Path, source_lang: str, dest_lang: str, jobs: int = 1):
+    code_only_sources = extract_code_only_texts(source_dir, source_lang, jobs)
+    # Only the files with a different value for a code only key are edited
+    dest_index = load_localization_dir(dest_dir, f"l_{dest_lang}.yml", jobs)
+    nb_changed_lines, nb_changed_files = edit_files_with_dict(group_edits_by_file(code_only_sources, dest_index))
+    print(f"{nb_changed_lines} code only texts copied in {nb_changed_files} files")
 
 
 if __name__ == "__main__":
     args = get_args()
-    copy_code_only_texts(Path(args.source_dir), Path(args.dest_dir), args.source_lang, args.dest_lang)
+    if args.cache_dir is not None:
+        enable_parsed_file_cache(args.cache_dir)
+    copy_code_only_texts(Path(args.source_dir), Path(args.dest_dir), args.source_lang, args.dest_lang, args.jobs)
@@ -1,11 +1,19 @@
 import argparse
 import os
 import shutil
+import tempfile
 import time
 import zipfile
-import requests
 
-from lib.utils import manage_request_error
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from paradox_localization_utils.lib.paratranz_client import ParatranzClient
+
+DEFAULT_ARTIFACT_TIMEOUT = 600
+# Delays in seconds between two checks of the artifact, doubled at each check
+FIRST_POLLING_DELAY = 2
+MAX_POLLING_DELAY = 30
 
 
 def get_args():
@@ -18,70 +26,137 @@ def get_args():
     parser.add_argument(
         "utf8_dir_path", type=str, help="Path where the downloaded utf8 directory artifact will be saved"
     )
+    parser.add_argument(
+        "-artifact_timeout",
+        type=float,
+        help="Maximum time in seconds to wait for the new artifact",
+        default=DEFAULT_ARTIFACT_TIMEOUT,
+    )
     return parser.parse_args()
 
 
-def update_artifact(token: str, project_id: int):
+def update_artifact(token: str, project_id: int, client: ParatranzClient | None = None):
     """Update the artifacts of a Paratranz project
 
     :param token: Paratranz API token
     :param project_id: Id of the project on Paratranz
+    :param client: ParatranzClient to reuse its connections, a new one is created and closed if None
+    """
+    if client is None:
+        with ParatranzClient(token) as client:
+            client.update_artifact(project_id)
+    else:
+        client.update_artifact(project_id)
+
+
+def update_artifact_and_wait(
+    token: str, project_id: int, timeout: float = DEFAULT_ARTIFACT_TIMEOUT, client: ParatranzClient | None = None
+) -> dict:
+    """Update the artifacts of a Paratranz project and wait until the new artifact is ready
+
+    :param token: Paratranz API token
+    :param project_id: Id of the project on Paratranz
+    :param timeout: Maximum time in seconds to wait for the new artifact
+    :param client: ParatranzClient to reuse its connections, a new one is created and closed if None
+    :return: Information of the new artifact
+    """
+    if client is None:
+        with ParatranzClient(token) as client:
+            return update_artifact_and_wait(token, project_id, timeout, client)
+    previous_artifact = client.get_artifact(project_id)
+    previous_creation_date = None if previous_artifact is None else previous_artifact.get("createdAt")
+    update_artifact(token, project_id, client)
+    print("Artifacts updated, wait for the new artifact")
+    return wait_for_artifact(client, project_id, previous_creation_date, timeout)
+
+
+def wait_for_artifact(
+    client: ParatranzClient, project_id: int, previous_creation_date: str | None, timeout: float
+) -> dict:
+    """Check the artifact of a Paratranz project, with an exponential backoff, until it is newer than the previous one
+
+    :param client: ParatranzClient
+    :param project_id: Id of the project on Paratranz
+    :param previous_creation_date: Creation date of the artifact before the update, None if there was no artifact
+    :param timeout: Maximum time in seconds to wait
+    :return: Information of the new artifact
     """
-    headers = {"Authorization": token}
-    url = f"https://paratranz.cn/api/projects/{project_id}/artifacts"
-    r = requests.post(url, headers=headers)
-    manage_request_error(r)
+    start = time.monotonic()
+    delay = FIRST_POLLING_DELAY
+    while True:
+        artifact = client.get_artifact(project_id)
+        if artifact is not None and artifact.get("createdAt") != previous_creation_date:
+            print(f"New artifact ready after {time.monotonic() - start:.0f} seconds")
+            return artifact
+        remaining_time = timeout - (time.monotonic() - start)
+        if remaining_time <= 0:
+            raise TimeoutError(f"The artifact of the project {project_id} is not updated after {timeout} seconds")
+        time.sleep(min(delay, remaining_time))
+        delay = min(delay * 2, MAX_POLLING_DELAY)
 
 
-def download_artifact(token: str, project_id: int, raw_dir_path: str, utf8_dir_path: str):
+def download_artifact(
+    token: str, project_id: int, raw_dir_path: str, utf8_dir_path: str | None, client: ParatranzClient | None = None
+):
     """Download the artifacts of a Paratranz project
 
     :param token: Paratranz API token
     :param project_id: Id of the project on Paratranz
     :param raw_dir_path: Where raw files where will be stored
-    :param utf8_dir_path: Where utf8 files where will be stored
+    :param utf8_dir_path: Where utf8 files where will be stored, None to not extract them
+    :param client: ParatranzClient to reuse its connections, a new one is created and closed if None
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_zip_file = os.path.join(tmp_dir, "artifact.zip")
+        download_artifact_zip(token, project_id, output_zip_file, client)
+        print("Extract the artifact")
+        with zipfile.ZipFile(output_zip_file, "r") as zip_ref:
+            extract_artifact(zip_ref, {"raw": raw_dir_path, "utf8": utf8_dir_path})
+
+
+def download_artifact_zip(token: str, project_id: int, output_zip_file: str, client: ParatranzClient | None = None):
+    """Download the artifacts of a Paratranz project without extracting them
+
+    :param token: Paratranz API token
+    :param project_id: Id of the project on Paratranz
+    :param output_zip_file: Path where the zip file will be written
+    :param client: ParatranzClient to reuse its connections, a new one is created and closed if None
     """
-    headers = {"Authorization": token}
-    url = f"https://paratranz.cn/api/projects/{project_id}/artifacts/download"
-    r = requests.get(url, headers=headers)
-    manage_request_error(r)
-    download_url = r.url
+    if client is None:
+        with ParatranzClient(token) as client:
+            return download_artifact_zip(token, project_id, output_zip_file, client)
+    # The redirection is not followed, the artifact is streamed below
+    download_url = client.get_artifact_download_url(project_id)
     print(f"Download artefact from {download_url}")
-    output_zip_file = "tmp.zip"
-    with open(output_zip_file, "wb") as f:
-        r = requests.get(download_url, timeout=60)
-        manage_request_error(r)
-        f.write(r.content)
-    print("Extract the artifact")
-    try:
-        zip_ref = zipfile.ZipFile(output_zip_file, "r")
-        try:
-            zip_ref.extractall(".")
-        finally:
-            zip_ref.close()
-    finally:
-        os.remove(output_zip_file)
-    print("Move raw files")
-    move_files("raw", raw_dir_path)
-    print("Move utf8 files")
-    move_files("utf8", utf8_dir_path)
-
-
-def move_files(source_dir: str, dest_dir: str):
-    """Delete dest_dir if it exists and replace it by source_dir
-
-    :param source_dir: Directory to move
-    :param dest_dir: Destination directory
+    client.download_to_file(download_url, output_zip_file)
+
+
+def extract_artifact(zip_ref: zipfile.ZipFile, dest_dirs: dict[str, str | None]):
+    """Extract each top directory of the artifact to its destination directory, which is replaced
+
+    :param zip_ref: Artifact
+    :param dest_dirs: Destination directory of each top directory of the artifact {"raw": raw_dir_path},
+    None to not extract a top directory
     """
-    if os.path.exists(dest_dir):
-        shutil.rmtree(dest_dir)
-    shutil.move(source_dir, dest_dir)
+    for dest_dir in dest_dirs.values():
+        if dest_dir is not None and os.path.exists(dest_dir):
+            shutil.rmtree(dest_dir)
+    for member in zip_ref.infolist():
+        top_dir, _, relative_path = member.filename.partition("/")
+        dest_dir = dest_dirs.get(top_dir)
+        if dest_dir is None or member.is_dir():
+            continue
+        relative_path = os.path.normpath(relative_path)
+        if os.path.isabs(relative_path) or relative_path.startswith(".."):
+            raise ValueError(f"Invalid path in the artifact: {member.filename}")
+        dest_path = os.path.join(dest_dir, relative_path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        with zip_ref.open(member) as source, open(dest_path, "wb") as dest:
+            shutil.copyfileobj(source, dest)
 
 
 if __name__ == "__main__":
     args = get_args()
-    update_artifact(args.token, args.project_id)
-    waiting_time = 20
-    print(f"Artifacts updated, wait {waiting_time} seconds before downloading")
-    time.sleep(waiting_time)
-    download_artifact(args.token, args.project_id, args.raw_dir_path, args.utf8_dir_path)
+    with ParatranzClient(args.token) as client:
+        update_artifact_and_wait(args.token, args.project_id, args.artifact_timeout, client)
+        download_artifact(args.token, args.project_id, args.raw_dir_path, args.utf8_dir_path, client)
@@ -1,16 +1,24 @@
 import argparse
+from collections import defaultdict
+import csv
+from functools import partial
 import os
 from pathlib import Path
-import pandas as pd
+from typing import Iterator
 
 import sys
 
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
-from paradox_localization_utils.lib.read_localization_file import (
-    file_to_keys_and_values,
-    get_key_value_and_version,
-    BadLocalizationException,
-)
+from paradox_localization_utils.lib.key_index import KeyIndex
+from paradox_localization_utils.lib.read_localization_file import file_to_keys_and_values
+from paradox_localization_utils.lib.parallel_parsing import load_localization_dir, parse_files
+from paradox_localization_utils.lib.parsed_file_cache import enable_parsed_file_cache
+from paradox_localization_utils.lib.translation_memory import FUZZY_MATCH_VERSION, TranslationMemory
+from paradox_localization_utils.lib.translation_memory_store import build_translation_memory
+from paradox_localization_utils.lib.write_localization_file import edit_files_with_dict, group_edits_by_file
+
+# Readers of the CK2 CSV files, pandas is an optional dependency only imported when used
+CSV_READERS = ["csv", "pandas"]
 
 
 def get_args():
@@ -23,30 +31,92 @@ def get_args():
     parser.add_argument("dest_lang", type=str, help="Destination language when EUIV, HoI4 or Stellaris game")
     parser.add_argument("-source_col_ck2", type=int, help="Source language column index for CK2 files")
     parser.add_argument("-dest_col_ck2", type=int, help="Destination language column index for CK2 files")
+    parser.add_argument("-jobs", type=int, help="Number of processes to parse files (-1 for all CPUs)", default=1)
+    parser.add_argument(
+        "-cache_dir", type=str, help="Directory of the cache of parsed files, to not parse unchanged files again"
+    )
+    parser.add_argument(
+        "-csv_reader", type=str, choices=CSV_READERS, help="Reader of the CK2 CSV files (default: csv)", default="csv"
+    )
+    parser.add_argument(
+        "-fuzzy_similarity",
+        type=float,
+        help="Insert the translation of similar source texts (similarity between 0 and 1, ex: 0.9), "
+        + f"written with version {FUZZY_MATCH_VERSION}",
+    )
+    parser.add_argument(
+        "-translation_memory_db", type=str, help="Translation memory database completing the extracted translation"
+    )
     return parser.parse_args()
 
 
 def extract_translation_from_CK2_file(
-    ck2_loc_file: str | Path, extracted_translation: dict[str, str], source_col_ck2: int, dest_col_ck2: int
+    ck2_loc_file: str | Path,
+    extracted_translation: dict[str, str],
+    source_col_ck2: int,
+    dest_col_ck2: int,
+    csv_reader: str = "csv",
 ):
     """
-    Add {source_text: dest_text} to extracted_translation dict
+    Add {source_text: dest_text} to extracted_translation dict, the rows with an empty text are ignored
     :param ck2_loc_file: Path of the CK2 localisation file
     :param extracted_translation:  Dictionary which will be completed
     :param source_col_ck2: Index of the source language column
     :param dest_col_ck2: Index of the destination language column
+    :param csv_reader: "csv" to read the file with the csv module, "pandas" to read it with pandas
     :return: None
     """
+    if csv_reader == "pandas":
+        try:
+            extracted_translation.update(read_CK2_file_with_pandas(ck2_loc_file, source_col_ck2, dest_col_ck2))
+            return
+        except ValueError:
+            # ParserError on rows with more columns than the first ones, or missing columns
+            pass
+    extracted_translation.update(read_CK2_file_with_csv(ck2_loc_file, source_col_ck2, dest_col_ck2))
+
+
+def read_CK2_file_with_pandas(
+    ck2_loc_file: str | Path, source_col_ck2: int, dest_col_ck2: int
+) -> Iterator[tuple[str, str]]:
+    """
+    Read the two columns of a CK2 localisation file with pandas
+    :param ck2_loc_file: Path of the CK2 localisation file
+    :param source_col_ck2: Index of the source language column
+    :param dest_col_ck2: Index of the destination language column
+    :return: Iterator of (source_text, dest_text) for the rows with both texts
+    """
     try:
-        df = pd.read_csv(ck2_loc_file, sep=";", header=None, encoding="ISO-8859-1")
-        for _, row in df.iterrows():
-            extracted_translation[row[df.columns[source_col_ck2]]] = row[df.columns[dest_col_ck2]]
-    except pd.errors.ParserError:
-        with open(ck2_loc_file, "r", encoding="ISO-8859-1") as f:
-            lines = f.readlines()
-        for line in lines:
-            split = line.split(";")
-            extracted_translation[split[source_col_ck2]] = split[dest_col_ck2]
+        import pandas as pd
+    except ImportError as e:
+        raise ImportError("pandas is not installed, install it or read the CK2 files with the csv reader") from e
+    df = pd.read_csv(
+        ck2_loc_file,
+        sep=";",
+        header=None,
+        encoding="ISO-8859-1",
+        usecols=[source_col_ck2, dest_col_ck2],
+        dtype=str,
+        keep_default_na=False,
+    )
+    df = df[(df[source_col_ck2] != "") & (df[dest_col_ck2] != "")]
+    return zip(df[source_col_ck2], df[dest_col_ck2])
+
+
+def read_CK2_file_with_csv(
+    ck2_loc_file: str | Path, source_col_ck2: int, dest_col_ck2: int
+) -> Iterator[tuple[str, str]]:
+    """
+    Read a CK2 localisation file row by row, with any number of columns by row
+    :param ck2_loc_file: Path of the CK2 localisation file
+    :param source_col_ck2: Index of the source language column
+    :param dest_col_ck2: Index of the destination language column
+    :return: Iterator of (source_text, dest_text) for the rows with both texts
+    """
+    with open(ck2_loc_file, "r", encoding="ISO-8859-1", newline="") as f:
+        for row in csv.reader(f, delimiter=";"):
+            if len(row) > max(source_col_ck2, dest_col_ck2) and row[source_col_ck2] != "" and row[dest_col_ck2] != "":
+                yield row[source_col_ck2], row[dest_col_ck2]
 
 
 def extract_translation_from_yml_file(
@@ -66,38 +136,114 @@ def extract_translation_from_yml_file(
             extracted_translation[source_texts[source_key]["value"]] = dest_texts[source_key]["value"]
 
 
-def insert_text(file_path: str | Path, extracted_translation: dict[str, str], target_source_files: dict[str, str]):
+def extract_translation_dir(
+    extract_source_dir: str | Path,
+    extract_dest_dir: str | Path,
+    source_lang: str,
+    dest_lang: str,
+    source_col_ck2: int,
+    dest_col_ck2: int,
+    jobs: int = 1,
+    csv_reader: str = "csv",
+) -> dict[str, str]:
     """
-    Modify localisation yml file be inserting extracted translation (key -> source_text -> extracted_dest_text)
-    :param file_path: File path of the file to edit
-    :param extracted_translation: Extracted translation {source_text: dest_text}
-    :param target_source_files: Target source {key: source_text}
-    :return: None
+    Extract translation from CK2 CSV files and YML files of a directory
+    :param extract_source_dir: Directory with source Paradox files to extract
+    :param extract_dest_dir: Directory with destination Paradox files to extract
+    :param source_lang: Source language
+    :param dest_lang: Destination language
+    :param source_col_ck2: Index of the source language column in CK2 files
+    :param dest_col_ck2: Index of the destination language column in CK2 files
+    :param jobs: Number of worker processes, -1 (or any value lower than 1) for all CPUs
+    :param csv_reader: "csv" to read the CK2 files with the csv module, "pandas" to read them with pandas
+    :return: Extracted translation {source_text: dest_text}
     """
-    with open(file_path, "r", encoding="utf8") as f:
-        lines = f.readlines()
-
-    with open(file_path, "w", encoding="utf8") as f:
-        for i in range(len(lines)):
-            if i == 0:
-                # Keep the language definition line
-                f.write(lines[0])
+    # (source file, destination file or None for a CK2 file with both languages)
+    file_pairs = []
+    for root, _, files in os.walk(extract_source_dir):
+        for file in files:
+            if file.endswith(".csv"):
+                file_pairs.append((os.path.join(root, file), None))
+            elif file.endswith(source_lang + ".yml"):
+                file_pairs.append(
+                    (
+                        os.path.join(root, file),
+                        os.path.join(
+                            root.replace(extract_source_dir, extract_dest_dir), file.replace(source_lang, dest_lang)
+                        ),
+                    )
+                )
             else:
-                try:
-                    key, value, version = get_key_value_and_version(lines[i])
-                    if key not in target_source_files:
-                        raise Exception(
-                            f"{key} not in the source file corresponding to {file_path}.\n"
-                            + "Apply diff before this script"
-                        )
-                    target_source_text = target_source_files[key]["value"]
-                    if target_source_text in extracted_translation:
-                        f.write(" " + key + ': "' + extracted_translation[target_source_text] + '"\n')
-                    else:
-                        f.write(lines[i])
-                except BadLocalizationException:
-                    f.write(lines[i])
-                    continue
+                print(f"{file} not managed !")
+    extracted_translation = dict()
+    # The partial translations are merged in the walk order, as if the files were extracted one after the other
+    for partial_translation in parse_files(
+        file_pairs, partial(__extract_file_pair, source_col_ck2, dest_col_ck2, csv_reader), jobs
+    ):
+        extracted_translation.update(partial_translation)
+    return extracted_translation
+
+
+def __extract_file_pair(
+    source_col_ck2: int, dest_col_ck2: int, csv_reader: str, file_pair: tuple[str, str | None]
+) -> dict[str, str]:
+    source_file, dest_file = file_pair
+    partial_translation = dict()
+    if dest_file is None:
+        extract_translation_from_CK2_file(source_file, partial_translation, source_col_ck2, dest_col_ck2, csv_reader)
+    else:
+        extract_translation_from_yml_file(source_file, dest_file, partial_translation)
+    return partial_translation
+
+
+def join_translation(
+    extracted_translation: dict[str, str] | TranslationMemory,
+    target_source_files: dict[str, dict],
+    target_dest_files: KeyIndex,
+    fuzzy_similarity: float | None = None,
+) -> tuple[dict[str, str], dict[str, int | None], dict[str, list[str]]]:
+    """
+    Join the keys of the whole target tree with their extracted translation (key -> source_text -> extracted_dest_text)
+    :param extracted_translation: Extracted translation {source_text: dest_text}, a TranslationMemory for fuzzy matches
+    :param target_source_files: Target source {key: {"value": source_text, "version": version}}
+    :param target_dest_files: KeyIndex of the target destination files
+    :param fuzzy_similarity: Minimal similarity to insert the translation of a similar source text, None to disable
+    :return: Translations {key: dest_text}, versions {key: version} of the fuzzy matches and of the exact matches
+    replacing an earlier fuzzy match, and the keys which are not in the target source {file_path: [key]}
+    """
+    translations: dict[str, str] = dict()
+    versions: dict[str, int | None] = dict()
+    missing_keys: dict[str, list[str]] = defaultdict(list)
+    for key in target_dest_files:
+        if key not in target_source_files:
+            # A duplicated key is missing in each of its files
+            for file_path in dict.fromkeys(
+                target_dest_files.duplicates.get(key, [target_dest_files.file_by_key[key]])
+            ):
+                missing_keys[file_path].append(key)
+            continue
+        target_source_text = target_source_files[key]["value"]
+        if target_source_text in extracted_translation:
+            translations[key] = extracted_translation[target_source_text]
+            if target_dest_files[key]["version"] == FUZZY_MATCH_VERSION:
+                # The fuzzy match of an earlier run is now exact, so it no longer needs a review
+                versions[key] = target_source_files[key]["version"]
+        elif fuzzy_similarity is not None:
+            fuzzy_match = extracted_translation.find(target_source_text, fuzzy_similarity)
+            if fuzzy_match is not None:
+                # Translation of a similar source text, to be reviewed
+                translations[key] = fuzzy_match[0]
+                versions[key] = FUZZY_MATCH_VERSION
+    return translations, versions, dict(missing_keys)
+
+
+def __print_missing_keys(missing_keys: dict[str, list[str]], target_source_dir: str | Path):
+    if len(missing_keys) == 0:
+        return
+    print("-------------------------")
+    print(f"ERROR: Keys not in {target_source_dir}, apply diff before this script:")
+    for file_path, keys in missing_keys.items():
+        print(f"{file_path}: {', '.join(keys)}")
 
 
 def extract_existing_translation(
@@ -109,43 +255,45 @@ def extract_existing_translation(
     dest_lang: str,
     source_col_ck2: int,
     dest_col_ck2: int,
+    jobs: int = 1,
+    fuzzy_similarity: float | None = None,
+    translation_memory_db: str | Path | None = None,
+    csv_reader: str = "csv",
 ):
     # Store extracted translation {source_text: dest_text}
-    extracted_translation = dict()
-    for root, _, files in os.walk(extract_source_dir):
-        for file in files:
-            if file.endswith(".csv"):
-                extract_translation_from_CK2_file(
-                    os.path.join(root, file), extracted_translation, source_col_ck2, dest_col_ck2
-                )
-            elif file.endswith(source_lang + ".yml"):
-                extract_translation_from_yml_file(
-                    os.path.join(root, file),
-                    os.path.join(
-                        root.replace(extract_source_dir, extract_dest_dir), file.replace(source_lang, dest_lang)
-                    ),
-                    extracted_translation,
-                )
-            else:
-                print(f"{file} not managed !")
+    extracted_translation = extract_translation_dir(
+        extract_source_dir, extract_dest_dir, source_lang, dest_lang, source_col_ck2, dest_col_ck2, jobs, csv_reader
+    )
+    if fuzzy_similarity is not None or translation_memory_db is not None:
+        extracted_translation = build_translation_memory(
+            extracted_translation, translation_memory_db, source_lang, dest_lang, fuzzy_similarity is not None
+        )
 
     # Store target source text {key: source_text}
-    target_source_files = dict()
-    for root, _, files in os.walk(target_source_dir):
-        for file in files:
-            if file.endswith(source_lang + ".yml"):
-                target_source_file, _ = file_to_keys_and_values(os.path.join(root, file))
-                target_source_files = {**target_source_files, **target_source_file}
+    target_source_files = load_localization_dir(target_source_dir, source_lang + ".yml", jobs)
+    target_source_files.print_duplicates(target_source_dir)
 
-    # Insert text in destination target file
-    for root, _, files in os.walk(target_dest_dir):
-        for file in files:
-            if file.endswith(dest_lang + ".yml"):
-                insert_text(os.path.join(root, file), extracted_translation, target_source_files)
+    # Join the target destination keys with their translation, then write only the files with changed texts
+    target_dest_files = load_localization_dir(target_dest_dir, dest_lang + ".yml", jobs)
+    try:
+        translations, versions, missing_keys = join_translation(
+            extracted_translation, target_source_files, target_dest_files, fuzzy_similarity
+        )
+    finally:
+        # Close the translation memory store
+        if isinstance(extracted_translation, TranslationMemory):
+            extracted_translation.close()
+    nb_changed_lines, nb_changed_files = edit_files_with_dict(
+        group_edits_by_file(translations, target_dest_files, versions), versions
+    )
+    print(f"{nb_changed_lines} texts inserted in {nb_changed_files} files")
+    __print_missing_keys(missing_keys, target_source_dir)
 
 
 if __name__ == "__main__":
     args = get_args()
+    if args.cache_dir is not None:
+        enable_parsed_file_cache(args.cache_dir)
     extract_existing_translation(
         args.extract_source_dir,
         args.extract_dest_dir,
@@ -155,4 +303,8 @@ if __name__ == "__main__":
         args.dest_lang,
         args.source_col_ck2,
         args.dest_col_ck2,
+        args.jobs,
+        args.fuzzy_similarity,
+        args.translation_memory_db,
+        args.csv_reader,
     )
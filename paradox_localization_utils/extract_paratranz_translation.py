@@ -1,19 +1,34 @@
 import argparse
-import json
+from functools import partial
+import io
 import os
+import zipfile
 
 import sys
 
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
-from paradox_localization_utils.lib.write_localization_file import edit_file_with_dict
+from paradox_localization_utils.lib.parallel_parsing import parse_files
+from paradox_localization_utils.lib.paratranz_json import read_paratranz_translations
+from paradox_localization_utils.lib.sync_state import SyncState, compute_paratranz_file_hash, compute_paratranz_hash
+from paradox_localization_utils.lib.write_localization_file import edit_file_with_dict, edit_files_with_dict
 
 
 def get_args():
     parser = argparse.ArgumentParser(description="Extract translation Paratranz file")
-    parser.add_argument("paratranz_dir", type=str, help="Directory with JSON Paratranz files")
+    parser.add_argument(
+        "paratranz_dir", type=str, help="Directory with JSON Paratranz files, or Paratranz artifact (zip file)"
+    )
     parser.add_argument("localisation_dir", type=str, help="Directory with Paradox files to edit")
     parser.add_argument("language", type=str, help="Language of the Paradox files to edit")
     parser.add_argument("-extract_not_review", action="store_true", help="Extract not reviewed translation")
+    parser.add_argument(
+        "-jobs", type=int, help="Number of processes to extract the files (-1 for all CPUs)", default=1
+    )
+    parser.add_argument(
+        "-sync_state",
+        type=str,
+        help="State of the last extraction to skip the files unchanged since then (default: no state)",
+    )
     return parser.parse_args()
 
 
@@ -22,29 +37,142 @@ def extract_paratranz_localisation(paratranz_file_path: str, localisation_file_p
         print(f"ERROR : {localisation_file_path} does not exist")
         return
     with open(paratranz_file_path, "r", encoding="utf8") as f:
-        raw_paratranz_data = json.load(f)
-    paratranz_data: dict[str, str] = dict()
-    for line in raw_paratranz_data:
-        if len(line["translation"]) > 0 and (extract_not_review or line["stage"] == 5):
-            paratranz_data[line["key"].split(":")[0]] = line["translation"]
+        paratranz_data = read_paratranz_translations(f, extract_not_review)
     edit_file_with_dict(localisation_file_path, paratranz_data)
 
 
 def extract_paratranz_localisation_dir(
-    paratranz_dir: str, language: str, localisation_dir: str, extract_not_review: bool
+    paratranz_dir: str,
+    language: str,
+    localisation_dir: str | list[str],
+    extract_not_review: bool,
+    *,
+    jobs: int = 1,
+    sync_state: SyncState | None = None,
 ):
+    """
+    Extract the translation of the JSON Paratranz files of a directory
+    :param paratranz_dir: Directory with JSON Paratranz files
+    :param language: Language of the Paradox files to edit
+    :param localisation_dir: Directory with Paradox files to edit, or list of directories edited with the same
+    translation, each Paratranz file is then parsed once for all of them
+    :param extract_not_review: Extract not reviewed translation
+    :param jobs: Number of worker processes, -1 (or any value lower than 1) for all CPUs
+    :param sync_state: SyncState to skip the files unchanged since the last extraction, and to record the extraction
+    """
+    paratranz_files = []
     for root, _, files in os.walk(paratranz_dir):
         for file in files:
             if file.endswith(".json"):
-                if "l_" not in file:
-                    print(f"l_ not in {file}")
-                    continue
-                loc_file_name = file[: file.rindex("l_")] + "l_" + language + ".yml"
-                abs_path = os.path.abspath(os.path.join(root, loc_file_name))
-                rel_path = abs_path.replace(paratranz_dir, "")[1:]
-                extract_paratranz_localisation(
-                    os.path.join(root, file), os.path.join(localisation_dir, rel_path), extract_not_review
-                )
+                file_path = os.path.join(root, file)
+                relative_path = os.path.relpath(file_path, paratranz_dir).replace("\\", "/")
+                paratranz_hash = None if sync_state is None else compute_paratranz_file_hash(file_path)
+                paratranz_files.append((file_path, relative_path, paratranz_hash))
+    __extract_paratranz_files(None, paratranz_files, language, localisation_dir, extract_not_review, sync_state, jobs)
+
+
+def extract_paratranz_localisation_zip(
+    zip_path: str,
+    language: str,
+    localisation_dir: str | list[str],
+    extract_not_review: bool,
+    *,
+    paratranz_dir: str = "raw",
+    jobs: int = 1,
+    sync_state: SyncState | None = None,
+):
+    """
+    Extract the translation of the JSON Paratranz files of an artifact, reading them directly from the zip
+    :param zip_path: Path of the Paratranz artifact
+    :param language: Language of the Paradox files to edit
+    :param localisation_dir: Directory with Paradox files to edit, or list of directories edited with the same
+    translation, each Paratranz file is then parsed once for all of them
+    :param extract_not_review: Extract not reviewed translation
+    :param paratranz_dir: Directory of the JSON Paratranz files in the zip
+    :param jobs: Number of worker processes, -1 (or any value lower than 1) for all CPUs
+    :param sync_state: SyncState to skip the files unchanged since the last extraction, and to record the extraction
+    """
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        # The CRC of the zip gives the fingerprint without reading the file
+        paratranz_files = [
+            (
+                member.filename,
+                member.filename[len(paratranz_dir) + 1 :],
+                compute_paratranz_hash(member.CRC, member.file_size),
+            )
+            for member in zip_ref.infolist()
+            if member.filename.startswith(f"{paratranz_dir}/") and member.filename.endswith(".json")
+        ]
+    __extract_paratranz_files(
+        zip_path, paratranz_files, language, localisation_dir, extract_not_review, sync_state, jobs
+    )
+
+
+def __extract_paratranz_files(
+    zip_path: str | None,
+    paratranz_files: list[tuple[str, str, str | None]],
+    language: str,
+    localisation_dir: str | list[str],
+    extract_not_review: bool,
+    sync_state: SyncState | None,
+    jobs: int,
+):
+    """
+    :param zip_path: Artifact containing the Paratranz files, None if they are files of a directory
+    :param paratranz_files: List of (path of the file in the directory or in the zip,
+    path relative to the Paratranz directory with "/" separators, fingerprint of the file or None)
+    """
+    localisation_dirs = [localisation_dir] if isinstance(localisation_dir, str) else localisation_dir
+    # (Paratranz file, localisation files to edit, fingerprint of the Paratranz file)
+    tasks = []
+    for paratranz_file, relative_path, paratranz_hash in paratranz_files:
+        relative_dir, _, file = relative_path.rpartition("/")
+        if "l_" not in file:
+            print(f"l_ not in {file}")
+            continue
+        loc_file_name = file[: file.rindex("l_")] + "l_" + language + ".yml"
+        candidates = [
+            os.path.normpath(os.path.join(directory, *relative_dir.split("/"), loc_file_name))
+            for directory in localisation_dirs
+        ]
+        localisation_file_paths = [path for path in candidates if os.path.exists(path)]
+        if len(localisation_file_paths) == 0:
+            print(f"ERROR : {' or '.join(candidates)} does not exist")
+            continue
+        if sync_state is not None:
+            localisation_file_paths = [
+                path for path in localisation_file_paths if not sync_state.is_unchanged(path, paratranz_hash)
+            ]
+        if len(localisation_file_paths) > 0:
+            tasks.append((paratranz_file, localisation_file_paths, paratranz_hash))
+    if len(tasks) == 0:
+        return
+    # Each worker opens the zip once for a chunk of files
+    nb_chunks = min(len(tasks), 1 if jobs == 1 else 4 * (os.cpu_count() or 1))
+    chunks = [tasks[i::nb_chunks] for i in range(nb_chunks)]
+    parse_files(chunks, partial(__extract_tasks, zip_path, extract_not_review), jobs)
+    if sync_state is not None:
+        for _, localisation_file_paths, paratranz_hash in tasks:
+            for localisation_file_path in localisation_file_paths:
+                sync_state.record(localisation_file_path, paratranz_hash)
+
+
+def __extract_tasks(zip_path: str | None, extract_not_review: bool, tasks: list[tuple[str, list[str], str | None]]):
+    zip_ref = None if zip_path is None else zipfile.ZipFile(zip_path, "r")
+    try:
+        for paratranz_file, localisation_file_paths, _ in tasks:
+            if zip_ref is None:
+                f = open(paratranz_file, "r", encoding="utf8")
+            else:
+                f = io.TextIOWrapper(zip_ref.open(paratranz_file), encoding="utf8")
+            with f:
+                paratranz_data = read_paratranz_translations(f, extract_not_review)
+            # Each Paratranz file is extracted to the file with the same path in each localisation directory,
+            # so no index of all the files is needed, and edit_file_with_dict only writes the changed lines
+            edit_files_with_dict(dict.fromkeys(localisation_file_paths, paratranz_data))
+    finally:
+        if zip_ref is not None:
+            zip_ref.close()
 
 
 if __name__ == "__main__":
@@ -52,4 +180,27 @@ if __name__ == "__main__":
     extract_not_review = args.extract_not_review
     if extract_not_review is None:
         extract_not_review = False
-    extract_paratranz_localisation_dir(args.paratranz_dir, args.language, args.localisation_dir, extract_not_review)
+    sync_state = None
+    if args.sync_state is not None:
+        sync_state = SyncState(args.sync_state, extract_not_review)
+    if zipfile.is_zipfile(args.paratranz_dir):
+        extract_paratranz_localisation_zip(
+            args.paratranz_dir,
+            args.language,
+            args.localisation_dir,
+            extract_not_review,
+            jobs=args.jobs,
+            sync_state=sync_state,
+        )
+    else:
+        extract_paratranz_localisation_dir(
+            args.paratranz_dir,
+            args.language,
+            args.localisation_dir,
+            extract_not_review,
+            jobs=args.jobs,
+            sync_state=sync_state,
+        )
+    if sync_state is not None:
+        sync_state.save()
+        sync_state.print_summary()
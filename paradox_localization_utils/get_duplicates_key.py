@@ -4,7 +4,8 @@ import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
-from paradox_localization_utils.lib.read_localization_file import get_key_value_and_version, BadLocalizationException
+from paradox_localization_utils.lib.parallel_parsing import list_localization_files, parse_files
+from paradox_localization_utils.lib.read_localization_file import iter_localization_entries
 
 
 def get_args():
@@ -13,24 +14,40 @@ def get_args():
     parser.add_argument(
         "-only_different_value", action="store_true", help="Print only duplicates key with different value"
     )
+    parser.add_argument("-jobs", type=int, help="Number of processes to parse files (-1 for all CPUs)", default=1)
     return parser.parse_args()
 
 
+def file_to_keys_and_values_list(file_path: str) -> list[tuple[str, str]]:
+    """
+    Extract (key, value) of each line of a localization file, keeping keys duplicated in the file
+    :param file_path: Path of a Paradox localization file
+    :return: List of (localization key, value) in the order of the file
+    """
+    with open(file_path, "r", encoding="utf8") as f:
+        return [(entry.key, entry.value) for entry in iter_localization_entries(f) if entry.value_span is not None]
+
+
+def get_duplicates_key(directory: str, only_different_value: bool, jobs: int = 1):
+    """
+    Print the keys duplicated in the English localisation files of directory
+    :param directory: Directory in which duplicate keys are searched
+    :param only_different_value: Print only duplicates key with different value
+    :param jobs: Number of processes to parse files (-1 for all CPUs)
+    :return: None
+    """
+    keys_to_values = dict()
+    file_paths = list_localization_files(directory, "l_english.yml")
+    for file_path, keys_and_values in zip(file_paths, parse_files(file_paths, file_to_keys_and_values_list, jobs)):
+        file = os.path.basename(file_path)
+        for key, value in keys_and_values:
+            if "l_english" in key or "spellcheck_ignore" in key:
+                continue
+            if key in keys_to_values and (not only_different_value or keys_to_values[key] != value):
+                print(f"{key} is duplicated. Found at least once in {file}")
+            keys_to_values[key] = value
+
+
 if __name__ == "__main__":
     args = get_args()
-    keys_to_values = dict()
-    for root, _, files in os.walk(args.directory):
-        for file in files:
-            if file.endswith("l_english.yml"):
-                with open(os.path.join(root, file), "r", encoding="utf8") as f:
-                    lines = f.readlines()
-                for line in lines:
-                    try:
-                        key, value, _ = get_key_value_and_version(line)
-                        if "l_english" in key or "spellcheck_ignore" in key:
-                            continue
-                        if key in keys_to_values and (not args.only_different_value or keys_to_values[key] != value):
-                            print(f"{key} is duplicated. Found at least once in {file}")
-                        keys_to_values[key] = value
-                    except BadLocalizationException:
-                        pass
+    get_duplicates_key(args.directory, args.only_different_value, args.jobs)
@@ -0,0 +1,22 @@
+import argparse
+import math
+
+
+def positive_int(value: str) -> int:
+    """
+    Argument type of the integers greater or equal to 1
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is lower than 1")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """
+    Argument type of the finite numbers greater than 0
+    """
+    number = float(value)
+    if not 0 < number < math.inf:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive number")
+    return number
@@ -0,0 +1,78 @@
+import asyncio
+import statistics
+import time
+from typing import Any, Awaitable, Callable, NamedTuple
+
+# Result of a call which sent no request, for example an unchanged file skipped thanks to a manifest
+SKIPPED = object()
+
+
+class CallResult(NamedTuple):
+    name: str
+    # Duration in seconds, without the time waiting for a free slot
+    duration: float
+    result: Any
+    error: Exception | None
+
+
+def run_concurrently(calls: list[tuple[str, Callable[[], Awaitable[Any]]]], concurrency: int) -> list[CallResult]:
+    """
+    Run asynchronous calls, like HTTP requests, with at most concurrency calls in flight
+    :param calls: List of (name, coroutine function without argument)
+    :param concurrency: Maximum number of calls in flight
+    :return: Result of each call, in the order of calls
+    """
+    return asyncio.run(run_concurrently_async(calls, concurrency))
+
+
+async def run_concurrently_async(
+    calls: list[tuple[str, Callable[[], Awaitable[Any]]]], concurrency: int
+) -> list[CallResult]:
+    """
+    Asynchronous version of run_concurrently, to run the calls from an event loop
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_call(name: str, function: Callable[[], Awaitable[Any]]) -> CallResult:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await function()
+            except Exception as e:
+                return CallResult(name, time.perf_counter() - start, None, e)
+            return CallResult(name, time.perf_counter() - start, result, None)
+
+    return await asyncio.gather(*(run_call(name, function) for name, function in calls))
+
+
+def print_timings(results: list[CallResult], total_duration: float) -> None:
+    """
+    Print the statistics of the durations of the calls and the slowest call.
+    The skipped calls are counted apart, to not lower the statistics of the requests.
+    :param results: Results of run_concurrently
+    :param total_duration: Wall-clock duration of all the calls in seconds
+    """
+    sent = [result for result in results if result.result is not SKIPPED]
+    nb_skipped = len(results) - len(sent)
+    if nb_skipped > 0:
+        print(f"{nb_skipped} calls skipped without request")
+    if len(sent) == 0:
+        return
+    durations = sorted(result.duration for result in sent)
+    slowest = max(sent, key=lambda result: result.duration)
+    throughput = len(sent) / max(total_duration, 1e-9)
+    print(
+        f"{len(sent)} requests in {total_duration:.1f} s ({throughput:.1f} requests/s), "
+        + f"median {statistics.median(durations):.2f} s, "
+        + f"95th percentile {durations[int(0.95 * (len(durations) - 1))]:.2f} s, "
+        + f"slowest {slowest.duration:.2f} s ({slowest.name})"
+    )
+
+
+def raise_first_error(results: list[CallResult]) -> None:
+    """
+    Raise the first exception raised by the calls, as if they were run sequentially
+    """
+    for result in results:
+        if result.error is not None:
+            raise result.error
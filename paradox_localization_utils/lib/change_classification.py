@@ -0,0 +1,71 @@
+from enum import IntEnum
+
+import Levenshtein
+
+# Minimal Levenshtein distance between old and new source texts to consider the translation is obsolete
+DEFAULT_MAJOR_EDIT_THRESHOLD = 10
+
+
+class ChangeClass(IntEnum):
+    UNCHANGED = 0
+    MINOR_EDIT = 1
+    MAJOR_EDIT = 2
+
+
+def classify_change(old_value: str, new_value: str, threshold: int = DEFAULT_MAJOR_EDIT_THRESHOLD) -> ChangeClass:
+    """
+    Classify the change between an old and a new source text without computing the full Levenshtein distance
+    :param old_value: Old source text
+    :param new_value: New source text
+    :param threshold: Minimal Levenshtein distance of a major edit
+    :return: UNCHANGED if the texts are equal, MAJOR_EDIT if the distance is at least threshold, MINOR_EDIT otherwise
+    """
+    if old_value == new_value:
+        return ChangeClass.UNCHANGED
+    # The Levenshtein distance is at least the length difference
+    if abs(len(old_value) - len(new_value)) >= threshold:
+        return ChangeClass.MAJOR_EDIT
+    # With score_cutoff, the computation stops as soon as the distance exceeds threshold - 1
+    if Levenshtein.distance(old_value, new_value, score_cutoff=threshold - 1) >= threshold:
+        return ChangeClass.MAJOR_EDIT
+    return ChangeClass.MINOR_EDIT
+
+
+def classify_changes(
+    old_values: list[str], new_values: list[str], threshold: int = DEFAULT_MAJOR_EDIT_THRESHOLD, workers: int = 1
+) -> list[int]:
+    """
+    Classify in one batch the changes between pairs of old and new source texts, see classify_change
+    :param old_values: Old source texts
+    :param new_values: New source texts, in the same order as old_values
+    :param threshold: Minimal Levenshtein distance of a major edit
+    :param workers: Number of threads to compute the distances (-1 for all CPUs)
+    :return: ChangeClass value of each pair
+    """
+    # numpy and rapidfuzz are only imported for a batch classification.
+    # rapidfuzz is the backend of python-levenshtein, its process module computes distances in batch
+    import numpy as np
+    from rapidfuzz.distance import Levenshtein as RapidfuzzLevenshtein
+    from rapidfuzz.process import cpdist
+
+    nb_pairs = len(old_values)
+    unchanged = np.fromiter((old == new for old, new in zip(old_values, new_values)), dtype=bool, count=nb_pairs)
+    length_differences = np.abs(
+        np.fromiter(map(len, old_values), dtype=np.int64, count=nb_pairs)
+        - np.fromiter(map(len, new_values), dtype=np.int64, count=nb_pairs)
+    )
+    classes = np.full(nb_pairs, ChangeClass.MINOR_EDIT, dtype=np.int8)
+    classes[length_differences >= threshold] = ChangeClass.MAJOR_EDIT
+    # Only the pairs not decided by equality or by length difference need a distance computation
+    to_compute = np.flatnonzero(~unchanged & (length_differences < threshold))
+    if len(to_compute) > 0:
+        distances = cpdist(
+            [old_values[i] for i in to_compute],
+            [new_values[i] for i in to_compute],
+            scorer=RapidfuzzLevenshtein.distance,
+            score_cutoff=threshold - 1,
+            workers=workers,
+        )
+        classes[to_compute[distances >= threshold]] = ChangeClass.MAJOR_EDIT
+    classes[unchanged] = ChangeClass.UNCHANGED
+    return classes.tolist()
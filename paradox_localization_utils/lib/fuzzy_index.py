@@ -0,0 +1,79 @@
+import numpy as np
+
+# MinHash signatures are split in bands, two texts are candidates when all rows of a band are equal
+NB_BANDS = 12
+ROWS_BY_BAND = 3
+# Number of texts whose signatures are computed together
+SIGNATURE_CHUNK_SIZE = 2048
+SEED = 42
+
+
+class FuzzyIndex:
+    """
+    Index of texts to retrieve candidates similar to a text, with MinHash signatures of character trigrams
+    and locality-sensitive hashing. The texts are identified by their order of addition.
+    """
+
+    def __init__(self):
+        # Band keys of the indexed texts, shape (NB_BANDS, number of indexed texts)
+        self.band_keys = np.empty((NB_BANDS, 0), dtype=np.uint64)
+        # Band keys sorted by band and the corresponding text ids, to find the buckets with a binary search
+        self.sorted_band_keys = self.band_keys
+        self.sorted_ids = np.empty((NB_BANDS, 0), dtype=np.int64)
+        rng = np.random.default_rng(SEED)
+        # Multiply-add-shift universal hashing, computed modulo 2**64 by uint64 overflow
+        self.hash_multipliers = self.__random_odd_integers(rng, NB_BANDS * ROWS_BY_BAND)[:, None]
+        self.hash_increments = rng.integers(0, 2**63, (NB_BANDS * ROWS_BY_BAND, 1), dtype=np.uint64)
+        self.band_multipliers = self.__random_odd_integers(rng, ROWS_BY_BAND)[None, :, None]
+
+    def __len__(self) -> int:
+        return self.band_keys.shape[1]
+
+    def add(self, texts: list[str]) -> None:
+        """
+        Index texts, their ids follow the ids of the already indexed texts
+        """
+        if len(texts) == 0:
+            return
+        new_band_keys = [
+            self.__compute_band_keys(texts[start : start + SIGNATURE_CHUNK_SIZE])
+            for start in range(0, len(texts), SIGNATURE_CHUNK_SIZE)
+        ]
+        self.band_keys = np.concatenate([self.band_keys] + new_band_keys, axis=1)
+        self.sorted_ids = np.argsort(self.band_keys, axis=1, kind="stable")
+        self.sorted_band_keys = np.take_along_axis(self.band_keys, self.sorted_ids, axis=1)
+
+    def find_candidates(self, text: str) -> set[int]:
+        """
+        :return: Ids of the indexed texts sharing a band with text
+        """
+        band_keys = self.__compute_band_keys([text])[:, 0]
+        candidate_ids = set()
+        for band in range(NB_BANDS):
+            start = np.searchsorted(self.sorted_band_keys[band], band_keys[band], side="left")
+            end = np.searchsorted(self.sorted_band_keys[band], band_keys[band], side="right")
+            candidate_ids.update(self.sorted_ids[band, start:end].tolist())
+        return candidate_ids
+
+    def __compute_band_keys(self, texts: list[str]) -> np.ndarray:
+        """
+        :return: Array of shape (NB_BANDS, len(texts)) of the hashes of the bands of the MinHash signatures
+        """
+        padded_texts = [f"  {text.lower()}  " for text in texts]
+        lengths = np.array([len(padded_text) for padded_text in padded_texts], dtype=np.int64)
+        ends = np.cumsum(lengths)
+        code_points = np.frombuffer("".join(padded_texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        # Unicode code points have 21 bits, so a trigram is exactly encoded in 63 bits
+        trigrams = (code_points[:-2] << np.uint64(42)) | (code_points[1:-1] << np.uint64(21)) | code_points[2:]
+        # Remove the trigrams overlapping two texts
+        overlapping = np.concatenate([ends[:-1] - 2, ends[:-1] - 1])
+        trigrams = np.delete(trigrams, overlapping)
+        trigram_starts = ends - lengths - 2 * np.arange(len(texts))
+        hashes = (self.hash_multipliers * trigrams[None, :] + self.hash_increments) >> np.uint64(32)
+        signatures = np.minimum.reduceat(hashes, trigram_starts, axis=1)
+        signatures = signatures.reshape(NB_BANDS, ROWS_BY_BAND, len(texts))
+        return (signatures * self.band_multipliers).sum(axis=1, dtype=np.uint64)
+
+    @staticmethod
+    def __random_odd_integers(rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.integers(0, 2**63, size, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
@@ -0,0 +1,44 @@
+from pathlib import Path
+from typing import Iterable
+
+
+class KeyIndex(dict):
+    """
+    Dict {key: data} merged in place from several localization files, which remembers the file of each key
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.file_by_key: dict[str, str] = dict()
+        self.duplicates: dict[str, list[str]] = dict()
+
+    def add_file(self, file_path: str | Path, file_dict: dict, repeated_keys: Iterable[str] = ()) -> None:
+        """
+        Merge the keys of a file into the index. When a key is already known, the last file wins
+        and the key is recorded in duplicates.
+        :param file_path: Path of the file from which file_dict has been extracted
+        :param file_dict: Dict {key: data} of the file
+        :param repeated_keys: Keys found on several lines of the file, whose data is the one of the last line.
+        They are recorded in duplicates with the file listed twice.
+        :return: None
+        """
+        file_path = str(file_path)
+        for key in file_dict.keys() & self.keys():
+            if key not in self.duplicates:
+                self.duplicates[key] = [self.file_by_key[key]]
+            self.duplicates[key].append(file_path)
+        for key in repeated_keys:
+            if key not in self.duplicates:
+                self.duplicates[key] = [file_path]
+            self.duplicates[key].append(file_path)
+        self.update(file_dict)
+        self.file_by_key.update(dict.fromkeys(file_dict, file_path))
+
+    def print_duplicates(self, description: str) -> None:
+        """
+        Print the keys found in several files
+        :param description: Description of the indexed files (generally their directory)
+        :return: None
+        """
+        for key, file_paths in self.duplicates.items():
+            print(f"WARNING: {key} is duplicated in {description}: {', '.join(file_paths)}")
@@ -0,0 +1,58 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from paradox_localization_utils.lib.key_index import KeyIndex
+from paradox_localization_utils.lib.read_localization_file import file_to_keys_values_and_repeated_keys
+
+T = TypeVar("T")
+
+
+def list_localization_files(directory: str | Path, suffix: str) -> list[str]:
+    """
+    List recursively the files of a directory ending with suffix
+    :param directory: Directory to browse
+    :param suffix: End of the file names to keep (example: "l_english.yml")
+    :return: Sorted absolute paths of the files
+    """
+    file_paths = []
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if file.endswith(suffix):
+                file_paths.append(os.path.abspath(os.path.join(root, file)))
+    return sorted(file_paths)
+
+
+def parse_files(file_paths: list[str], parse_function: Callable[[str], T], jobs: int = 1) -> list[T]:
+    """
+    Apply parse_function on each file, in a process pool when jobs is not 1
+    :param file_paths: Paths of the files to parse
+    :param parse_function: Picklable function (defined at module level) taking a file path
+    :param jobs: Number of worker processes, -1 (or any value lower than 1) for all CPUs
+    :return: Results of parse_function in the order of file_paths
+    """
+    if jobs == 1 or len(file_paths) <= 1:
+        return [parse_function(file_path) for file_path in file_paths]
+    max_workers = (os.cpu_count() or 1) if jobs < 1 else jobs
+    chunksize = max(1, len(file_paths) // (4 * max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(parse_function, file_paths, chunksize=chunksize))
+
+
+def load_localization_dir(directory: str | Path, suffix: str, jobs: int = 1) -> KeyIndex:
+    """
+    Parse all the localization files of a directory and merge their keys and values
+    :param directory: Directory to browse recursively
+    :param suffix: End of the file names to parse (example: "l_english.yml")
+    :param jobs: Number of worker processes, -1 (or any value lower than 1) for all CPUs
+    :return: KeyIndex {key: {"value": value, "version": version}} merged in the sorted order of the file paths,
+    with the keys repeated in a file in its duplicates
+    """
+    file_paths = list_localization_files(directory, suffix)
+    index = KeyIndex()
+    for file_path, (keys_and_values, _, repeated_keys) in zip(
+        file_paths, parse_files(file_paths, file_to_keys_values_and_repeated_keys, jobs)
+    ):
+        index.add_file(file_path, keys_and_values, repeated_keys)
+    return index
@@ -0,0 +1,274 @@
+import asyncio
+import os
+from pathlib import Path
+import time
+
+import httpx
+from joblib import effective_n_jobs
+
+from paradox_localization_utils.lib.rate_limit import DEFAULT_BASE_DELAY, DEFAULT_MAX_RETRIES, RetryingSender
+from paradox_localization_utils.lib.utils import manage_request_error
+
+PARATRANZ_API_URL = "https://paratranz.cn/api"
+# (connection timeout, read timeout) in seconds, Paratranz can be slow to import big files
+DEFAULT_TIMEOUT = (10, 300)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Minimum time in seconds between two progress reports of a download
+PROGRESS_REPORT_INTERVAL = 5
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class AsyncParatranzClient:
+    """
+    Asynchronous client of the Paratranz API sharing a pool of keep-alive connections between the tasks of a tool.
+    The requests are retried on 429 and 5xx responses, and the number of requests in flight is lowered
+    while Paratranz is overloaded. The POST requests are only retried when Paratranz did not process them.
+    """
+
+    def __init__(
+        self,
+        token: str | None = None,
+        parallel_nb: int = 1,
+        timeout: tuple[float, float] = DEFAULT_TIMEOUT,
+        max_requests_per_second: float | None = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+    ):
+        """
+        :param token: Paratranz API token, None for the requests without authentication
+        :param parallel_nb: Number of parallel tasks using the client, with the joblib meaning (-1 for all CPUs)
+        :param timeout: (connection timeout, read timeout) of each request in seconds
+        :param max_requests_per_second: Average rate limit of the requests, None for no limit
+        :param max_retries: Number of retries of a failed request
+        :param base_delay: Base delay in seconds of the exponential backoff between retries
+        """
+        pool_size = effective_n_jobs(parallel_nb)
+        self.sender = RetryingSender(pool_size, max_requests_per_second, max_retries, base_delay)
+        # The token is only sent to the API, not to the download URLs
+        self.headers = {} if token is None else {"Authorization": token}
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def request(self, method: str, path: str, description: str | None = None, **kwargs) -> httpx.Response:
+        """
+        Send a request to the Paratranz API, with retries, and raise httpx.HTTPStatusError on error status
+        :param method: HTTP method
+        :param path: Path of the API endpoint, for example /projects/42/files
+        :param description: Description of the request for the logs
+        :return: The response
+        """
+        r = await self.sender.send(
+            lambda: self.client.request(method, f"{PARATRANZ_API_URL}{path}", headers=self.headers, **kwargs),
+            description if description is not None else f"{method} {path}",
+            method in IDEMPOTENT_METHODS,
+        )
+        manage_request_error(r)
+        return r
+
+    async def get_project_files(self, project_id: int) -> dict[str, int]:
+        """
+        :return: Files of the project {paratranz_path: file_id}
+        """
+        r = await self.request("GET", f"/projects/{project_id}/files")
+        return {file["name"]: file["id"] for file in r.json()}
+
+    async def post_file(
+        self, project_id: int, file_path: str | Path, paratranz_path: str, file_id: int | None = None
+    ) -> httpx.Response:
+        """
+        Create a file, or update it when file_id is given
+        :param paratranz_path: Directory of the file in Paratranz
+        """
+        path = f"/projects/{project_id}/files"
+        if file_id is not None:
+            path += f"/{file_id}"
+        return await self.__post_file(path, f"create/update {file_path}", file_path, {"path": paratranz_path})
+
+    async def delete_file(self, project_id: int, file_id: int) -> None:
+        await self.request("DELETE", f"/projects/{project_id}/files/{file_id}", f"delete the file {file_id}")
+
+    async def push_translation(self, project_id: int, file_id: int, file_path: str | Path) -> None:
+        await self.__post_file(
+            f"/projects/{project_id}/files/{file_id}/translation", f"push the translation {file_path}", file_path, {}
+        )
+
+    async def update_artifact(self, project_id: int) -> None:
+        await self.request("POST", f"/projects/{project_id}/artifacts")
+
+    async def get_artifact(self, project_id: int) -> dict | None:
+        """
+        :return: Information of the last artifact of the project, with its creation date in "createdAt",
+        None if the project has no artifact
+        """
+        try:
+            return (await self.request("GET", f"/projects/{project_id}/artifacts")).json()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    async def get_artifact_download_url(self, project_id: int) -> str:
+        """
+        :return: URL where the API redirects to download the last artifact of the project
+        """
+        r = await self.sender.send(
+            lambda: self.client.get(
+                f"{PARATRANZ_API_URL}/projects/{project_id}/artifacts/download", headers=self.headers
+            ),
+            "get the URL of the artifact",
+        )
+        if r.next_request is not None:
+            return str(r.next_request.url)
+        manage_request_error(r)
+        # The artifact is served by the API itself
+        return str(r.url)
+
+    async def download(self, url: str) -> httpx.Response:
+        """
+        Download a file outside of the API, without sending the token
+        """
+        r = await self.sender.send(lambda: self.client.get(url, follow_redirects=True), f"download {url}")
+        manage_request_error(r)
+        return r
+
+    async def download_to_file(self, url: str, file_path: str | Path, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> int:
+        """
+        Stream a file outside of the API to the disk, without sending the token.
+        An interrupted download is resumed with a Range request, or restarted if the server ignores the Range.
+        :param url: URL of the file
+        :param file_path: Path where the file is written
+        :param chunk_size: Size in bytes of the chunks written to the disk
+        :return: Size of the file in bytes
+        """
+        start = time.monotonic()
+        downloaded_size = 0
+        attempt = 0
+        with open(file_path, "wb") as f:
+            while True:
+                headers = {}
+                if downloaded_size > 0:
+                    headers["Range"] = f"bytes={downloaded_size}-"
+                request = self.client.build_request("GET", url, headers=headers)
+                r = await self.sender.send(
+                    lambda: self.client.send(request, stream=True, follow_redirects=True), f"download {url}"
+                )
+                try:
+                    if r.status_code not in [200, 206]:
+                        await r.aread()
+                        manage_request_error(r)
+                    if r.status_code == 200 and downloaded_size > 0:
+                        print("The server does not support the resume of the download, restart it")
+                        f.seek(0)
+                        f.truncate()
+                        downloaded_size = 0
+                    total_size = downloaded_size + int(r.headers.get("Content-Length", 0)) or None
+                    last_report = time.monotonic()
+                    async for chunk in r.aiter_bytes(chunk_size):
+                        f.write(chunk)
+                        downloaded_size += len(chunk)
+                        if time.monotonic() - last_report >= PROGRESS_REPORT_INTERVAL:
+                            last_report = time.monotonic()
+                            self.__print_progress(downloaded_size, total_size, last_report - start)
+                    break
+                except httpx.TransportError as e:
+                    if attempt >= self.sender.max_retries:
+                        raise
+                    attempt += 1
+                    print(f"Download interrupted after {downloaded_size / 1e6:.1f} MB ({type(e).__name__}), resume it")
+                finally:
+                    await r.aclose()
+        self.__print_progress(downloaded_size, total_size, time.monotonic() - start)
+        return downloaded_size
+
+    async def __post_file(self, path: str, description: str, file_path: str | Path, data: dict) -> httpx.Response:
+        async def send_request() -> httpx.Response:
+            # The file is opened again at each attempt, and streamed instead of being read in memory
+            with open(file_path, "rb") as f:
+                return await self.client.post(
+                    f"{PARATRANZ_API_URL}{path}",
+                    headers=self.headers,
+                    data=data,
+                    files={"file": (os.path.basename(file_path), f)},
+                )
+
+        r = await self.sender.send(send_request, description, idempotent=False)
+        manage_request_error(r)
+        return r
+
+    @staticmethod
+    def __print_progress(downloaded_size: int, total_size: int | None, duration: float) -> None:
+        progress = f"{downloaded_size / 1e6:.1f} MB"
+        if total_size is not None:
+            progress += f" / {total_size / 1e6:.1f} MB"
+        print(f"Downloaded {progress} in {duration:.0f} s ({downloaded_size / 1e6 / max(duration, 1e-9):.1f} MB/s)")
+
+
+class ParatranzClient:
+    """
+    Blocking version of AsyncParatranzClient, for the tools sending their requests one after the other.
+    The requests are sent from an event loop owned by the client.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        :param args: Arguments of AsyncParatranzClient
+        :param kwargs: Keyword arguments of AsyncParatranzClient
+        """
+        self.loop = asyncio.new_event_loop()
+        self.async_client = AsyncParatranzClient(*args, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        if not self.loop.is_closed():
+            self.loop.run_until_complete(self.async_client.aclose())
+            self.loop.close()
+
+    def request(self, method: str, path: str, description: str | None = None, **kwargs) -> httpx.Response:
+        return self.loop.run_until_complete(self.async_client.request(method, path, description, **kwargs))
+
+    def get_project_files(self, project_id: int) -> dict[str, int]:
+        return self.loop.run_until_complete(self.async_client.get_project_files(project_id))
+
+    def post_file(
+        self, project_id: int, file_path: str | Path, paratranz_path: str, file_id: int | None = None
+    ) -> httpx.Response:
+        return self.loop.run_until_complete(
+            self.async_client.post_file(project_id, file_path, paratranz_path, file_id)
+        )
+
+    def delete_file(self, project_id: int, file_id: int) -> None:
+        self.loop.run_until_complete(self.async_client.delete_file(project_id, file_id))
+
+    def push_translation(self, project_id: int, file_id: int, file_path: str | Path) -> None:
+        self.loop.run_until_complete(self.async_client.push_translation(project_id, file_id, file_path))
+
+    def update_artifact(self, project_id: int) -> None:
+        self.loop.run_until_complete(self.async_client.update_artifact(project_id))
+
+    def get_artifact(self, project_id: int) -> dict | None:
+        return self.loop.run_until_complete(self.async_client.get_artifact(project_id))
+
+    def get_artifact_download_url(self, project_id: int) -> str:
+        return self.loop.run_until_complete(self.async_client.get_artifact_download_url(project_id))
+
+    def download(self, url: str) -> httpx.Response:
+        return self.loop.run_until_complete(self.async_client.download(url))
+
+    def download_to_file(self, url: str, file_path: str | Path, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> int:
+        return self.loop.run_until_complete(self.async_client.download_to_file(url, file_path, chunk_size))
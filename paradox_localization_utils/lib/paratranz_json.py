@@ -0,0 +1,92 @@
+import json
+import re
+from typing import Iterator, TextIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Stage of the reviewed translations
+REVIEWED_STAGE = 5
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_paratranz_entries(f: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Parse incrementally the JSON array of a Paratranz file, only one entry is decoded in memory at a time
+    :param f: Paratranz file opened in text mode
+    :param chunk_size: Number of characters read at a time
+    :return: Iterator on the entries of the array
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    end_of_file = False
+
+    def read_chunk() -> None:
+        nonlocal buffer, position, end_of_file
+        chunk = f.read(chunk_size)
+        end_of_file = len(chunk) == 0
+        # Drop the parsed part of the buffer
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip_whitespace() -> str:
+        """
+        :return: Next non-whitespace character, "" at the end of the file
+        """
+        nonlocal position
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            if end_of_file:
+                return ""
+            read_chunk()
+
+    def decode_entry() -> dict:
+        nonlocal position
+        while True:
+            try:
+                entry, position = decoder.raw_decode(buffer, position)
+                return entry
+            except json.JSONDecodeError:
+                # The entry may continue in the next chunk
+                if end_of_file:
+                    raise
+                read_chunk()
+
+    if skip_whitespace() != "[":
+        raise json.JSONDecodeError("Expecting '['", buffer, position)
+    position += 1
+    if skip_whitespace() == "]":
+        return
+    while True:
+        yield decode_entry()
+        delimiter = skip_whitespace()
+        if delimiter == "]":
+            return
+        if delimiter != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+        position += 1
+        skip_whitespace()
+
+
+def iter_translated_entries(f: TextIO, extract_not_review: bool) -> Iterator[dict]:
+    """
+    :param f: Paratranz file opened in text mode
+    :param extract_not_review: Extract not reviewed translation
+    :return: Iterator on the entries of a Paratranz file with a translation to extract
+    """
+    for entry in iter_paratranz_entries(f):
+        if len(entry["translation"]) > 0 and (extract_not_review or entry["stage"] == REVIEWED_STAGE):
+            yield entry
+
+
+def read_paratranz_translations(f: TextIO, extract_not_review: bool) -> dict[str, str]:
+    """
+    Read the translations of a Paratranz file, keeping only the keys and translations of the extracted entries
+    :param f: Paratranz file opened in text mode
+    :param extract_not_review: Extract not reviewed translation
+    :return: Translations {key: translation}
+    """
+    return {
+        entry["key"].split(":")[0]: entry["translation"] for entry in iter_translated_entries(f, extract_not_review)
+    }
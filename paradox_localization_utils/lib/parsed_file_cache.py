@@ -0,0 +1,141 @@
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import sqlite3
+import time
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+# The cache is enabled when this environment variable is set, so worker processes inherit it
+CACHE_DIR_ENV_VARIABLE = "PARADOX_LOCALIZATION_CACHE_DIR"
+CACHE_MAX_SIZE_ENV_VARIABLE = "PARADOX_LOCALIZATION_CACHE_MAX_MB"
+DEFAULT_CACHE_DIR = ".plu_cache"
+DEFAULT_CACHE_MAX_MB = 512
+# Increment it when the parsing result changes to ignore the previous cache files
+CACHE_VERSION = 2
+# Files modified less than this number of seconds ago are hashed even if mtime and size are unchanged
+RACY_MODIFICATION_SECONDS = 2
+
+
+class ParsedFileCache:
+    """
+    SQLite store of parsing results of localization files, keyed by path and parser,
+    and validated with mtime, size and content hash. Entries are evicted in LRU order when the stored data exceeds max_size bytes.
+    """
+
+    def __init__(self, cache_dir: str | Path, max_size: int):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_size = max_size
+        self.connection = sqlite3.connect(
+            os.path.join(cache_dir, f"parsed_files_v{CACHE_VERSION}.sqlite"), timeout=60, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS parsed_files (path TEXT, parser TEXT, mtime_ns INTEGER, size INTEGER, "
+            + "hash TEXT, last_used REAL, data BLOB, PRIMARY KEY (path, parser))"
+        )
+
+    def get_or_parse(self, file_path: str | Path, parse_function: Callable[[str | Path], T]) -> T:
+        """
+        Return the cached result of parse_function for the file, or parse it and store the result
+        :param file_path: Path of the file to parse
+        :param parse_function: Function parsing the file, its result must be picklable.
+        The results of different functions (identified by their name) are stored separately.
+        :return: Result of parse_function(file_path)
+        """
+        path = os.path.abspath(file_path)
+        parser = getattr(parse_function, "__qualname__", type(parse_function).__qualname__)
+        stat = os.stat(path)
+        row = self.connection.execute(
+            "SELECT mtime_ns, size, hash, data FROM parsed_files WHERE path = ? AND parser = ?", (path, parser)
+        ).fetchone()
+        file_hash = None
+        if row is not None:
+            mtime_ns, size, cached_hash, data = row
+            if mtime_ns == stat.st_mtime_ns and size == stat.st_size and not self.__is_racy(stat.st_mtime_ns):
+                self.connection.execute(
+                    "UPDATE parsed_files SET last_used = ? WHERE path = ? AND parser = ?", (time.time(), path, parser)
+                )
+                return pickle.loads(data)
+            if size == stat.st_size:
+                file_hash = compute_file_hash(path)
+                if file_hash == cached_hash:
+                    self.connection.execute(
+                        "UPDATE parsed_files SET mtime_ns = ?, last_used = ? WHERE path = ? AND parser = ?",
+                        (stat.st_mtime_ns, time.time(), path, parser),
+                    )
+                    return pickle.loads(data)
+        if file_hash is None:
+            file_hash = compute_file_hash(path)
+        result = parse_function(file_path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO parsed_files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, parser, stat.st_mtime_ns, stat.st_size, file_hash, time.time(), pickle.dumps(result)),
+        )
+        self.evict()
+        return result
+
+    def evict(self) -> None:
+        """
+        Delete the least recently used entries until the stored data is under max_size bytes
+        """
+        total_size = self.connection.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM parsed_files").fetchone()[0]
+        if total_size <= self.max_size:
+            return
+        rows = self.connection.execute(
+            "SELECT path, parser, LENGTH(data) FROM parsed_files ORDER BY last_used"
+        ).fetchall()
+        entries_to_delete = []
+        for path, parser, size in rows:
+            if total_size <= self.max_size:
+                break
+            entries_to_delete.append((path, parser))
+            total_size -= size
+        self.connection.executemany("DELETE FROM parsed_files WHERE path = ? AND parser = ?", entries_to_delete)
+
+    def clear(self) -> None:
+        self.connection.execute("DELETE FROM parsed_files")
+
+    @staticmethod
+    def __is_racy(mtime_ns: int) -> bool:
+        return time.time() - mtime_ns / 1e9 < RACY_MODIFICATION_SECONDS
+
+
+def compute_file_hash(file_path: str | Path) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def enable_parsed_file_cache(cache_dir: str | Path = DEFAULT_CACHE_DIR, max_mb: int = DEFAULT_CACHE_MAX_MB) -> None:
+    """
+    Enable the cache of parsed files for this process and the processes it starts
+    :param cache_dir: Directory of the cache
+    :param max_mb: Maximum size of the cached data in MB
+    """
+    os.environ[CACHE_DIR_ENV_VARIABLE] = os.path.abspath(cache_dir)
+    os.environ[CACHE_MAX_SIZE_ENV_VARIABLE] = str(max_mb)
+
+
+def disable_parsed_file_cache() -> None:
+    os.environ.pop(CACHE_DIR_ENV_VARIABLE, None)
+
+
+# A SQLite connection must not be shared with forked processes, so caches are stored by process id
+_caches: dict[tuple[int, str], ParsedFileCache] = dict()
+
+
+def get_parsed_file_cache() -> ParsedFileCache | None:
+    """
+    :return: The cache of the directory given by the environment variable, None when the cache is not enabled
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV_VARIABLE)
+    if not cache_dir:
+        return None
+    key = (os.getpid(), cache_dir)
+    if key not in _caches:
+        max_mb = int(os.environ.get(CACHE_MAX_SIZE_ENV_VARIABLE, DEFAULT_CACHE_MAX_MB))
+        _caches[key] = ParsedFileCache(cache_dir, max_mb * 1024 * 1024)
+    return _caches[key]
@@ -0,0 +1,171 @@
+import asyncio
+from asyncio import sleep
+from email.utils import parsedate_to_datetime
+import random
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+DEFAULT_MAX_RETRIES = 4
+# Base and maximum delays in seconds of the exponential backoff
+DEFAULT_BASE_DELAY = 2
+DEFAULT_MAX_DELAY = 60
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Status codes retried for the non-idempotent requests, which were not processed by the server
+NON_IDEMPOTENT_RETRY_STATUS_CODES = {429}
+# Errors raised before the request was sent, so it can be retried even if it is not idempotent
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class TokenBucket:
+    """
+    Token bucket allowing rate requests by second on average, with bursts of capacity requests,
+    shared by the tasks of an event loop
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if not rate > 0:
+            raise ValueError(f"The rate of the token bucket must be greater than 0, not {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.last_update = time.monotonic()
+
+    async def acquire(self) -> None:
+        """
+        Wait for a token and take it
+        """
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_update) * self.rate)
+            self.last_update = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limit of the number of requests in flight, halved when the server is overloaded
+    and increased again by one after about limit successful requests (AIMD)
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        # time.monotonic() before which no request is sent, after a Retry-After of a 429 response
+        self.resume_time = 0.0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            waiting_time = self.resume_time - time.monotonic()
+        if waiting_time > 0:
+            await sleep(waiting_time)
+
+    async def release(self, overloaded: bool) -> None:
+        async with self.condition:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """
+        Send no request during seconds
+        """
+        self.resume_time = max(self.resume_time, time.monotonic() + seconds)
+
+
+class RetryingSender:
+    """
+    Send requests with a shared rate limit and adaptive concurrency,
+    and retry them with exponential backoff and jitter on 429 and 5xx responses and transport errors.
+    The non-idempotent requests are only retried when the server did not process them:
+    on 429 responses and on the errors raised before sending them.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_requests_per_second: float | None = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+    ):
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(max_concurrency)
+        self.token_bucket = None if max_requests_per_second is None else TokenBucket(max_requests_per_second)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    async def send(
+        self, send_request: Callable[[], Awaitable[httpx.Response]], description: str, idempotent: bool = True
+    ) -> httpx.Response:
+        """
+        :param send_request: Coroutine function sending the request
+        :param description: Description of the request for the logs
+        :param idempotent: False if sending the request twice may apply it twice, like a POST request
+        :return: The response of the last attempt
+        """
+        retry_status_codes = RETRY_STATUS_CODES if idempotent else NON_IDEMPOTENT_RETRY_STATUS_CODES
+        attempt = 0
+        while True:
+            await self.concurrency_limiter.acquire()
+            if self.token_bucket is not None:
+                await self.token_bucket.acquire()
+            try:
+                r = await send_request()
+            except httpx.TransportError as e:
+                await self.concurrency_limiter.release(overloaded=True)
+                if attempt >= self.max_retries or not (idempotent or isinstance(e, NOT_SENT_ERRORS)):
+                    raise
+                error, retry_after = type(e).__name__, None
+            else:
+                overloaded = r.status_code in RETRY_STATUS_CODES
+                await self.concurrency_limiter.release(overloaded)
+                if r.status_code not in retry_status_codes or attempt >= self.max_retries:
+                    return r
+                error, retry_after = str(r.status_code), parse_retry_after(r.headers.get("Retry-After"))
+                await r.aclose()
+            delay = compute_retry_delay(attempt, self.base_delay, self.max_delay, retry_after)
+            if retry_after is not None:
+                self.concurrency_limiter.pause(delay)
+            print(f"Fail to {description} ({error}), retry in {delay:.1f} seconds")
+            await sleep(delay)
+            attempt += 1
+
+
+def compute_retry_delay(attempt: int, base_delay: float, max_delay: float, retry_after: float | None) -> float:
+    """
+    :param attempt: Number of the failed attempt, from 0
+    :param retry_after: Delay asked by the server, None if not given
+    :return: The delay asked by the server, else a random delay (full jitter) of the exponential backoff
+    """
+    if retry_after is not None:
+        return min(retry_after, max_delay)
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    :param value: Value of the Retry-After header, a number of seconds or an HTTP date
+    :return: Number of seconds to wait, None if the header is missing or invalid
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -1,25 +1,132 @@
+from itertools import chain
 from pathlib import Path
+import re
+from typing import Callable, Iterable, Iterator, NamedTuple, TypeVar
+
+from paradox_localization_utils.lib.parsed_file_cache import get_parsed_file_cache
+
+T = TypeVar("T")
+
+
+class LocalizationEntry(NamedTuple):
+    """Compact record of a line of a Paradox localization file which has a key"""
+
+    key: str
+    version: int | None
+    # (start, end) indexes of the value in line, None if the double quotes are missing
+    value_span: tuple[int, int] | None
+    line: str
+    line_number: int
+
+    @property
+    def value(self) -> str | None:
+        if self.value_span is None:
+            return None
+        return self.line[self.value_span[0] : self.value_span[1]]
+
+
+# Leading spaces, key (which is not a comment), ":" and optional version digits
+KEY_VERSION_REGEX = re.compile(r"[ \t]*(?![ \t#])([^:]*):(\d*)")
+
+
+def iter_localization_entries(lines: Iterable[str]) -> Iterator[LocalizationEntry]:
+    """
+    Parse lines of a Paradox localization file in a single scan
+    :param lines: Iterable of lines (a file object can be given to stream the file)
+    :return: Iterator of LocalizationEntry for each line with a key (comment and empty lines are skipped)
+    """
+    for line_number, line in enumerate(lines):
+        match = KEY_VERSION_REGEX.match(line)
+        if match is None:
+            continue
+        value_start = match.end()
+        start = line.find('"', value_start) + 1
+        end = line.rfind('"', value_start)
+        version = match.group(2)
+        yield LocalizationEntry(
+            match.group(1),
+            int(version) if version else None,
+            None if start > end else (start, end),
+            line,
+            line_number,
+        )
 
 
 def file_to_keys_and_values(absolute_file_path: str | Path) -> tuple[dict[str, dict[str, str | int | None]], str]:
     """
-    Extract key and values from a Paradox localization file
+    Extract key and values from a Paradox localization file, through the parsed file cache when it is enabled
     :param absolute_file_path: Absolute file path of a Paradox localization file
     :return: (Dict with localization keys as keys, first line of the file)
     """
+    return __parse_through_cache(absolute_file_path, parse_keys_and_values)
+
+
+def parse_keys_and_values(
+    absolute_file_path: str | Path,
+) -> tuple[tuple[dict[str, dict[str, str | int | None]], str], list[str]]:
+    """
+    Parse a Paradox localization file without the cache, see file_to_keys_and_values
+    :return: (Result of file_to_keys_and_values, warnings to print)
+    """
+    (res, first_line, _), warnings = parse_keys_values_and_repeated_keys(absolute_file_path)
+    return (res, first_line), warnings
+
+
+def file_to_keys_values_and_repeated_keys(
+    absolute_file_path: str | Path,
+) -> tuple[dict[str, dict[str, str | int | None]], str, list[str]]:
+    """
+    Extract the output of file_to_keys_and_values and the keys found on several lines of the file,
+    through the parsed file cache when it is enabled
+    :param absolute_file_path: Absolute file path of a Paradox localization file
+    :return: (Dict with localization keys as keys and the value of their last line, first line of the file,
+    keys repeated in the file)
+    """
+    return __parse_through_cache(absolute_file_path, parse_keys_values_and_repeated_keys)
+
+
+def parse_keys_values_and_repeated_keys(
+    absolute_file_path: str | Path,
+) -> tuple[tuple[dict[str, dict[str, str | int | None]], str, list[str]], list[str]]:
+    """
+    Parse a Paradox localization file without the cache, see file_to_keys_values_and_repeated_keys
+    :return: (Result of file_to_keys_values_and_repeated_keys, warnings to print)
+    """
+    res: dict[str, dict[str, str | int | None]] = dict()
+    repeated_keys: dict[str, None] = dict()
+    warnings: list[str] = []
     with open(absolute_file_path, "r", encoding="utf8") as f:
-        lines = f.readlines()
-    if len(lines) == 0:
-        return dict(), ""
-    res: dict[str, dict[str, str]] = dict()
-    for i in range(len(lines)):
-        try:
-            key, value, version = get_key_value_and_version(lines[i])
-            res[key] = {"value": value, "version": version}
-        except BadLocalizationException as e:
-            if str(e) == "Missing double quote" and i > 0:
-                print(f"Missing double quote in file {absolute_file_path} line {i} : {lines[i]}")
-    return res, lines[0]
+        first_line = f.readline()
+        for entry in iter_localization_entries(chain([first_line], f)):
+            if entry.value_span is None:
+                if entry.line_number > 0:
+                    warnings.append(__missing_double_quote_warning(absolute_file_path, entry))
+                continue
+            if entry.key in res:
+                repeated_keys[entry.key] = None
+            res[entry.key] = {"value": entry.value, "version": entry.version}
+    return (res, first_line, list(repeated_keys)), warnings
+
+
+def __parse_through_cache(
+    absolute_file_path: str | Path, parse_function: Callable[[str | Path], tuple[T, list[str]]]
+) -> T:
+    """
+    Parse a file through the parsed file cache when it is enabled, and print the warnings of the parsing,
+    which are stored in the cache to be printed again when the file is not parsed
+    """
+    cache = get_parsed_file_cache()
+    if cache is None:
+        result, warnings = parse_function(absolute_file_path)
+    else:
+        result, warnings = cache.get_or_parse(absolute_file_path, parse_function)
+    for warning in warnings:
+        print(warning)
+    return result
+
+
+def __missing_double_quote_warning(absolute_file_path: str | Path, entry: LocalizationEntry) -> str:
+    return f"Missing double quote in file {absolute_file_path} line {entry.line_number} : {entry.line}"
 
 
 def file_to_keys_and_lines(absolute_file_path: str | Path) -> tuple[dict[str, str], str]:
@@ -28,17 +135,48 @@ def file_to_keys_and_lines(absolute_file_path: str | Path) -> tuple[dict[str, st
     :param absolute_file_path: Absolute file path of a Paradox localization file
     :return: (Dict with localization keys as keys and lines as values, first line of the file)
     """
-    with open(absolute_file_path, "r", encoding="utf8") as f:
-        lines = f.readlines()
     res: dict[str, str] = dict()
-    for i in range(1, len(lines)):
-        try:
-            key = get_key(lines[i])
-            res[key] = lines[i]
-        except BadLocalizationException as e:
-            if str(e) == "Missing double quote" and i > 0:
-                print(f"Missing double quote in file {absolute_file_path} line {i} : {lines[i]}")
-    return res, lines[0]
+    with open(absolute_file_path, "r", encoding="utf8") as f:
+        first_line = f.readline()
+        for entry in iter_localization_entries(f):
+            res[entry.key] = entry.line
+    return res, first_line
+
+
+def file_to_keys_values_and_lines(
+    absolute_file_path: str | Path,
+) -> tuple[dict[str, dict[str, str | int | None]], dict[str, str], str]:
+    """
+    Extract in one read both the outputs of file_to_keys_and_values and file_to_keys_and_lines,
+    through the parsed file cache when it is enabled
+    :param absolute_file_path: Absolute file path of a Paradox localization file
+    :return: (Dict with localization keys as keys, Dict with localization keys as keys and lines as values,
+    first line of the file)
+    """
+    return __parse_through_cache(absolute_file_path, parse_keys_values_and_lines)
+
+
+def parse_keys_values_and_lines(
+    absolute_file_path: str | Path,
+) -> tuple[tuple[dict[str, dict[str, str | int | None]], dict[str, str], str], list[str]]:
+    """
+    Parse a Paradox localization file without the cache, see file_to_keys_values_and_lines
+    :return: (Result of file_to_keys_values_and_lines, warnings to print)
+    """
+    keys_and_values: dict[str, dict[str, str | int | None]] = dict()
+    keys_and_lines: dict[str, str] = dict()
+    warnings: list[str] = []
+    with open(absolute_file_path, "r", encoding="utf8") as f:
+        first_line = f.readline()
+        for entry in iter_localization_entries(chain([first_line], f)):
+            if entry.line_number > 0:
+                keys_and_lines[entry.key] = entry.line
+            if entry.value_span is None:
+                if entry.line_number > 0:
+                    warnings.append(__missing_double_quote_warning(absolute_file_path, entry))
+                continue
+            keys_and_values[entry.key] = {"value": entry.value, "version": entry.version}
+    return (keys_and_values, keys_and_lines, first_line), warnings
 
 
 def get_key_value_and_version(line: str) -> tuple[str, str, int | None]:
@@ -47,56 +185,28 @@ def get_key_value_and_version(line: str) -> tuple[str, str, int | None]:
     :param line: string representing the line of a Paradox localization file
     :return: (localization key, value corresponding to the localization key, version of the value)
     """
-    i = 0
-    while i < len(line) and (line[i] == " " or line[i] == "\t"):
-        i += 1
-    if i < len(line) and line[i] == "#":
-        raise BadLocalizationException("Comment line")
-    split_line = line.split(":")
-    if len(split_line) < 2:
+    entry = next(iter_localization_entries((line,)), None)
+    if entry is None:
+        if line.lstrip(" \t").startswith("#"):
+            raise BadLocalizationException("Comment line")
         raise BadLocalizationException("No semicolon found")
-    key = split_line[0][i:]
-    text = split_line[1]
-    version = None
-    if len(text) > 0:
-        i = 0
-        while text[i].isdigit():
-            if version is None:
-                version = int(text[i])
-            else:
-                version = 10 * version + int(text[i])
-            i += 1
-        text = text[i:]
-    if len(split_line) > 2:
-        for i in range(2, len(split_line)):
-            text += ":" + split_line[i]
-    start = text.find('"') + 1
-    end = text.rfind('"')
-    if start > end:
+    if entry.value_span is None:
         raise BadLocalizationException("Missing double quote")
-    text = text[start:end]
-    return key, text, version
+    return entry.key, entry.value, entry.version
 
 
 def get_key(line: str) -> str:
     """
     Extract the key of a string representing the line of a Paradox localization file
     :param line: string representing the line of a Paradox localization file
-    :return: (localization key, value corresponding to the localization key, version of the value)
+    :return: localization key
     """
-    i = 0
-    while i < len(line) and (line[i] == " " or line[i] == "\t" or line[i] == "\ufeff"):
-        i += 1
-    if i < len(line) and line[i] == "#":
+    if line.lstrip(" \t\ufeff").startswith("#"):
         raise BadLocalizationException("Comment line")
-    split_line = line.split(":")
-    if len(split_line) < 2:
+    key, semicolon, _ = line.partition(":")
+    if not semicolon:
         raise BadLocalizationException("No semicolon found")
-    key = split_line[0]
-    i = 0
-    while key[i] == " " or key[i] == "\t":
-        i += 1
-    return key[i:]
+    return key.lstrip(" \t")
 
 
 class BadLocalizationException(Exception):
@@ -0,0 +1,91 @@
+import json
+import os
+from pathlib import Path
+import zlib
+
+from paradox_localization_utils.lib.parsed_file_cache import compute_file_hash
+
+
+class SyncState:
+    """
+    Local JSON state of the last extraction of Paratranz files:
+    {localisation_file_path: {"paratranz_hash": hash, "localisation_hash": hash}}
+    with the fingerprint of the Paratranz JSON file and the content hash of the localisation file after the sync,
+    to skip the localisation files whose Paratranz file and content are unchanged.
+    """
+
+    def __init__(self, state_path: str | Path, extract_not_review: bool):
+        self.state_path = state_path
+        self.extract_not_review = extract_not_review
+        self.files: dict[str, dict] = dict()
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf8") as f:
+                content = json.load(f)
+            if content["extract_not_review"] == extract_not_review:
+                self.files = content["files"]
+            else:
+                print(f"{state_path} was computed with another extract_not_review value, all files are extracted")
+        # Localisation files whose hash is updated when the state is saved
+        self.synced_paths: set[str] = set()
+        self.extracted_files_nb = 0
+        self.skipped_files_nb = 0
+
+    def is_unchanged(self, localisation_file_path: str | Path, paratranz_hash: str) -> bool:
+        """
+        :return: True if the Paratranz file and the localisation file are unchanged since the last sync,
+        the file is then counted as skipped
+        """
+        path = os.path.abspath(localisation_file_path)
+        entry = self.files.get(path)
+        if entry is None or entry["paratranz_hash"] != paratranz_hash or not os.path.exists(path):
+            return False
+        if compute_file_hash(path) != entry["localisation_hash"]:
+            return False
+        self.synced_paths.add(path)
+        self.skipped_files_nb += 1
+        return True
+
+    def record(self, localisation_file_path: str | Path, paratranz_hash: str) -> None:
+        """
+        Record an extracted file, its content hash is computed when the state is saved
+        """
+        path = os.path.abspath(localisation_file_path)
+        self.files[path] = {"paratranz_hash": paratranz_hash, "localisation_hash": None}
+        self.synced_paths.add(path)
+        self.extracted_files_nb += 1
+
+    def save(self) -> None:
+        """
+        Save the state with the current content hashes of the synced localisation files,
+        so the steps run after the extraction (like copy_code_only_texts) are part of the sync
+        """
+        for path in self.synced_paths:
+            if os.path.exists(path):
+                self.files[path]["localisation_hash"] = compute_file_hash(path)
+            else:
+                del self.files[path]
+        self.synced_paths.clear()
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            json.dump(
+                {"extract_not_review": self.extract_not_review, "files": self.files}, f, indent=1, sort_keys=True
+            )
+        os.replace(tmp_path, self.state_path)
+
+    def print_summary(self) -> None:
+        print(f"{self.extracted_files_nb} files extracted, {self.skipped_files_nb} unchanged files skipped")
+
+
+def compute_paratranz_hash(crc: int, size: int) -> str:
+    """
+    :param crc: CRC-32 of the Paratranz file, stored in the zip artifacts
+    :param size: Size in bytes of the Paratranz file
+    :return: Fingerprint of the Paratranz file
+    """
+    return f"{crc:08x}-{size}"
+
+
+def compute_paratranz_file_hash(file_path: str | Path) -> str:
+    with open(file_path, "rb") as f:
+        content = f.read()
+    return compute_paratranz_hash(zlib.crc32(content), len(content))
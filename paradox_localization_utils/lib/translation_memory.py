@@ -0,0 +1,106 @@
+from typing import Callable
+
+# Version number of the lines written with a fuzzy match, to let reviewers find them
+FUZZY_MATCH_VERSION = 8
+DEFAULT_MIN_SIMILARITY = 0.9
+
+
+class TranslationMemory:
+    """
+    Translation memory {source_text: dest_text} with exact lookups and fuzzy lookups.
+    Fuzzy candidates are retrieved with MinHash signatures of character trigrams and locality-sensitive hashing,
+    then ranked by normalized Levenshtein similarity.
+    The fuzzy index is built at the first fuzzy lookup, and completed at the next lookups if sources are added.
+    """
+
+    def __init__(
+        self,
+        translations: dict[str, str] | None = None,
+        fallback: Callable[[str], str | None] | None = None,
+        on_close: Callable[[], None] | None = None,
+    ):
+        """
+        :param translations: Initial translations {source_text: dest_text}
+        :param fallback: Function returning the translation of a source text missing in the memory or None,
+        for example a lookup in a TranslationMemoryStore. Its results are added to the memory.
+        :param on_close: Function releasing the resources of fallback, called by close
+        """
+        self.translations: dict[str, str] = dict()
+        self.sources: list[str] = []
+        self.fallback = fallback
+        self.on_close = on_close
+        self.missing_sources: set[str] = set()
+        # FuzzyIndex of the sources, created at the first fuzzy lookup
+        self.fuzzy_index = None
+        if translations is not None:
+            self.update(translations)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        if self.on_close is not None:
+            self.on_close()
+            self.on_close = None
+        self.fallback = None
+
+    def __len__(self) -> int:
+        return len(self.translations)
+
+    def __contains__(self, source_text: str) -> bool:
+        if source_text in self.translations:
+            return True
+        if self.fallback is None or source_text in self.missing_sources:
+            return False
+        dest_text = self.fallback(source_text)
+        if dest_text is None:
+            self.missing_sources.add(source_text)
+            return False
+        self.add(source_text, dest_text)
+        return True
+
+    def __getitem__(self, source_text: str) -> str:
+        if source_text not in self:
+            raise KeyError(source_text)
+        return self.translations[source_text]
+
+    def add(self, source_text: str, dest_text: str) -> None:
+        if source_text not in self.translations:
+            self.sources.append(source_text)
+        self.translations[source_text] = dest_text
+
+    def update(self, translations: dict[str, str]) -> None:
+        for source_text, dest_text in translations.items():
+            self.add(source_text, dest_text)
+
+    def find(self, source_text: str, min_similarity: float = DEFAULT_MIN_SIMILARITY) -> tuple[str, float] | None:
+        """
+        Find the translation of the most similar source text
+        :param source_text: Source text to translate
+        :param min_similarity: Minimal normalized Levenshtein similarity (between 0 and 1) of a fuzzy match
+        :return: (translation, similarity), with a similarity of 1 for an exact match, None if no match is found
+        """
+        if source_text in self:
+            return self.translations[source_text], 1.0
+        # numpy and rapidfuzz are only imported when a fuzzy lookup is done
+        from rapidfuzz.distance import Levenshtein as RapidfuzzLevenshtein
+        from rapidfuzz.process import extractOne
+
+        from paradox_localization_utils.lib.fuzzy_index import FuzzyIndex
+
+        if self.fuzzy_index is None:
+            self.fuzzy_index = FuzzyIndex()
+        self.fuzzy_index.add(self.sources[len(self.fuzzy_index) :])
+        candidate_ids = self.fuzzy_index.find_candidates(source_text)
+        if len(candidate_ids) == 0:
+            return None
+        candidates = [self.sources[candidate_id] for candidate_id in candidate_ids]
+        match = extractOne(
+            source_text, candidates, scorer=RapidfuzzLevenshtein.normalized_similarity, score_cutoff=min_similarity
+        )
+        if match is None:
+            return None
+        return self.translations[match[0]], match[1]
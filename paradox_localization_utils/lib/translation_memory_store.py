@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+
+from paradox_localization_utils.lib.paratranz_json import REVIEWED_STAGE
+from paradox_localization_utils.lib.translation_memory import TranslationMemory
+
+
+class TranslationMemoryStore:
+    """
+    Append-only SQLite store of translations {source_text: dest_text} by pair of languages.
+    The texts are indexed by a hash of the source text, the last added translation of a source text is the current one.
+    """
+
+    def __init__(self, db_path: str | Path):
+        if os.path.dirname(db_path) != "":
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.connection = sqlite3.connect(db_path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations (id INTEGER PRIMARY KEY AUTOINCREMENT, source_lang TEXT, "
+            + "dest_lang TEXT, source_hash INTEGER, source TEXT, dest TEXT, origin TEXT)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS translations_by_source ON translations (source_lang, dest_lang, source_hash)"
+        )
+        # Translations to add, compared in one query with the current ones
+        self.connection.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS new_translations (source_hash INTEGER, source TEXT, dest TEXT)"
+        )
+        self.connection.commit()
+
+    def get(self, source_text: str, source_lang: str, dest_lang: str) -> str | None:
+        """
+        :return: The current translation of source_text, None if source_text has never been translated
+        """
+        rows = self.connection.execute(
+            "SELECT source, dest FROM translations WHERE source_lang = ? AND dest_lang = ? AND source_hash = ? "
+            + "ORDER BY id DESC",
+            (source_lang, dest_lang, compute_text_hash(source_text)),
+        )
+        for source, dest in rows:
+            if source == source_text:
+                return dest
+        return None
+
+    def add(self, translations: dict[str, str], source_lang: str, dest_lang: str, origin: str = "") -> int:
+        """
+        Append the translations which are not already the current ones
+        :param translations: Translations {source_text: dest_text}
+        :param source_lang: Source language
+        :param dest_lang: Destination language
+        :param origin: Description of the origin of the translations, for example the imported directory
+        :return: Number of added translations
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM new_translations")
+            self.connection.executemany(
+                "INSERT INTO new_translations VALUES (?, ?, ?)",
+                (
+                    (compute_text_hash(source_text), source_text, dest_text)
+                    for source_text, dest_text in translations.items()
+                ),
+            )
+            added_nb = self.connection.execute(
+                "INSERT INTO translations (source_lang, dest_lang, source_hash, source, dest, origin) "
+                + "SELECT ?, ?, n.source_hash, n.source, n.dest, ? FROM new_translations n "
+                + "WHERE n.dest IS NOT (SELECT t.dest FROM translations t WHERE t.source_lang = ? AND t.dest_lang = ? "
+                + "AND t.source_hash = n.source_hash AND t.source = n.source ORDER BY t.id DESC LIMIT 1) "
+                + "ORDER BY n.rowid",
+                (source_lang, dest_lang, origin, source_lang, dest_lang),
+            ).rowcount
+            self.connection.execute("DELETE FROM new_translations")
+        return added_nb
+
+    def load(self, source_lang: str, dest_lang: str) -> dict[str, str]:
+        """
+        :return: All the current translations {source_text: dest_text} of a pair of languages
+        """
+        rows = self.connection.execute(
+            "SELECT source, dest FROM translations WHERE source_lang = ? AND dest_lang = ? ORDER BY id",
+            (source_lang, dest_lang),
+        )
+        return {source: dest for source, dest in rows}
+
+    def export(self, file_path: str | Path, source_lang: str, dest_lang: str) -> int:
+        """
+        Export the current translations of a pair of languages in a JSON file with the Paratranz format.
+        The key of each entry is computed from the hash of the source text, so it is stable between exports.
+        :return: Number of exported translations
+        """
+        translations = self.load(source_lang, dest_lang)
+        with open(file_path, "w", encoding="utf8") as f:
+            json.dump(
+                [
+                    {"key": compute_text_key(source), "original": source, "translation": dest, "stage": REVIEWED_STAGE}
+                    for source, dest in translations.items()
+                ],
+                f,
+                ensure_ascii=False,
+                indent=1,
+            )
+        return len(translations)
+
+    def compact(self) -> int:
+        """
+        Delete the translations replaced by a more recent one and reclaim the disk space
+        :return: Number of deleted translations
+        """
+        with self.connection:
+            deleted_nb = self.connection.execute(
+                "DELETE FROM translations WHERE id NOT IN "
+                + "(SELECT MAX(id) FROM translations GROUP BY source_lang, dest_lang, source_hash, source)"
+            ).rowcount
+        self.connection.execute("VACUUM")
+        return deleted_nb
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def compute_text_hash(text: str) -> int:
+    """
+    :return: Signed 64-bit hash of text, stored as a SQLite integer
+    """
+    return int.from_bytes(hashlib.sha1(text.encode("utf8")).digest()[:8], "big", signed=True)
+
+
+def compute_text_key(text: str) -> str:
+    """
+    :return: Localization key identifying text, from its hash
+    """
+    return f"TM_{compute_text_hash(text) & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
+def build_translation_memory(
+    translations: dict[str, str], db_path: str | Path | None, source_lang: str, dest_lang: str, fuzzy: bool
+) -> TranslationMemory:
+    """
+    Build a TranslationMemory with translations, completed by the translations of a store
+    :param translations: Translations {source_text: dest_text}, they take precedence over the ones of the store
+    :param db_path: Path of the TranslationMemoryStore database, None to use only translations
+    :param source_lang: Source language
+    :param dest_lang: Destination language
+    :param fuzzy: Load all the translations of the store for fuzzy lookups,
+    else the translations of the store are looked up when needed
+    :return: The TranslationMemory, whose close method closes the store
+    """
+    if db_path is None:
+        return TranslationMemory(translations)
+    store = TranslationMemoryStore(db_path)
+    if not fuzzy:
+        return TranslationMemory(
+            translations, lambda source_text: store.get(source_text, source_lang, dest_lang), store.close
+        )
+    translation_memory = TranslationMemory(store.load(source_lang, dest_lang))
+    translation_memory.update(translations)
+    store.close()
+    return translation_memory
@@ -0,0 +1,75 @@
+import json
+import os
+from pathlib import Path
+
+
+class UploadManifest:
+    """
+    Local JSON manifest of the files uploaded to a Paratranz project: {paratranz_path: {"id": file_id, "hash": hash}}
+    with the content hash of the last upload, to send only the new or changed files.
+    It is updated by the coroutines of a single event loop, between their awaits, so it needs no lock.
+    """
+
+    def __init__(self, manifest_path: str | Path, project_id: int):
+        self.manifest_path = manifest_path
+        self.project_id = project_id
+        self.files: dict[str, dict] = dict()
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf8") as f:
+                content = json.load(f)
+            if content["project_id"] == project_id:
+                self.files = content["files"]
+            else:
+                print(
+                    f"WARNING: {manifest_path} is the manifest of the project {content['project_id']}, it is ignored"
+                )
+        self.sent_files_nb = 0
+        self.sent_bytes = 0
+        self.skipped_files_nb = 0
+        self.skipped_bytes = 0
+
+    def reconcile(self, project_files: dict[str, int]) -> None:
+        """
+        Forget the files deleted, renamed or recreated on Paratranz, so they are sent again
+        :param project_files: Files of the Paratranz project {paratranz_path: file_id}
+        """
+        missing_files = []
+        for paratranz_path, entry in list(self.files.items()):
+            if paratranz_path not in project_files or entry["id"] not in [None, project_files[paratranz_path]]:
+                missing_files.append(paratranz_path)
+                del self.files[paratranz_path]
+            else:
+                entry["id"] = project_files[paratranz_path]
+        if len(missing_files) > 0:
+            print(f"{len(missing_files)} files of the manifest are not in Paratranz anymore, they will be sent")
+
+    def is_unchanged(self, paratranz_path: str, file_hash: str, file_size: int) -> bool:
+        """
+        :return: True if the file has the same content hash as at its last upload, it is then counted as skipped
+        """
+        if paratranz_path not in self.files or self.files[paratranz_path]["hash"] != file_hash:
+            return False
+        self.skipped_files_nb += 1
+        self.skipped_bytes += file_size
+        return True
+
+    def record(self, paratranz_path: str, file_id: int | None, file_hash: str, file_size: int) -> None:
+        """
+        Record a sent file
+        :param file_id: Id of the file in Paratranz, None for a created file whose id is not known yet
+        """
+        self.files[paratranz_path] = {"id": file_id, "hash": file_hash}
+        self.sent_files_nb += 1
+        self.sent_bytes += file_size
+
+    def save(self) -> None:
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            json.dump({"project_id": self.project_id, "files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def print_summary(self) -> None:
+        print(
+            f"{self.sent_files_nb} files sent ({self.sent_bytes / 1e6:.1f} MB), "
+            + f"{self.skipped_files_nb} unchanged files skipped ({self.skipped_bytes / 1e6:.1f} MB saved)"
+        )
@@ -1,15 +1,15 @@
 import datetime
+import httpx
 import json
-import requests
 import time
 
 
-def manage_request_error(r: requests.models.Response):
+def manage_request_error(r: httpx.Response):
     if r.status_code != 200:
         try:
-            error = json.loads(r._content.decode())
+            error = json.loads(r.content.decode())
         except json.decoder.JSONDecodeError:
-            print(f"{r.status_code}: {r._content.decode()}")
+            print(f"{r.status_code}: {r.content.decode()}")
             r.raise_for_status()
         if "message" in error:
             print(error["message"])
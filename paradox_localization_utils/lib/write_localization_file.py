@@ -1,31 +1,105 @@
-﻿from pathlib import Path
+﻿from collections import defaultdict
+import os
+from pathlib import Path
 
-from paradox_localization_utils.lib.read_localization_file import BadLocalizationException, get_key_value_and_version
+from paradox_localization_utils.lib.key_index import KeyIndex
+from paradox_localization_utils.lib.read_localization_file import iter_localization_entries
 
 
-def edit_file_with_dict(localisation_file_path: str | Path, data_to_update: dict[str, str]):
+def edit_file_with_dict(
+    localisation_file_path: str | Path,
+    data_to_update: dict[str, str],
+    versions: dict[str, int | None] | None = None,
+) -> int:
     """Edit a file by replacing lines with keys and values from the provided dictionary.
+    The file is not written if no line changes, else it is replaced atomically.
 
     :param localisation_file_path: Path of the localization file to edit.
     :param data_to_update: Dict {key: new_text} where key is the localization key and new_text is the new value to set.
+    :param versions: Dict {key: version} overriding the written version (a None value writes no version);
+    defaults to keeping the current versions.
+    :return: Number of changed lines.
     """
+    if versions is None:
+        versions = dict()
     with open(localisation_file_path, "r", encoding="utf8") as f:
         lines = f.readlines()
 
-    with open(localisation_file_path, "w", encoding="utf8") as f:
-        for i in range(len(lines)):
-            if i == 0:
-                # Keep the language definition line
-                f.write(lines[0])
-            else:
-                try:
-                    key, value, version = get_key_value_and_version(lines[i])
-                    if version is None:
-                        version = ""
-                    if key in data_to_update and data_to_update[key] != value:
-                        f.write(" " + key + ":" + str(version) + ' "' + data_to_update[key] + '"\n')
-                    else:
-                        f.write(lines[i])
-                except BadLocalizationException:
-                    f.write(lines[i])
-                    continue
+    nb_changed_lines = 0
+    for entry in iter_localization_entries(lines):
+        # Keep the language definition line and the lines without value
+        if entry.line_number == 0 or entry.value_span is None or entry.key not in data_to_update:
+            continue
+        version = versions[entry.key] if entry.key in versions else entry.version
+        if data_to_update[entry.key] != entry.value or version != entry.version:
+            version = "" if version is None else str(version)
+            lines[entry.line_number] = " " + entry.key + ":" + version + ' "' + data_to_update[entry.key] + '"\n'
+            nb_changed_lines += 1
+
+    if nb_changed_lines > 0:
+        write_lines_atomically(localisation_file_path, lines)
+    return nb_changed_lines
+
+
+def group_edits_by_file(
+    data_to_update: dict[str, str], key_index: KeyIndex, versions: dict[str, int | None] | None = None
+) -> dict[str, dict[str, str]]:
+    """Group the edits by file with the index of the files to edit, keeping only the values or versions which change.
+
+    :param data_to_update: Dict {key: new_text} where key is the localization key and new_text is the new value to set.
+    :param key_index: KeyIndex of the files to edit, from load_localization_dir.
+    :param versions: Dict {key: version} of the versions which will be written, as given to edit_files_with_dict.
+    :return: Dict {file_path: {key: new_text}} of the files to edit.
+    """
+    if versions is None:
+        versions = dict()
+    edits_by_file: dict[str, dict[str, str]] = defaultdict(dict)
+    for key, new_text in data_to_update.items():
+        if key not in key_index:
+            continue
+        if key in key_index.duplicates:
+            # The other files, or the other lines of a file repeating the key, may have other values
+            for file_path in key_index.duplicates[key]:
+                edits_by_file[file_path][key] = new_text
+            continue
+        current_version = key_index[key]["version"]
+        if key_index[key]["value"] != new_text or versions.get(key, current_version) != current_version:
+            edits_by_file[key_index.file_by_key[key]][key] = new_text
+    return dict(edits_by_file)
+
+
+def edit_files_with_dict(
+    edits_by_file: dict[str, dict[str, str]], versions: dict[str, int | None] | None = None
+) -> tuple[int, int]:
+    """Edit several files, each one is read and written once.
+
+    :param edits_by_file: Dict {file_path: {key: new_text}} of the edits of each file.
+    :param versions: Dict {key: version} overriding the written version (a None value writes no version);
+    defaults to keeping the current versions.
+    :return: (Number of changed lines, number of changed files).
+    """
+    nb_changed_lines = 0
+    nb_changed_files = 0
+    for file_path, data_to_update in edits_by_file.items():
+        nb_file_changed_lines = edit_file_with_dict(file_path, data_to_update, versions)
+        if nb_file_changed_lines > 0:
+            nb_changed_lines += nb_file_changed_lines
+            nb_changed_files += 1
+    return nb_changed_lines, nb_changed_files
+
+
+def write_lines_atomically(file_path: str | Path, lines: list[str]):
+    """Write the lines in a temporary file which replaces file_path, so file_path is never partially written.
+
+    :param file_path: Path of the file to write.
+    :param lines: Lines of the file, with their line breaks.
+    """
+    tmp_path = f"{file_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
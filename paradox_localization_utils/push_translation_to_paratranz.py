@@ -1,11 +1,15 @@
 ﻿import argparse
-from joblib import Parallel, delayed
+import asyncio
+from functools import partial
+import httpx
+from joblib import effective_n_jobs
 import os
-import requests
 import time
 
-from paradox_localization_utils.update_paratranz import get_project_files
-from paradox_localization_utils.lib.utils import compute_time, manage_request_error
+from paradox_localization_utils.lib.argument_types import positive_float
+from paradox_localization_utils.lib.async_engine import print_timings, raise_first_error, run_concurrently_async
+from paradox_localization_utils.lib.paratranz_client import AsyncParatranzClient
+from paradox_localization_utils.lib.utils import compute_time
 
 
 def get_args():
@@ -18,39 +22,78 @@ def get_args():
     parser.add_argument("source_language", type=str, help="Source language which suffix the files")
     parser.add_argument("translation_language", type=str, help="Source language to send only files with this suffix")
     parser.add_argument("-parallel_nb", type=int, help="Number of parallel tasks", default=-1)
+    parser.add_argument(
+        "-max_requests_per_second",
+        type=positive_float,
+        help="Rate limit of the requests to Paratranz (default: no limit)",
+    )
     return parser.parse_args()
 
 
 def push_all_translations(
-    project_id: int, token: str, loc_dir: str, source_language: str, translation_language: str, parallel_nb: int
+    project_id: int,
+    token: str,
+    loc_dir: str,
+    source_language: str,
+    translation_language: str,
+    parallel_nb: int,
+    max_requests_per_second: float | None = None,
 ) -> dict[str, int]:
-    __assert_localisation_directory_format(loc_dir, source_language)
-    start = time.time()
-    try:
-        current_files = get_project_files(project_id)
-    except requests.HTTPError:
-        print("ERROR: Fail to get the list of files from Paratranz")
-        return
-    print(f"Update_paratranz on {loc_dir}")
-    all_files = []
-    for root, _, files in os.walk(loc_dir):
-        for file in files:
-            if file.endswith(f"{source_language}.yml"):
-                all_files.append(os.path.join(root, file))
-    files_with_errors = []
-    Parallel(n_jobs=parallel_nb, backend="threading")(
-        delayed(push_a_translation)(
-            token,
-            project_id,
-            loc_dir,
-            source_language,
-            translation_language,
-            file_path,
-            current_files,
-            files_with_errors,
+    return asyncio.run(
+        push_all_translations_async(
+            project_id, token, loc_dir, source_language, translation_language, parallel_nb, max_requests_per_second
         )
-        for file_path in all_files
     )
+
+
+async def push_all_translations_async(
+    project_id: int,
+    token: str,
+    loc_dir: str,
+    source_language: str,
+    translation_language: str,
+    parallel_nb: int,
+    max_requests_per_second: float | None = None,
+) -> dict[str, int]:
+    """
+    Asynchronous version of push_all_translations, to send the requests from an event loop
+    """
+    __assert_localisation_directory_format(loc_dir, source_language)
+    start = time.time()
+    async with AsyncParatranzClient(token, parallel_nb, max_requests_per_second=max_requests_per_second) as client:
+        try:
+            current_files = await client.get_project_files(project_id)
+        except httpx.HTTPError:
+            print("ERROR: Fail to get the list of files from Paratranz")
+            return
+        print(f"Update_paratranz on {loc_dir}")
+        all_files = []
+        for root, _, files in os.walk(loc_dir):
+            for file in files:
+                if file.endswith(f"{source_language}.yml"):
+                    all_files.append(os.path.join(root, file))
+        files_with_errors = []
+        calls = [
+            (
+                file_path,
+                partial(
+                    push_a_translation_async,
+                    client,
+                    project_id,
+                    loc_dir,
+                    source_language,
+                    translation_language,
+                    file_path,
+                    current_files,
+                    files_with_errors,
+                ),
+            )
+            for file_path in all_files
+        ]
+        start_requests = time.time()
+        results = await run_concurrently_async(calls, effective_n_jobs(parallel_nb))
+    print_timings(results, time.time() - start_requests)
+    raise_first_error(results)
     if len(files_with_errors) > 0:
         print("-------------------------")
         print("ERROR: Non updated files:")
@@ -78,6 +121,36 @@ def push_a_translation(
     files_with_errors: list,
     sleeping_before_retry: int = 2,
 ):
+    async def run():
+        async with AsyncParatranzClient(token, base_delay=sleeping_before_retry) as client:
+            await push_a_translation_async(
+                client,
+                project_id,
+                loc_dir,
+                source_language,
+                translation_language,
+                file_path,
+                current_files,
+                files_with_errors,
+            )
+
+    asyncio.run(run())
+
+
+async def push_a_translation_async(
+    client: AsyncParatranzClient,
+    project_id: int,
+    loc_dir: str,
+    source_language: str,
+    translation_language: str,
+    file_path: str,
+    current_files: dict[str, int],
+    files_with_errors: list,
+):
+    """
+    Asynchronous version of push_a_translation
+    :param client: AsyncParatranzClient shared between the files
+    """
     file_relative_path = (
         file_path.replace(f"{loc_dir}\\", "")
         .replace(f"{loc_dir}/", "")
@@ -90,49 +163,26 @@ def push_a_translation(
         try:
             if file_relative_path.replace("\\", "/") in current_files:
                 print(f"Push translation of file {file_relative_path}")
-                __push_translation_to_paratranz_with_retry(
-                    token,
+                await client.push_translation(
                     project_id,
-                    file_path.replace(source_language, translation_language),
-                    sleeping_before_retry,
                     current_files.pop(file_relative_path.replace("\\", "/")),
+                    file_path.replace(source_language, translation_language),
                 )
             else:
                 files_with_errors.append(file_relative_path)
-        except requests.HTTPError:
+        except httpx.HTTPError:
             files_with_errors.append(file_relative_path)
 
 
-def __push_translation_to_paratranz_with_retry(
-    token: str,
-    project_id: int,
-    filepath: str,
-    sleeping_before_retry: int,
-    file_id: int,
-):
-    headers = {"Authorization": token}
-    url = f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}/translation"
-    try:
-        __push_translation_to_paratranz(url, headers, filepath)
-    except requests.HTTPError:
-        print(f"Fail to create/update {filepath}, retry in {sleeping_before_retry} seconds")
-        time.sleep(sleeping_before_retry)
-        __push_translation_to_paratranz(url, headers, filepath)
-
-
-def __push_translation_to_paratranz(url: str, headers: dict, filepath: str):
-    r = requests.post(
-        url,
-        headers=headers,
-        data={},
-        files={"file": open(filepath, "rb")},
-    )
-    manage_request_error(r)
-
-
 if __name__ == "__main__":
     print("Version of the software: 1.0 (13th October 2024)")
     args = get_args()
     push_all_translations(
-        args.project_id, args.token, args.loc_dir, args.source_language, args.translation_language, args.parallel_nb
+        args.project_id,
+        args.token,
+        args.loc_dir,
+        args.source_language,
+        args.translation_language,
+        args.parallel_nb,
+        args.max_requests_per_second,
     )
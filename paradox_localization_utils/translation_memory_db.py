@@ -0,0 +1,104 @@
+import argparse
+import os
+
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from paradox_localization_utils.extract_existing_translation import extract_translation_dir
+from paradox_localization_utils.lib.paratranz_json import iter_translated_entries
+from paradox_localization_utils.lib.translation_memory_store import TranslationMemoryStore
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Manage a translation memory database shared across runs and mods")
+    parser.add_argument("db_path", type=str, help="Path of the translation memory database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_dir_parser = subparsers.add_parser("import_dir", help="Import translation from YML and CK2 CSV files")
+    import_dir_parser.add_argument("source_dir", type=str, help="Directory with source Paradox files to import")
+    import_dir_parser.add_argument("dest_dir", type=str, help="Directory with destination Paradox files to import")
+    import_dir_parser.add_argument("source_lang", type=str, help="Source language")
+    import_dir_parser.add_argument("dest_lang", type=str, help="Destination language")
+    import_dir_parser.add_argument("-source_col_ck2", type=int, help="Source language column index for CK2 files")
+    import_dir_parser.add_argument("-dest_col_ck2", type=int, help="Destination language column index for CK2 files")
+    import_paratranz_parser = subparsers.add_parser("import_paratranz", help="Import translation from Paratranz")
+    import_paratranz_parser.add_argument("paratranz_dir", type=str, help="Directory with JSON Paratranz files")
+    import_paratranz_parser.add_argument("source_lang", type=str, help="Source language")
+    import_paratranz_parser.add_argument("dest_lang", type=str, help="Destination language")
+    import_paratranz_parser.add_argument(
+        "-extract_not_review", action="store_true", help="Import not reviewed translation"
+    )
+    export_parser = subparsers.add_parser("export", help="Export translation in a JSON file with Paratranz format")
+    export_parser.add_argument("file_path", type=str, help="Path of the JSON file")
+    export_parser.add_argument("source_lang", type=str, help="Source language")
+    export_parser.add_argument("dest_lang", type=str, help="Destination language")
+    subparsers.add_parser("compact", help="Delete the translations replaced by more recent ones")
+    return parser.parse_args()
+
+
+def extract_translation_from_paratranz_dir(paratranz_dir: str, extract_not_review: bool) -> dict[str, str]:
+    """
+    Extract translation from Paratranz JSON files
+    :param paratranz_dir: Directory with JSON Paratranz files
+    :param extract_not_review: Extract not reviewed translation
+    :return: Extracted translation {source_text: dest_text}
+    """
+    extracted_translation = dict()
+    for root, _, files in os.walk(paratranz_dir):
+        for file in files:
+            if file.endswith(".json"):
+                with open(os.path.join(root, file), "r", encoding="utf8") as f:
+                    for entry in iter_translated_entries(f, extract_not_review):
+                        extracted_translation[entry["original"]] = entry["translation"]
+    return extracted_translation
+
+
+def import_dir(
+    db_path: str,
+    source_dir: str,
+    dest_dir: str,
+    source_lang: str,
+    dest_lang: str,
+    source_col_ck2: int | None = None,
+    dest_col_ck2: int | None = None,
+):
+    translations = extract_translation_dir(source_dir, dest_dir, source_lang, dest_lang, source_col_ck2, dest_col_ck2)
+    added_nb = TranslationMemoryStore(db_path).add(translations, source_lang, dest_lang, os.path.abspath(source_dir))
+    print(f"{added_nb} translations added from {len(translations)} extracted translations")
+
+
+def import_paratranz(db_path: str, paratranz_dir: str, source_lang: str, dest_lang: str, extract_not_review: bool):
+    translations = extract_translation_from_paratranz_dir(paratranz_dir, extract_not_review)
+    added_nb = TranslationMemoryStore(db_path).add(
+        translations, source_lang, dest_lang, os.path.abspath(paratranz_dir)
+    )
+    print(f"{added_nb} translations added from {len(translations)} extracted translations")
+
+
+def export(db_path: str, file_path: str, source_lang: str, dest_lang: str):
+    exported_nb = TranslationMemoryStore(db_path).export(file_path, source_lang, dest_lang)
+    print(f"{exported_nb} translations exported to {file_path}")
+
+
+def compact(db_path: str):
+    deleted_nb = TranslationMemoryStore(db_path).compact()
+    print(f"{deleted_nb} replaced translations deleted")
+
+
+if __name__ == "__main__":
+    args = get_args()
+    if args.command == "import_dir":
+        import_dir(
+            args.db_path,
+            args.source_dir,
+            args.dest_dir,
+            args.source_lang,
+            args.dest_lang,
+            args.source_col_ck2,
+            args.dest_col_ck2,
+        )
+    elif args.command == "import_paratranz":
+        import_paratranz(args.db_path, args.paratranz_dir, args.source_lang, args.dest_lang, args.extract_not_review)
+    elif args.command == "export":
+        export(args.db_path, args.file_path, args.source_lang, args.dest_lang)
+    elif args.command == "compact":
+        compact(args.db_path)
@@ -2,9 +2,17 @@ import argparse
 import os
 from pathlib import Path
 import shutil
-import time
-from download_paratranz import download_artifact, update_artifact
-from extract_paratranz_translation import extract_paratranz_localisation_dir
+import tempfile
+import zipfile
+from download_paratranz import (
+    DEFAULT_ARTIFACT_TIMEOUT,
+    download_artifact_zip,
+    extract_artifact,
+    update_artifact_and_wait,
+)
+from paradox_localization_utils.lib.paratranz_client import ParatranzClient
+from paradox_localization_utils.lib.sync_state import SyncState
+from extract_paratranz_translation import extract_paratranz_localisation_zip
 from paradox_localization_utils.copy_code_only_texts import copy_code_only_texts
 
 
@@ -24,13 +32,29 @@ def get_args():
     parser.add_argument(
         "-clean_raw_files",
         action="store_true",
-        help="Remove raw files after extraction",
+        help="Do not keep the raw files of the artifact",
     )
     parser.add_argument(
         "-no-check-dest-lang-dir",
         action="store_true",
         help="Do not stop if loc_dir/language directory doesn't contains file ",
     )
+    parser.add_argument(
+        "-artifact_timeout",
+        type=float,
+        help="Maximum time in seconds to wait for the new artifact",
+        default=DEFAULT_ARTIFACT_TIMEOUT,
+    )
+    parser.add_argument(
+        "-jobs", type=int, help="Number of processes to extract the translation (-1 for all CPUs)", default=1
+    )
+    parser.add_argument(
+        "-sync_state",
+        type=str,
+        help="State of the last sync to update only the files changed since then "
+        + "(default: paratranz_sync_state_<project_id>.json)",
+    )
+    parser.add_argument("-force", action="store_true", help="Update all the files, even the unchanged ones")
     return parser.parse_args()
 
 
@@ -42,6 +66,10 @@ def update_files_from_paratranz(
     steam_loc_dir: str | None,
     clean_raw_files: bool,
     no_check_dest_lang_dir: bool,
+    artifact_timeout: float = DEFAULT_ARTIFACT_TIMEOUT,
+    jobs: int = 1,
+    sync_state_path: str | None = None,
+    force: bool = False,
 ) -> None:
     """Update localisation files from Paratranz
 
@@ -50,7 +78,11 @@ def update_files_from_paratranz(
     :param loc_dir: Path to the localisation directory where the translation will be written
     :param dest_language: Language to update
     :param steam_loc_dir: Localisation directory for Steam, if None, no files will be copied to Steam
-    :param clean_raw_files: Delete raw files after extraction
+    :param clean_raw_files: Do not keep the raw files of the artifact
+    :param artifact_timeout: Maximum time in seconds to wait for the new artifact
+    :param jobs: Number of processes to extract the translation (-1 for all CPUs)
+    :param sync_state_path: Path of the SyncState of the project, None to update all files without state
+    :param force: Update all the files, even the ones unchanged since the last sync according to the state
     """
 
     # Check loc_dir is set correctly
@@ -64,22 +96,43 @@ def update_files_from_paratranz(
             exit()
 
     # download_paratranz
-    update_artifact(token, project_id)
-    waiting_time = 180
-    print(f"Artifacts updated, wait {waiting_time} seconds before downloading")
-    time.sleep(waiting_time)
     raw_dir = loc_dir / ".." / "raw"
-    utf8_dir = loc_dir / "utf8"
-    download_artifact(token, project_id, raw_dir, utf8_dir)
-    shutil.rmtree(utf8_dir, ignore_errors=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifact_path = os.path.join(tmp_dir, "artifact.zip")
+        with ParatranzClient(token) as client:
+            update_artifact_and_wait(token, project_id, artifact_timeout, client)
+            download_artifact_zip(token, project_id, artifact_path, client)
+        if clean_raw_files:
+            shutil.rmtree(raw_dir, ignore_errors=True)
+        else:
+            # The utf8 files are not used
+            with zipfile.ZipFile(artifact_path, "r") as zip_ref:
+                extract_artifact(zip_ref, {"raw": str(raw_dir)})
 
-    # extract paratanz
-    extract_paratranz_localisation_dir(str(raw_dir.resolve()), dest_language, loc_dir / dest_language, True)
-    extract_paratranz_localisation_dir(str(raw_dir.resolve()), dest_language, loc_dir, True)
+        # extract paratanz, directly from the artifact
+        sync_state = None
+        if sync_state_path is not None:
+            sync_state = SyncState(sync_state_path, True)
+            if force:
+                sync_state.files.clear()
+        # Each Paratranz file is parsed once for both directories
+        extract_paratranz_localisation_zip(
+            artifact_path,
+            dest_language,
+            [str(loc_dir / dest_language), str(loc_dir)],
+            True,
+            jobs=jobs,
+            sync_state=sync_state,
+        )
 
     # copy code only texts
     copy_code_only_texts(loc_dir, loc_dir, "english", dest_language)
 
+    # after copy_code_only_texts which edits the synced files
+    if sync_state is not None:
+        sync_state.save()
+        sync_state.print_summary()
+
     if steam_loc_dir:
         steam_loc_dir = Path(steam_loc_dir)
         # remove previous files
@@ -91,12 +144,12 @@ def update_files_from_paratranz(
             os.makedirs(os.path.dirname(new_file), exist_ok=True)
             shutil.copy(file, new_file)
 
-    if clean_raw_files:
-        shutil.rmtree(raw_dir, ignore_errors=True)
-
 
 if __name__ == "__main__":
     args = get_args()
+    sync_state_path = args.sync_state
+    if sync_state_path is None:
+        sync_state_path = f"paratranz_sync_state_{args.project_id}.json"
     update_files_from_paratranz(
         args.token,
         args.project_id,
@@ -105,4 +158,8 @@ if __name__ == "__main__":
         args.steam_loc_dir,
         args.clean_raw_files,
         args.no_check_dest_lang_dir,
+        args.artifact_timeout,
+        args.jobs,
+        sync_state_path,
+        args.force,
     )
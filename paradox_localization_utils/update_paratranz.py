@@ -1,10 +1,22 @@
 import argparse
-from joblib import Parallel, delayed
+import asyncio
+from functools import partial
+import httpx
+from joblib import effective_n_jobs
 import os
-import requests
 import time
 
-from paradox_localization_utils.lib.utils import compute_time, manage_request_error
+from paradox_localization_utils.lib.argument_types import positive_float
+from paradox_localization_utils.lib.async_engine import (
+    SKIPPED,
+    print_timings,
+    raise_first_error,
+    run_concurrently_async,
+)
+from paradox_localization_utils.lib.parsed_file_cache import compute_file_hash
+from paradox_localization_utils.lib.upload_manifest import UploadManifest
+from paradox_localization_utils.lib.paratranz_client import AsyncParatranzClient, ParatranzClient
+from paradox_localization_utils.lib.utils import compute_time
 
 
 def get_args():
@@ -16,33 +28,107 @@ def get_args():
     )
     parser.add_argument("language", type=str, help="Source language to send only files with this suffix")
     parser.add_argument("-parallel_nb", type=int, help="Number of parallel tasks", default=-1)
+    parser.add_argument(
+        "-max_requests_per_second",
+        type=positive_float,
+        help="Rate limit of the requests to Paratranz (default: no limit)",
+    )
+    parser.add_argument(
+        "-manifest",
+        type=str,
+        help="Manifest of the uploaded files to send only new or changed files "
+        + "(default: paratranz_manifest_<project_id>.json)",
+    )
+    parser.add_argument("-force", action="store_true", help="Send all the files, even the unchanged ones")
     return parser.parse_args()
 
 
 def create_or_update_files(
-    project_id: int, token: str, loc_dir: str, language: str, parallel_nb: int
+    project_id: int,
+    token: str,
+    loc_dir: str,
+    language: str,
+    parallel_nb: int,
+    manifest_path: str | None = None,
+    force: bool = False,
+    max_requests_per_second: float | None = None,
 ) -> dict[str, int]:
+    """
+    Create or update on Paratranz the files of loc_dir
+    :param manifest_path: Path of the UploadManifest of the project, None to send all files without manifest
+    :param force: Send all the files, even the ones unchanged since their last upload according to the manifest
+    :param max_requests_per_second: Rate limit of the requests to Paratranz, None for no limit
+    :return: Files in Paratranz but not in loc_dir {paratranz_path: file_id}
+    """
+    return asyncio.run(
+        create_or_update_files_async(
+            project_id, token, loc_dir, language, parallel_nb, manifest_path, force, max_requests_per_second
+        )
+    )
+
+
+async def create_or_update_files_async(
+    project_id: int,
+    token: str,
+    loc_dir: str,
+    language: str,
+    parallel_nb: int,
+    manifest_path: str | None = None,
+    force: bool = False,
+    max_requests_per_second: float | None = None,
+) -> dict[str, int]:
+    """
+    Asynchronous version of create_or_update_files, to send the requests from an event loop
+    """
     __assert_localisation_directory_format(loc_dir, language)
     start = time.time()
-    try:
-        current_files = get_project_files(project_id)
-    except requests.HTTPError:
-        print("WARNING: Fail to get the list of files from Paratranz")
-        print("Files can be created but not updated")
-        current_files = dict()
-    print(f"Update_paratranz on {loc_dir}")
-    all_files = []
-    for root, _, files in os.walk(loc_dir):
-        for file in files:
-            if file.endswith(f"{language}.yml"):
-                all_files.append(os.path.join(root, file))
+    manifest = None
+    if manifest_path is not None:
+        manifest = UploadManifest(manifest_path, project_id)
+        if force:
+            manifest.files.clear()
     files_with_errors = []
-    Parallel(n_jobs=parallel_nb, backend="threading")(
-        delayed(create_or_update_file)(
-            token, project_id, loc_dir, language, file_path, current_files, files_with_errors
-        )
-        for file_path in all_files
-    )
+    try:
+        async with AsyncParatranzClient(token, parallel_nb, max_requests_per_second=max_requests_per_second) as client:
+            try:
+                current_files = await client.get_project_files(project_id)
+                if manifest is not None:
+                    manifest.reconcile(current_files)
+            except httpx.HTTPError:
+                print("WARNING: Fail to get the list of files from Paratranz")
+                print("Files can be created but not updated")
+                current_files = dict()
+            print(f"Update_paratranz on {loc_dir}")
+            all_files = []
+            for root, _, files in os.walk(loc_dir):
+                for file in files:
+                    if file.endswith(f"{language}.yml"):
+                        all_files.append(os.path.join(root, file))
+            calls = [
+                (
+                    file_path,
+                    partial(
+                        create_or_update_file_async,
+                        client,
+                        project_id,
+                        loc_dir,
+                        language,
+                        file_path,
+                        current_files,
+                        files_with_errors,
+                        manifest,
+                    ),
+                )
+                for file_path in all_files
+            ]
+            start_requests = time.time()
+            results = await run_concurrently_async(calls, effective_n_jobs(parallel_nb))
+            print_timings(results, time.time() - start_requests)
+            raise_first_error(results)
+    finally:
+        if manifest is not None:
+            manifest.save()
+            manifest.print_summary()
     if len(files_with_errors) > 0:
         print("-------------------------")
         print("ERROR: Non updated files:")
@@ -59,10 +145,11 @@ def __assert_localisation_directory_format(loc_dir: str, language: str):
         raise ValueError(f"Directory {os.path.join(loc_dir, language)} does not exist")
 
 
-def get_project_files(project_id: int) -> dict[str, int]:
-    r = requests.get(f"https://paratranz.cn/api/projects/{project_id}/files")
-    manage_request_error(r)
-    return {file["name"]: file["id"] for file in r.json()}
+def get_project_files(project_id: int, client: ParatranzClient | None = None) -> dict[str, int]:
+    if client is None:
+        with ParatranzClient() as client:
+            return client.get_project_files(project_id)
+    return client.get_project_files(project_id)
 
 
 def create_or_update_file(
@@ -74,7 +161,38 @@ def create_or_update_file(
     current_files: dict[str, int],
     files_with_errors: list,
     sleeping_before_retry: int = 2,
+    manifest: UploadManifest | None = None,
 ):
+    """
+    Create or update a file on Paratranz
+    :param sleeping_before_retry: Base delay in seconds between retries
+    :param manifest: UploadManifest to skip the file if it is unchanged since its last upload, and to record the upload
+    """
+
+    async def run():
+        async with AsyncParatranzClient(token, base_delay=sleeping_before_retry) as client:
+            await create_or_update_file_async(
+                client, project_id, loc_dir, language, file_path, current_files, files_with_errors, manifest
+            )
+
+    asyncio.run(run())
+
+
+async def create_or_update_file_async(
+    client: AsyncParatranzClient,
+    project_id: int,
+    loc_dir: str,
+    language: str,
+    file_path: str,
+    current_files: dict[str, int],
+    files_with_errors: list,
+    manifest: UploadManifest | None = None,
+):
+    """
+    Asynchronous version of create_or_update_file
+    :param client: AsyncParatranzClient shared between the files
+    :return: SKIPPED if the file is unchanged since its last upload, None otherwise
+    """
     file_relative_path = (
         file_path.replace(f"{loc_dir}\\", "")
         .replace(f"{loc_dir}/", "")
@@ -84,24 +202,26 @@ def create_or_update_file(
         .replace(f"replace/{language}/", "replace/")
     )
     paratranz_path = os.path.dirname(file_relative_path)
+    paratranz_file_path = file_relative_path.replace("\\", "/")
     if file_path.endswith(f"{language}.yml"):
+        if manifest is not None:
+            file_hash = compute_file_hash(file_path)
+            file_size = os.path.getsize(file_path)
+            if manifest.is_unchanged(paratranz_file_path, file_hash, file_size):
+                # Keep it in Paratranz
+                current_files.pop(paratranz_file_path, None)
+                return SKIPPED
         try:
-            if file_relative_path.replace("\\", "/") in current_files:
+            if paratranz_file_path in current_files:
                 print(f"Update file {file_relative_path}")
-                __post_file_to_paratranz_with_retry(
-                    token,
-                    project_id,
-                    file_path,
-                    paratranz_path,
-                    sleeping_before_retry,
-                    current_files.pop(file_relative_path.replace("\\", "/")),
-                )
+                file_id = current_files.pop(paratranz_file_path)
             else:
                 print(f"Create file {file_relative_path}")
-                __post_file_to_paratranz_with_retry(
-                    token, project_id, file_path, paratranz_path, sleeping_before_retry
-                )
-        except requests.RequestException:
+                file_id = None
+            await client.post_file(project_id, file_path, paratranz_path, file_id)
+            if manifest is not None:
+                manifest.record(paratranz_file_path, file_id, file_hash, file_size)
+        except httpx.HTTPError:
             files_with_errors.append(file_relative_path)
 
 
@@ -119,67 +239,43 @@ def delete_files_if_wanted(
             print(file)
         will_delete_files = input("Do you want to delete these files from Paratranz? [y/N]")
         if will_delete_files == "y":
-            Parallel(n_jobs=parallel_nb, backend="threading")(
-                delayed(__delete_file_with_retry)(token, project_id, file_name, file_id, sleeping_before_retry)
-                for file_name, file_id in files_to_delete.items()
-            )
+            asyncio.run(__delete_files(token, project_id, parallel_nb, files_to_delete, sleeping_before_retry))
         else:
             print("Files NOT deleted")
 
 
-def __delete_file_with_retry(token: str, project_id: int, file_name: str, file_id: int, sleeping_before_retry: int):
-    headers = {"Authorization": token}
-    url = f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}"
-    try:
-        __delete_file(url, headers)
-    except requests.HTTPError:
-        print(f"Fail to delete {file_name}, retry in {sleeping_before_retry} seconds")
-        time.sleep(sleeping_before_retry)
-        try:
-            __delete_file(url, headers)
-        except requests.HTTPError:
-            pass
-
-
-def __delete_file(url: str, headers: dict):
-    r = requests.delete(url, headers=headers)
-    manage_request_error(r)
+async def __delete_files(
+    token: str, project_id: int, parallel_nb: int, files_to_delete: dict[str, int], sleeping_before_retry: int
+):
+    async with AsyncParatranzClient(token, parallel_nb, base_delay=sleeping_before_retry) as client:
+        calls = [
+            (file_name, partial(__delete_file, client, project_id, file_name, file_id))
+            for file_name, file_id in files_to_delete.items()
+        ]
+        raise_first_error(await run_concurrently_async(calls, effective_n_jobs(parallel_nb)))
 
 
-def __post_file_to_paratranz_with_retry(
-    token: str,
-    project_id: int,
-    filepath: str,
-    paratranz_path: str,
-    sleeping_before_retry: int,
-    file_id: int | None = None,
-):
-    headers = {"Authorization": token}
-    url = f"https://paratranz.cn/api/projects/{project_id}/files"
-    if file_id is not None:
-        url += f"/{file_id}"
+async def __delete_file(client: AsyncParatranzClient, project_id: int, file_name: str, file_id: int):
     try:
-        __post_file_to_paratranz(url, headers, filepath, paratranz_path)
-    except requests.HTTPError:
-        print(f"Fail to create/update {filepath}, retry in {sleeping_before_retry} seconds")
-        time.sleep(sleeping_before_retry)
-        __post_file_to_paratranz(url, headers, filepath, paratranz_path)
-
-
-def __post_file_to_paratranz(url: str, headers: dict, filepath: str, paratranz_path: str):
-    r = requests.post(
-        url,
-        headers=headers,
-        data={"path": paratranz_path},
-        files={"file": open(filepath, "rb")},
-    )
-    manage_request_error(r)
+        await client.delete_file(project_id, file_id)
+    except httpx.HTTPError:
+        print(f"ERROR: Fail to delete {file_name}")
 
 
 if __name__ == "__main__":
     print("Version of the software: 1.1 (28th September 2024)")
     args = get_args()
+    manifest_path = args.manifest
+    if manifest_path is None:
+        manifest_path = f"paratranz_manifest_{args.project_id}.json"
     files_to_delete = create_or_update_files(
-        args.project_id, args.token, args.loc_dir, args.language, args.parallel_nb
+        args.project_id,
+        args.token,
+        args.loc_dir,
+        args.language,
+        args.parallel_nb,
+        manifest_path,
+        args.force,
+        args.max_requests_per_second,
     )
     delete_files_if_wanted(args.token, args.project_id, args.loc_dir, args.parallel_nb, files_to_delete)
@@ -1,7 +1,10 @@
 import unittest
 
 import os
+from pathlib import Path
 import shutil
+import subprocess
+import sys
 
 from tests.utils import get_data_dir
 from paradox_localization_utils.apply_diff_all import (
@@ -11,6 +14,7 @@ from paradox_localization_utils.apply_diff_all import (
     FILE_TO_UPDATE_DEST_PREFIX,
     FILE_TO_UPDATE_OLD_SOURCE_PREFIX,
     FILE_TO_UPDATE_SOURCE_PREFIX,
+    apply_diff_all,
     apply_diff_all_old_formats,
 )
 
@@ -209,3 +213,86 @@ class TestApplyDiffAll(unittest.TestCase):
             for line in expected_lines[i]:
                 self.assertTrue(line in lines, f"{line} not found in {file}")
             i += 1
+
+
+class TestApplyDiffAllIncremental:
+    def write_file(self, file_path: Path, content: str):
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content, encoding="utf8")
+
+    def test_incremental_keeps_unchanged_files(self, tmp_path: Path):
+        unchanged_source = '\ufeffl_english:\n KEY0:0 "value0"\n'
+        self.write_file(tmp_path / "old" / "a_l_english.yml", unchanged_source)
+        self.write_file(tmp_path / "old" / "b_l_english.yml", '\ufeffl_english:\n KEY1:0 "value1"\n')
+        self.write_file(tmp_path / "new" / "a_l_english.yml", unchanged_source)
+        self.write_file(tmp_path / "new" / "b_l_english.yml", '\ufeffl_english:\n KEY1:0 "value1 edited"\n')
+        unchanged_dest = '\ufeffl_french:\n # Hand-written comment\n KEY0:0 "valeur0"\n'
+        self.write_file(tmp_path / "dest" / "a_l_french.yml", unchanged_dest)
+        self.write_file(tmp_path / "dest" / "b_l_french.yml", '\ufeffl_french:\n KEY1:0 "valeur1"\n')
+        mtime = os.path.getmtime(tmp_path / "dest" / "a_l_french.yml")
+        apply_diff_all(
+            str(tmp_path / "old"),
+            str(tmp_path / "new"),
+            str(tmp_path / "dest"),
+            "english",
+            "french",
+            [],
+            incremental=True,
+        )
+        assert (tmp_path / "dest" / "a_l_french.yml").read_text(encoding="utf8") == unchanged_dest
+        assert os.path.getmtime(tmp_path / "dest" / "a_l_french.yml") == mtime
+        # Little edition in source so the translation is kept with version 9
+        assert (tmp_path / "dest" / "b_l_french.yml").read_text(
+            encoding="utf8"
+        ) == '\ufeffl_french:\n KEY1:9 "valeur1"\n'
+
+
+def test_batch_same_result_as_default(tmp_path: Path, capsys):
+    data_dir = Path(get_data_dir()) / "apply_diff_all"
+    results = []
+    for batch in [False, True]:
+        run_dir = tmp_path / str(batch)
+        shutil.copytree(data_dir / "old", run_dir / "old")
+        shutil.copytree(data_dir / "new", run_dir / "new", ignore=shutil.ignore_patterns("*_l_french.yml"))
+        for file in (data_dir / "dest").iterdir():
+            shutil.copyfile(file, run_dir / "new" / file.name)
+        apply_diff_all_old_formats(
+            str(run_dir / "old"), str(run_dir / "new"), "english", "french", ["KEYTOIGNORE"], batch=batch
+        )
+        results.append({file.name: file.read_text(encoding="utf8") for file in (run_dir / "new").iterdir()})
+    assert results[0] == results[1]
+    logs = capsys.readouterr().out.split("\n")
+    assert "Source changes: 50 unchanged, 2 minor edits, 2 major edits, 4 new keys" in logs
+
+
+def test_fuzzy_similarity_reuses_similar_translation(tmp_path: Path):
+    for directory, source in [("old", "The king has declared war."), ("new", "The king has declared war!")]:
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "a_l_english.yml").write_text(
+            f'\ufeffl_english:\n KEY0:0 "{source}"\n UNTRANSLATED_KEY:0 "The king has declared war"\n', encoding="utf8"
+        )
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "dest" / "a_l_french.yml").write_text(
+        '\ufeffl_french:\n KEY0:0 "Le roi a déclaré la guerre."\n', encoding="utf8"
+    )
+    apply_diff_all(
+        str(tmp_path / "old"),
+        str(tmp_path / "new"),
+        str(tmp_path / "dest"),
+        "english",
+        "french",
+        [],
+        fuzzy_similarity=0.9,
+    )
+    lines = (tmp_path / "dest" / "a_l_french.yml").read_text(encoding="utf8").split("\n")
+    assert lines[1] == ' KEY0:9 "Le roi a déclaré la guerre."'
+    assert lines[2] == ' UNTRANSLATED_KEY:8 "Le roi a déclaré la guerre."'
+
+
+def test_numpy_is_not_imported_without_batch():
+    code = (
+        "import sys\n"
+        + "from paradox_localization_utils.apply_diff_all import apply_diff_all\n"
+        + "assert 'numpy' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parent.parent)
@@ -0,0 +1,27 @@
+import argparse
+
+import pytest
+
+from paradox_localization_utils.lib.argument_types import positive_float, positive_int
+
+
+def test_positive_int():
+    assert positive_int("1") == 1
+    assert positive_int("10") == 10
+
+
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_positive_int_lower_than_1(value: str):
+    with pytest.raises(argparse.ArgumentTypeError):
+        positive_int(value)
+
+
+def test_positive_float():
+    assert positive_float("0.5") == 0.5
+    assert positive_float("10") == 10
+
+
+@pytest.mark.parametrize("value", ["0", "-1.5", "nan", "inf"])
+def test_positive_float_not_positive(value: str):
+    with pytest.raises(argparse.ArgumentTypeError):
+        positive_float(value)
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from paradox_localization_utils.lib.async_engine import SKIPPED, print_timings, raise_first_error, run_concurrently
+
+
+def test_run_concurrently_bounds_calls_in_flight():
+    in_flight = [0, 0]  # current, maximum
+
+    async def call(i: int) -> int:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return i
+
+    results = run_concurrently([(str(i), lambda i=i: call(i)) for i in range(40)], 4)
+    assert [result.result for result in results] == list(range(40))
+    assert [result.name for result in results] == [str(i) for i in range(40)]
+    assert all(result.error is None and result.duration >= 0.01 for result in results)
+    assert 1 < in_flight[1] <= 4
+
+
+def test_run_concurrently_keeps_errors():
+    async def succeed():
+        return 1
+
+    async def fail():
+        raise ValueError("error")
+
+    results = run_concurrently([("ok", succeed), ("fail", fail)], 2)
+    assert results[0].result == 1 and results[0].error is None
+    assert isinstance(results[1].error, ValueError)
+    with pytest.raises(ValueError, match="error"):
+        raise_first_error(results)
+
+
+def test_print_timings(capsys):
+    async def fast():
+        pass
+
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    results = run_concurrently([("fast", fast), ("slow", slow)], 2)
+    print_timings(results, 0.05)
+    out = capsys.readouterr().out
+    assert out.startswith("2 requests in 0.1 s (40.0 requests/s)")
+    assert out.endswith("(slow)\n")
+
+
+def test_print_timings_counts_skipped_calls_apart(capsys):
+    async def skipped():
+        return SKIPPED
+
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    results = run_concurrently([("skipped1", skipped), ("skipped2", skipped), ("slow", slow)], 3)
+    print_timings(results, 0.05)
+    logs = capsys.readouterr().out.split("\n")
+    assert logs[0] == "2 calls skipped without request"
+    assert logs[1].startswith("1 requests in 0.1 s (20.0 requests/s)") and logs[1].endswith("(slow)")
+    print_timings(results[:2], 0.05)
+    assert capsys.readouterr().out == "2 calls skipped without request\n"
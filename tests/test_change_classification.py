@@ -0,0 +1,36 @@
+import pytest
+
+from paradox_localization_utils.lib.change_classification import (
+    ChangeClass,
+    classify_change,
+    classify_changes,
+)
+
+
+@pytest.mark.parametrize(
+    "old_value, new_value, expected",
+    [
+        ("value", "value", ChangeClass.UNCHANGED),
+        ("", "", ChangeClass.UNCHANGED),
+        ("value0", "value42", ChangeClass.MINOR_EDIT),
+        ("value0", "value01234567891011", ChangeClass.MAJOR_EDIT),
+        ("abcdefghij", "klmnopqrst", ChangeClass.MAJOR_EDIT),
+        ("abcdefghij", "klmnopqrsj", ChangeClass.MINOR_EDIT),
+    ],
+    ids=["Same", "Empty", "Little edition", "Length difference", "Distance of 10", "Distance of 9"],
+)
+def test_classify_change(old_value: str, new_value: str, expected: ChangeClass):
+    assert classify_change(old_value, new_value) == expected
+
+
+def test_classify_change_threshold():
+    assert classify_change("value0", "value42", 2) == ChangeClass.MAJOR_EDIT
+    assert classify_change("value0", "value4", 2) == ChangeClass.MINOR_EDIT
+
+
+def test_classify_changes():
+    old_values = ["value", "", "value0", "value0", "abcdefghij", "abcdefghij"]
+    new_values = ["value", "", "value42", "value01234567891011", "klmnopqrst", "klmnopqrsj"]
+    expected = [classify_change(old_value, new_value) for old_value, new_value in zip(old_values, new_values)]
+    assert classify_changes(old_values, new_values) == expected
+    assert classify_changes([], []) == []
@@ -0,0 +1,112 @@
+import io
+from pathlib import Path
+import zipfile
+
+import httpx
+import pytest
+from pytest_mock import MockerFixture
+import respx
+
+from paradox_localization_utils.download_paratranz import (
+    download_artifact,
+    extract_artifact,
+    update_artifact_and_wait,
+    wait_for_artifact,
+)
+from paradox_localization_utils.lib.paratranz_client import PARATRANZ_API_URL, ParatranzClient
+
+ARTIFACT_URL = f"{PARATRANZ_API_URL}/projects/42/artifacts"
+
+
+@pytest.fixture
+def sleep_mock(mocker: MockerFixture):
+    yield mocker.patch("paradox_localization_utils.download_paratranz.time.sleep")
+
+
+@respx.mock
+def test_update_artifact_and_wait(sleep_mock, mocker: MockerFixture):
+    close_spy = mocker.spy(ParatranzClient, "close")
+    respx.get(ARTIFACT_URL).mock(
+        side_effect=[
+            httpx.Response(200, json={"createdAt": "2024-10-01T10:00:00.000Z"}),
+            httpx.Response(200, json={"createdAt": "2024-10-01T10:00:00.000Z"}),
+            httpx.Response(200, json={"createdAt": "2024-10-01T10:00:00.000Z"}),
+            httpx.Response(200, json={"createdAt": "2024-10-18T10:00:00.000Z"}),
+        ]
+    )
+    update_mock = respx.post(ARTIFACT_URL)
+    artifact = update_artifact_and_wait("token", 42)
+    assert artifact["createdAt"] == "2024-10-18T10:00:00.000Z"
+    assert update_mock.call_count == 1
+    assert [call.args[0] for call in sleep_mock.call_args_list] == [2, 4]  # Backoff
+    assert close_spy.call_count == 1  # The created client is closed
+
+
+@respx.mock
+def test_update_artifact_and_wait_first_artifact(sleep_mock):
+    respx.get(ARTIFACT_URL).mock(
+        side_effect=[
+            httpx.Response(404, json={"message": "Not found"}),
+            httpx.Response(200, json={"createdAt": "2024-10-18T10:00:00.000Z"}),
+        ]
+    )
+    respx.post(ARTIFACT_URL)
+    assert update_artifact_and_wait("token", 42)["createdAt"] == "2024-10-18T10:00:00.000Z"
+    assert sleep_mock.call_count == 0
+
+
+@respx.mock
+def test_wait_for_artifact_timeout(sleep_mock):
+    mock = respx.get(ARTIFACT_URL).respond(json={"createdAt": "2024-10-01T10:00:00.000Z"})
+    with pytest.raises(TimeoutError):
+        with ParatranzClient("token") as client:
+            wait_for_artifact(client, 42, "2024-10-01T10:00:00.000Z", 0)
+    assert mock.call_count == 1
+
+
+def create_artifact(files: dict[str, str]) -> bytes:
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w") as zip_ref:
+        for name, text in files.items():
+            zip_ref.writestr(name, text)
+    return content.getvalue()
+
+
+@respx.mock
+def test_download_artifact(tmp_path: Path, mocker: MockerFixture):
+    close_spy = mocker.spy(ParatranzClient, "close")
+    download_url = "https://download.example.com/artifact.zip"
+    respx.get(f"{ARTIFACT_URL}/download").respond(302, headers={"Location": download_url})
+    download_mock = respx.get(download_url).respond(
+        content=create_artifact(
+            {"raw/file_l_english.yml.json": "[]", "utf8/subdir/file_l_english.yml": "l_french:\n", "other.txt": ""}
+        )
+    )
+    raw_dir = tmp_path / "raw_dest"
+    utf8_dir = tmp_path / "utf8_dest"
+    (raw_dir / "old").mkdir(parents=True)
+    download_artifact("token", 42, str(raw_dir), str(utf8_dir))
+    assert [path.name for path in raw_dir.iterdir()] == ["file_l_english.yml.json"]
+    assert (utf8_dir / "subdir" / "file_l_english.yml").read_text() == "l_french:\n"
+    assert not (tmp_path / "other.txt").exists()
+    assert download_mock.call_count == 1
+    assert "Authorization" not in download_mock.calls[0].request.headers
+    assert close_spy.call_count == 1
+
+
+@respx.mock
+def test_download_artifact_without_utf8(tmp_path: Path):
+    download_url = "https://download.example.com/artifact.zip"
+    respx.get(f"{ARTIFACT_URL}/download").respond(302, headers={"Location": download_url})
+    respx.get(download_url).respond(
+        content=create_artifact({"raw/file_l_english.yml.json": "[]", "utf8/file_l_english.yml": "l_french:\n"})
+    )
+    download_artifact("token", 42, str(tmp_path / "raw"), None)
+    assert [path.name for path in tmp_path.iterdir()] == ["raw"]
+
+
+def test_extract_artifact_rejects_path_traversal(tmp_path: Path):
+    content = create_artifact({"raw/../../evil.txt": ""})
+    with zipfile.ZipFile(io.BytesIO(content)) as zip_ref:
+        with pytest.raises(ValueError):
+            extract_artifact(zip_ref, {"raw": str(tmp_path / "raw")})
@@ -1,8 +1,18 @@
 import os
 import shutil
+import subprocess
+import sys
 import unittest
+from pathlib import Path
 
-from paradox_localization_utils.extract_existing_translation import extract_existing_translation
+import pytest
+
+from paradox_localization_utils.extract_existing_translation import (
+    CSV_READERS,
+    extract_existing_translation,
+    extract_translation_dir,
+    extract_translation_from_CK2_file,
+)
 from tests.utils import get_data_dir
 
 
@@ -32,7 +42,7 @@ class TestExtractExistingTranslation(unittest.TestCase):
             lines = f.readlines()
         self.assertEqual(lines[0].replace("\n", ""), "l_french:")
         self.assertEqual(lines[1].replace("\n", ""), '  KEY0:0 "value0"')
-        self.assertEqual(lines[2].replace("\n", ""), ' KEY1: "valeur1"')
+        self.assertEqual(lines[2].replace("\n", ""), ' KEY1:2 "valeur1"')
 
     def test_extract_existing_hoi4_translations(self):
         extract_existing_translation(
@@ -50,5 +60,186 @@ class TestExtractExistingTranslation(unittest.TestCase):
         ) as f:
             lines = f.readlines()
         self.assertEqual(lines[0].replace("\n", ""), "l_french:")
-        self.assertEqual(lines[1].replace("\n", ""), ' KEY0: "valeur0"')
+        self.assertEqual(lines[1].replace("\n", ""), ' KEY0:0 "valeur0"')
         self.assertEqual(lines[2].replace("\n", ""), '  KEY1:2 "value1"')
+
+
+def test_extract_existing_translation_with_fuzzy_similarity(tmp_path: Path):
+    (tmp_path / "extract").mkdir()
+    for lang, text in [("english", "Declare war!"), ("french", "Déclarer la guerre !")]:
+        (tmp_path / "extract" / f"a_l_{lang}.yml").write_text(f'\ufeffl_{lang}:\n KEY0:0 "{text}"\n', encoding="utf8")
+    (tmp_path / "target").mkdir()
+    (tmp_path / "target" / "b_l_english.yml").write_text(
+        '\ufeffl_english:\n KEY1:0 "Declare war"\n KEY2:0 "Sign peace"\n', encoding="utf8"
+    )
+    (tmp_path / "target" / "b_l_french.yml").write_text(
+        '\ufeffl_french:\n KEY1:0 "Declare war"\n KEY2:0 "Sign peace"\n', encoding="utf8"
+    )
+    extract_existing_translation(
+        str(tmp_path / "extract"),
+        str(tmp_path / "extract"),
+        str(tmp_path / "target"),
+        str(tmp_path / "target"),
+        "english",
+        "french",
+        1,
+        2,
+        fuzzy_similarity=0.9,
+    )
+    lines = (tmp_path / "target" / "b_l_french.yml").read_text(encoding="utf8").split("\n")
+    assert lines[1] == ' KEY1:8 "Déclarer la guerre !"'
+    assert lines[2] == ' KEY2:0 "Sign peace"'
+
+
+def test_extract_existing_translation_resets_version_of_earlier_fuzzy_match(tmp_path: Path):
+    (tmp_path / "extract").mkdir()
+    for lang, text in [("english", "Declare war"), ("french", "Déclarer la guerre")]:
+        (tmp_path / "extract" / f"a_l_{lang}.yml").write_text(f'\ufeffl_{lang}:\n KEY0:0 "{text}"\n', encoding="utf8")
+    (tmp_path / "target").mkdir()
+    (tmp_path / "target" / "b_l_english.yml").write_text(
+        '\ufeffl_english:\n KEY1:2 "Declare war"\n KEY2:0 "Sign peace"\n', encoding="utf8"
+    )
+    (tmp_path / "target" / "b_l_french.yml").write_text(
+        '\ufeffl_french:\n KEY1:8 "Déclarer la guerre !"\n KEY2:8 "Signer la paix !"\n', encoding="utf8"
+    )
+    extract_existing_translation(
+        str(tmp_path / "extract"),
+        str(tmp_path / "extract"),
+        str(tmp_path / "target"),
+        str(tmp_path / "target"),
+        "english",
+        "french",
+        1,
+        2,
+    )
+    lines = (tmp_path / "target" / "b_l_french.yml").read_text(encoding="utf8").split("\n")
+    assert lines[1] == ' KEY1:2 "Déclarer la guerre"'
+    assert lines[2] == ' KEY2:8 "Signer la paix !"'
+
+
+def test_extract_existing_translation_resets_version_of_earlier_fuzzy_match_with_same_text(tmp_path: Path, capsys):
+    (tmp_path / "extract").mkdir()
+    for lang, text in [("english", "Hello world"), ("french", "Bonjour monde")]:
+        (tmp_path / "extract" / f"a_l_{lang}.yml").write_text(f'\ufeffl_{lang}:\n KEY0:0 "{text}"\n', encoding="utf8")
+    (tmp_path / "target").mkdir()
+    (tmp_path / "target" / "b_l_english.yml").write_text('\ufeffl_english:\n KEY1:3 "Hello world"\n', encoding="utf8")
+    (tmp_path / "target" / "b_l_french.yml").write_text('\ufeffl_french:\n KEY1:8 "Bonjour monde"\n', encoding="utf8")
+    extract_existing_translation(
+        str(tmp_path / "extract"),
+        str(tmp_path / "extract"),
+        str(tmp_path / "target"),
+        str(tmp_path / "target"),
+        "english",
+        "french",
+        1,
+        2,
+    )
+    lines = (tmp_path / "target" / "b_l_french.yml").read_text(encoding="utf8").split("\n")
+    assert lines[1] == ' KEY1:3 "Bonjour monde"'
+    assert "1 texts inserted in 1 files" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("csv_reader", CSV_READERS)
+def test_extract_translation_from_CK2_file(tmp_path: Path, csv_reader: str):
+    ck2_file = tmp_path / "ck2.csv"
+    ck2_file.write_text(
+        "#Misc Stuff;;;;x\nKEY0;value0;valeur0;;x\nKEY1;value1;;;x\nKEY2;Né;Né;;x\nKEY3;value3\n",
+        encoding="ISO-8859-1",
+    )
+    extracted_translation = dict()
+    extract_translation_from_CK2_file(ck2_file, extracted_translation, 1, 2, csv_reader)
+    assert extracted_translation == {"value0": "valeur0", "Né": "Né"}
+
+
+@pytest.mark.parametrize("csv_reader", CSV_READERS)
+def test_extract_translation_from_CK2_file_with_irregular_rows(tmp_path: Path, csv_reader: str):
+    ck2_file = tmp_path / "ck2.csv"
+    ck2_file.write_text(
+        'KEY0;value0;valeur0;x\nKEY1;value1;valeur1;;;;;x\nKEY2;"value;2";"valeur;2";x\nKEY3\n', encoding="ISO-8859-1"
+    )
+    extracted_translation = dict()
+    extract_translation_from_CK2_file(ck2_file, extracted_translation, 1, 2, csv_reader)
+    assert extracted_translation == {"value0": "valeur0", "value1": "valeur1", "value;2": "valeur;2"}
+
+
+def test_extract_existing_translation_reports_missing_keys(tmp_path: Path, capsys):
+    (tmp_path / "extract").mkdir()
+    for lang, text in [("english", "value"), ("french", "valeur")]:
+        (tmp_path / "extract" / f"a_l_{lang}.yml").write_text(f'\ufeffl_{lang}:\n KEY0:0 "{text}"\n', encoding="utf8")
+    (tmp_path / "target").mkdir()
+    (tmp_path / "target" / "b_l_english.yml").write_text('\ufeffl_english:\n KEY1:3 "value"\n', encoding="utf8")
+    (tmp_path / "target" / "b_l_french.yml").write_text(
+        '\ufeffl_french:\n KEY1:3 "value"\n KEY2:0 "old"\n', encoding="utf8"
+    )
+    (tmp_path / "target" / "c_l_french.yml").write_text('\ufeffl_french:\n KEY3:0 "other"\n', encoding="utf8")
+    modification_time = os.path.getmtime(tmp_path / "target" / "c_l_french.yml")
+    extract_existing_translation(
+        str(tmp_path / "extract"),
+        str(tmp_path / "extract"),
+        str(tmp_path / "target"),
+        str(tmp_path / "target"),
+        "english",
+        "french",
+        1,
+        2,
+    )
+    lines = (tmp_path / "target" / "b_l_french.yml").read_text(encoding="utf8").split("\n")
+    assert lines[1] == ' KEY1:3 "valeur"'
+    assert lines[2] == ' KEY2:0 "old"'
+    assert os.path.getmtime(tmp_path / "target" / "c_l_french.yml") == modification_time
+    output = capsys.readouterr().out
+    assert "1 texts inserted in 1 files" in output
+    assert f"{(tmp_path / 'target' / 'b_l_french.yml').resolve()}: KEY2" in output
+    assert f"{(tmp_path / 'target' / 'c_l_french.yml').resolve()}: KEY3" in output
+
+
+def test_extract_existing_translation_reports_missing_duplicated_key_in_each_file(tmp_path: Path, capsys):
+    (tmp_path / "extract").mkdir()
+    for lang in ["english", "french"]:
+        (tmp_path / "extract" / f"a_l_{lang}.yml").write_text(f"\ufeffl_{lang}:\n", encoding="utf8")
+    (tmp_path / "target").mkdir()
+    (tmp_path / "target" / "b_l_english.yml").write_text("\ufeffl_english:\n", encoding="utf8")
+    for file_name in ["b_l_french.yml", "c_l_french.yml"]:
+        (tmp_path / "target" / file_name).write_text('\ufeffl_french:\n KEY1:0 "old"\n', encoding="utf8")
+    extract_existing_translation(
+        str(tmp_path / "extract"),
+        str(tmp_path / "extract"),
+        str(tmp_path / "target"),
+        str(tmp_path / "target"),
+        "english",
+        "french",
+        1,
+        2,
+    )
+    output = capsys.readouterr().out
+    assert f"{(tmp_path / 'target' / 'b_l_french.yml').resolve()}: KEY1\n" in output
+    assert f"{(tmp_path / 'target' / 'c_l_french.yml').resolve()}: KEY1\n" in output
+
+
+def test_extract_translation_dir_in_parallel(tmp_path: Path):
+    (tmp_path / "source").mkdir()
+    (tmp_path / "dest").mkdir()
+    for i in range(4):
+        for lang, text in [("english", "value"), ("french", "valeur")]:
+            directory = "source" if lang == "english" else "dest"
+            (tmp_path / directory / f"file{i}_l_{lang}.yml").write_text(
+                f'\ufeffl_{lang}:\n KEY{i}:0 "{text}{i}"\n KEY:0 "same"\n', encoding="utf8"
+            )
+    (tmp_path / "source" / "ck2.csv").write_text("KEY;value9;valeur9;x\n", encoding="ISO-8859-1")
+    args = (str(tmp_path / "source"), str(tmp_path / "dest"), "english", "french", 1, 2)
+    extracted_translation = extract_translation_dir(*args)
+    assert extracted_translation == {
+        **{f"value{i}": f"valeur{i}" for i in range(4)},
+        "same": "same",
+        "value9": "valeur9",
+    }
+    assert extract_translation_dir(*args, jobs=2) == extracted_translation
+
+
+def test_pandas_and_numpy_are_not_imported_by_default():
+    code = (
+        "import sys\n"
+        + "from paradox_localization_utils.extract_existing_translation import extract_translation_dir\n"
+        + "assert 'pandas' not in sys.modules and 'numpy' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parent.parent)
@@ -1,11 +1,17 @@
 import os
 import shutil
+import tempfile
 import unittest
+import unittest.mock
+import zipfile
 
 from paradox_localization_utils.extract_paratranz_translation import (
     extract_paratranz_localisation,
     extract_paratranz_localisation_dir,
+    extract_paratranz_localisation_zip,
 )
+from paradox_localization_utils.lib.paratranz_json import read_paratranz_translations
+from paradox_localization_utils.lib.sync_state import SyncState
 from tests.utils import get_data_dir
 
 
@@ -131,3 +137,144 @@ class TestExtractParatranzTranslation(unittest.TestCase):
         self.assertEqual(lines[1].replace("\n", ""), ' KEY0:0 "valeur0"')
         self.assertEqual(lines[2].replace("\n", ""), '  KEY1:0 "value1"')
         self.assertEqual(lines[3].replace("\n", ""), ' KEY2:0 "valeur2"')
+
+    def __extract_from_artifact(self, jobs: int):
+        os.makedirs(os.path.join(self.localisation_dir, "subdir"), exist_ok=True)
+        shutil.copyfile(
+            os.path.join(self.data_dir, "original", "text_l_french.yml"),
+            os.path.join(self.localisation_dir, "new_l_text5_l_french.yml"),
+        )
+        shutil.copyfile(
+            os.path.join(self.data_dir, "original", "text_l_french.yml"),
+            os.path.join(self.localisation_dir, "subdir", "new_text_l_french.yml"),
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            zip_path = os.path.join(tmp_dir, "artifact.zip")
+            with zipfile.ZipFile(zip_path, "w") as zip_ref:
+                zip_ref.write(
+                    os.path.join(self.data_dir, "paratranz_dir2", "new_l_text5_l_french.yml.json"),
+                    "raw/new_l_text5_l_english.yml.json",
+                )
+                zip_ref.write(
+                    os.path.join(self.data_dir, "new_text_l_french.yml.json"), "raw/subdir/new_text_l_english.yml.json"
+                )
+                zip_ref.writestr("utf8/subdir/new_text_l_english.yml", "l_french:\n")
+            extract_paratranz_localisation_zip(zip_path, "french", self.localisation_dir, False, jobs=jobs)
+        for file_path in [
+            os.path.join(self.localisation_dir, "new_l_text5_l_french.yml"),
+            os.path.join(self.localisation_dir, "subdir", "new_text_l_french.yml"),
+        ]:
+            with open(file_path, "r", encoding="utf8") as f:
+                lines = f.readlines()
+            self.assertEqual(lines[0].replace("\n", ""), "l_french:")
+            self.assertEqual(lines[1].replace("\n", ""), ' KEY0:0 "valeur0"')
+            self.assertEqual(lines[2].replace("\n", ""), '  KEY1:0 "value1"')
+            self.assertEqual(lines[3].replace("\n", ""), ' KEY2:0 "valeur2"')
+
+    def test_extract_paratranz_translation_from_artifact(self):
+        self.__extract_from_artifact(1)
+
+    def test_extract_paratranz_translation_from_artifact_in_parallel(self):
+        self.__extract_from_artifact(2)
+
+    def test_extract_paratranz_translation_with_sync_state(self):
+        localisation_file_path = os.path.join(self.localisation_dir, "new_l_text5_l_french.yml")
+        shutil.copyfile(os.path.join(self.data_dir, "original", "text_l_french.yml"), localisation_file_path)
+        paratranz_dir = os.path.abspath(os.path.join(self.data_dir, "paratranz_dir2"))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_path = os.path.join(tmp_dir, "sync_state.json")
+            sync_state = SyncState(state_path, False)
+            extract_paratranz_localisation_dir(
+                paratranz_dir, "french", self.localisation_dir, False, sync_state=sync_state
+            )
+            sync_state.save()
+            self.assertEqual(sync_state.extracted_files_nb, 1)
+
+            # Unchanged files are skipped
+            sync_state = SyncState(state_path, False)
+            with unittest.mock.patch(
+                "paradox_localization_utils.extract_paratranz_translation.edit_file_with_dict"
+            ) as edit_mock:
+                extract_paratranz_localisation_dir(
+                    paratranz_dir, "french", self.localisation_dir, False, sync_state=sync_state
+                )
+            self.assertEqual(edit_mock.call_count, 0)
+            self.assertEqual((sync_state.extracted_files_nb, sync_state.skipped_files_nb), (0, 1))
+
+            # An edited localisation file is extracted again
+            with open(localisation_file_path, "a", encoding="utf8") as f:
+                f.write(' KEY3:0 "value3"\n')
+            sync_state = SyncState(state_path, False)
+            extract_paratranz_localisation_dir(
+                paratranz_dir, "french", self.localisation_dir, False, sync_state=sync_state
+            )
+            self.assertEqual((sync_state.extracted_files_nb, sync_state.skipped_files_nb), (1, 0))
+
+            # The state of another extract_not_review value is ignored
+            sync_state = SyncState(state_path, True)
+            self.assertEqual(sync_state.files, dict())
+
+    def test_extract_paratranz_translation_from_artifact_with_sync_state(self):
+        localisation_file_path = os.path.join(self.localisation_dir, "new_text_l_french.yml")
+        shutil.copyfile(os.path.join(self.data_dir, "original", "text_l_french.yml"), localisation_file_path)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            zip_path = os.path.join(tmp_dir, "artifact.zip")
+            state_path = os.path.join(tmp_dir, "sync_state.json")
+            for paratranz_file, expected_counts in [
+                ("new_text_l_french.yml.json", (1, 0)),
+                ("new_text_l_french.yml.json", (0, 1)),
+                ("new_text3_l_french.yml.json", (1, 0)),  # Changed on Paratranz
+            ]:
+                with zipfile.ZipFile(zip_path, "w") as zip_ref:
+                    zip_ref.write(os.path.join(self.data_dir, paratranz_file), "raw/new_text_l_english.yml.json")
+                sync_state = SyncState(state_path, True)
+                extract_paratranz_localisation_zip(
+                    zip_path, "french", self.localisation_dir, True, sync_state=sync_state
+                )
+                sync_state.save()
+                self.assertEqual((sync_state.extracted_files_nb, sync_state.skipped_files_nb), expected_counts)
+
+    def test_extract_paratranz_translation_in_several_dirs(self):
+        other_localisation_dir = os.path.join(self.localisation_dir, "other")
+        os.makedirs(other_localisation_dir)
+        for directory in [self.localisation_dir, other_localisation_dir]:
+            shutil.copyfile(
+                os.path.join(self.data_dir, "original", "text_l_french.yml"),
+                os.path.join(directory, "new_l_text5_l_french.yml"),
+            )
+        with unittest.mock.patch(
+            "paradox_localization_utils.extract_paratranz_translation.read_paratranz_translations",
+            wraps=read_paratranz_translations,
+        ) as read_mock:
+            extract_paratranz_localisation_dir(
+                os.path.abspath(os.path.join(self.data_dir, "paratranz_dir2")),
+                "french",
+                [self.localisation_dir, other_localisation_dir],
+                False,
+            )
+        self.assertEqual(read_mock.call_count, 1)  # Parsed once for both directories
+        for directory in [self.localisation_dir, other_localisation_dir]:
+            with open(os.path.join(directory, "new_l_text5_l_french.yml"), "r", encoding="utf8") as f:
+                lines = f.readlines()
+            self.assertEqual(lines[1].replace("\n", ""), ' KEY0:0 "valeur0"')
+            self.assertEqual(lines[3].replace("\n", ""), ' KEY2:0 "valeur2"')
+
+    def test_extract_paratranz_translation_dir_in_parallel(self):
+        with tempfile.TemporaryDirectory() as paratranz_dir:
+            for i in range(4):
+                os.makedirs(os.path.join(paratranz_dir, f"dir{i}"))
+                os.makedirs(os.path.join(self.localisation_dir, f"dir{i}"), exist_ok=True)
+                shutil.copyfile(
+                    os.path.join(self.data_dir, "new_text_l_french.yml.json"),
+                    os.path.join(paratranz_dir, f"dir{i}", "text_l_english.yml.json"),
+                )
+                shutil.copyfile(
+                    os.path.join(self.data_dir, "original", "text_l_french.yml"),
+                    os.path.join(self.localisation_dir, f"dir{i}", "text_l_french.yml"),
+                )
+            extract_paratranz_localisation_dir(paratranz_dir, "french", self.localisation_dir, False, jobs=2)
+        for i in range(4):
+            with open(os.path.join(self.localisation_dir, f"dir{i}", "text_l_french.yml"), "r", encoding="utf8") as f:
+                lines = f.readlines()
+            self.assertEqual(lines[1].replace("\n", ""), ' KEY0:0 "valeur0"')
+            self.assertEqual(lines[3].replace("\n", ""), ' KEY2:0 "valeur2"')
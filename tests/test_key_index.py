@@ -0,0 +1,34 @@
+from paradox_localization_utils.lib.key_index import KeyIndex
+
+
+def test_add_file():
+    index = KeyIndex()
+    index.add_file("a_l_english.yml", {"KEY0": "value0", "KEY1": "value1"})
+    index.add_file("b_l_english.yml", {"KEY2": "value2"})
+    assert index == {"KEY0": "value0", "KEY1": "value1", "KEY2": "value2"}
+    assert index.file_by_key == {"KEY0": "a_l_english.yml", "KEY1": "a_l_english.yml", "KEY2": "b_l_english.yml"}
+    assert index.duplicates == dict()
+
+
+def test_add_file_with_duplicates(capsys):
+    index = KeyIndex()
+    index.add_file("a_l_english.yml", {"KEY0": "value0", "KEY1": "value1"})
+    index.add_file("b_l_english.yml", {"KEY1": "new_value1"})
+    index.add_file("c_l_english.yml", {"KEY1": "last_value1"})
+    assert index == {"KEY0": "value0", "KEY1": "last_value1"}
+    assert index.file_by_key["KEY1"] == "c_l_english.yml"
+    assert index.duplicates == {"KEY1": ["a_l_english.yml", "b_l_english.yml", "c_l_english.yml"]}
+    index.print_duplicates("loc")
+    captured = capsys.readouterr()
+    assert captured.out == "WARNING: KEY1 is duplicated in loc: a_l_english.yml, b_l_english.yml, c_l_english.yml\n"
+
+
+def test_add_file_with_repeated_keys(capsys):
+    index = KeyIndex()
+    index.add_file("a_l_english.yml", {"KEY0": "value0", "KEY1": "value1"}, ["KEY1"])
+    index.add_file("b_l_english.yml", {"KEY0": "new_value0"}, ["KEY0"])
+    assert index == {"KEY0": "new_value0", "KEY1": "value1"}
+    assert index.duplicates == {
+        "KEY0": ["a_l_english.yml", "b_l_english.yml", "b_l_english.yml"],
+        "KEY1": ["a_l_english.yml", "a_l_english.yml"],
+    }
@@ -0,0 +1,45 @@
+from pathlib import Path
+import pytest
+
+from paradox_localization_utils.lib.parallel_parsing import list_localization_files, load_localization_dir
+
+
+@pytest.fixture
+def localization_dir(tmp_path: Path):
+    for i, sub_dir in enumerate(["b", "a", "c"]):
+        (tmp_path / sub_dir).mkdir()
+        with open(tmp_path / sub_dir / "text_l_english.yml", "w", encoding="utf8") as f:
+            f.write(f'\ufeffl_english:\n KEY{i}:0 "value{i}"\n DUPLICATED:1 "{sub_dir}"\n')
+        with open(tmp_path / sub_dir / "text_l_french.yml", "w", encoding="utf8") as f:
+            f.write(f'\ufeffl_french:\n KEY{i}:0 "valeur{i}"\n')
+    yield tmp_path
+
+
+def test_list_localization_files(localization_dir: Path):
+    assert list_localization_files(localization_dir, "l_english.yml") == [
+        str(localization_dir / sub_dir / "text_l_english.yml") for sub_dir in ["a", "b", "c"]
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_load_localization_dir(localization_dir: Path, jobs: int):
+    index = load_localization_dir(localization_dir, "l_english.yml", jobs)
+    assert index == {
+        "KEY0": {"value": "value0", "version": 0},
+        "KEY1": {"value": "value1", "version": 0},
+        "KEY2": {"value": "value2", "version": 0},
+        "DUPLICATED": {"value": "c", "version": 1},
+    }
+    assert index.duplicates == {
+        "DUPLICATED": [str(localization_dir / sub_dir / "text_l_english.yml") for sub_dir in ["a", "b", "c"]]
+    }
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_load_localization_dir_with_key_repeated_in_a_file(localization_dir: Path, jobs: int):
+    file_path = localization_dir / "a" / "text_l_french.yml"
+    with open(file_path, "a", encoding="utf8") as f:
+        f.write(' KEY1:0 "autre valeur1"\n')
+    index = load_localization_dir(localization_dir, "l_french.yml", jobs)
+    assert index["KEY1"] == {"value": "autre valeur1", "version": 0}
+    assert index.duplicates == {"KEY1": [str(file_path), str(file_path)]}
@@ -0,0 +1,126 @@
+from pathlib import Path
+from typing import AsyncIterator
+
+import httpx
+import pytest
+import respx
+
+from paradox_localization_utils.lib.paratranz_client import PARATRANZ_API_URL, ParatranzClient
+
+
+class InterruptedStream(httpx.AsyncByteStream):
+    """
+    Response content whose connection is closed before the end
+    """
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self.content
+        raise httpx.RemoteProtocolError("peer closed connection without sending complete message body")
+
+
+@respx.mock
+def test_token_is_sent_once_set():
+    mock = respx.get(f"{PARATRANZ_API_URL}/projects/42/files").respond(json=[{"id": 1, "name": "file_l_english.yml"}])
+    with ParatranzClient("token") as client:
+        assert client.get_project_files(42) == {"file_l_english.yml": 1}
+        client.get_project_files(42)
+    assert mock.call_count == 2
+    for call in mock.calls:
+        assert call.request.headers["Authorization"] == "token"
+
+
+def test_pool_size():
+    with ParatranzClient("token", 16) as client:
+        assert client.async_client.client._transport._pool._max_connections == 16
+
+
+@respx.mock
+def test_post_file(tmp_path: Path):
+    file_path = tmp_path / "file_l_english.yml"
+    file_path.write_text("l_english:\n", encoding="utf8")
+    create_mock = respx.post(f"{PARATRANZ_API_URL}/projects/42/files")
+    update_mock = respx.post(f"{PARATRANZ_API_URL}/projects/42/files/24")
+    with ParatranzClient("token") as client:
+        client.post_file(42, file_path, "subdir")
+        client.post_file(42, file_path, "subdir", 24)
+    assert create_mock.call_count == 1 and update_mock.call_count == 1
+    assert "subdir" in create_mock.calls[0].request.content.decode()
+    assert file_path.name in update_mock.calls[0].request.content.decode()
+    assert "l_english:" in update_mock.calls[0].request.content.decode()
+
+
+@respx.mock
+def test_post_file_streams_the_file_again_at_each_retry(tmp_path: Path, mocker):
+    mocker.patch("paradox_localization_utils.lib.rate_limit.sleep")
+    file_path = tmp_path / "file_l_english.yml"
+    file_path.write_text("l_english:\n", encoding="utf8")
+    mock = respx.post(f"{PARATRANZ_API_URL}/projects/42/files").mock(
+        side_effect=[httpx.Response(429), httpx.Response(200)]
+    )
+    with ParatranzClient("token") as client:
+        client.post_file(42, file_path, "subdir")
+    assert mock.call_count == 2
+    for call in mock.calls:
+        assert "l_english:" in call.request.content.decode()
+
+
+@respx.mock
+def test_error_status_raises():
+    respx.delete(f"{PARATRANZ_API_URL}/projects/42/files/24").respond(500, json={"message": "Server error"})
+    with pytest.raises(httpx.HTTPStatusError):
+        with ParatranzClient("token", max_retries=0) as client:
+            client.delete_file(42, 24)
+
+
+@respx.mock
+def test_download_to_file_resumes_interrupted_download(tmp_path: Path):
+    url = "https://download.example.com/artifact.zip"
+    content = bytes(range(256)) * 100
+
+    def interrupted_then_partial(request: httpx.Request) -> httpx.Response:
+        if "Range" not in request.headers:
+            return httpx.Response(
+                200, headers={"Content-Length": str(len(content))}, stream=InterruptedStream(content[:1000])
+            )
+        start = int(request.headers["Range"].removeprefix("bytes=").removesuffix("-"))
+        return httpx.Response(
+            206, headers={"Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}"}, content=content[start:]
+        )
+
+    mock = respx.get(url).mock(side_effect=interrupted_then_partial)
+    file_path = tmp_path / "artifact.zip"
+    with ParatranzClient("token") as client:
+        assert client.download_to_file(url, file_path, chunk_size=100) == len(content)
+    assert file_path.read_bytes() == content
+    assert mock.call_count == 2
+    assert mock.calls[1].request.headers["Range"] == "bytes=1000-"
+    assert "Authorization" not in mock.calls[0].request.headers
+
+
+@respx.mock
+def test_download_to_file_restarts_without_range_support(tmp_path: Path):
+    url = "https://download.example.com/artifact.zip"
+    content = b"zip" * 1000
+    respx.get(url).mock(
+        side_effect=[
+            httpx.Response(
+                200, headers={"Content-Length": str(len(content))}, stream=InterruptedStream(content[:100])
+            ),
+            httpx.Response(200, content=content),
+        ]
+    )
+    file_path = tmp_path / "artifact.zip"
+    with ParatranzClient("token") as client:
+        client.download_to_file(url, file_path, chunk_size=10)
+    assert file_path.read_bytes() == content
+
+
+@respx.mock
+def test_download_does_not_send_token():
+    mock = respx.get("https://download.example.com/artifact.zip").respond(content=b"zip")
+    with ParatranzClient("token") as client:
+        assert client.download("https://download.example.com/artifact.zip").content == b"zip"
+    assert "Authorization" not in mock.calls[0].request.headers
@@ -0,0 +1,50 @@
+import io
+import json
+
+import pytest
+
+from paradox_localization_utils.lib.paratranz_json import iter_paratranz_entries, read_paratranz_translations
+
+
+def generate_entries(nb_entries: int) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "key": f"KEY{i}:0",
+            "original": f'value {i} \\" é ]',
+            "translation": f"valeur {i} [Root.GetName]" if i % 3 != 0 else "",
+            "stage": 5 if i % 2 == 0 else 1,
+            "history": [{"text": "x" * (i % 50), "nested": {"list": [1, 2.5, None, True]}}],
+        }
+        for i in range(nb_entries)
+    ]
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+def test_iter_paratranz_entries(indent: int | None, chunk_size: int):
+    entries = generate_entries(100)
+    content = json.dumps(entries, indent=indent, ensure_ascii=False)
+    assert list(iter_paratranz_entries(io.StringIO(content), chunk_size)) == entries
+
+
+@pytest.mark.parametrize("content", ["[]", " [ ] ", "\n[\n]\n"])
+def test_iter_paratranz_entries_empty(content: str):
+    assert list(iter_paratranz_entries(io.StringIO(content), 1)) == []
+
+
+@pytest.mark.parametrize("content", ["", "{}", '[{"key": "KEY"}', '[{"key": "KEY"} {"key": "KEY2"}]', "[{},]"])
+def test_iter_paratranz_entries_invalid(content: str):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_paratranz_entries(io.StringIO(content), 4))
+
+
+@pytest.mark.parametrize("extract_not_review", [False, True])
+def test_read_paratranz_translations(extract_not_review: bool):
+    entries = generate_entries(100)
+    expected = {
+        entry["key"].split(":")[0]: entry["translation"]
+        for entry in entries
+        if len(entry["translation"]) > 0 and (extract_not_review or entry["stage"] == 5)
+    }
+    assert read_paratranz_translations(io.StringIO(json.dumps(entries)), extract_not_review) == expected
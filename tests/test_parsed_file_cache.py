@@ -0,0 +1,112 @@
+from pathlib import Path
+import pytest
+
+from paradox_localization_utils.lib.parsed_file_cache import (
+    ParsedFileCache,
+    disable_parsed_file_cache,
+    enable_parsed_file_cache,
+    get_parsed_file_cache,
+)
+from paradox_localization_utils.lib.read_localization_file import (
+    file_to_keys_and_values,
+    file_to_keys_values_and_lines,
+)
+
+
+class CountingParser:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, file_path):
+        self.calls += 1
+        with open(file_path, "r", encoding="utf8") as f:
+            return f.read()
+
+
+@pytest.fixture
+def loc_file(tmp_path: Path):
+    file_path = tmp_path / "text_l_english.yml"
+    with open(file_path, "w", encoding="utf8") as f:
+        f.write('\ufeffl_english:\n KEY:0 "value"\n')
+    yield file_path
+
+
+def test_get_or_parse_unchanged_file(tmp_path: Path, loc_file: Path):
+    cache = ParsedFileCache(tmp_path / "cache", 1024 * 1024)
+    parser = CountingParser()
+    assert cache.get_or_parse(loc_file, parser) == '\ufeffl_english:\n KEY:0 "value"\n'
+    assert cache.get_or_parse(loc_file, parser) == '\ufeffl_english:\n KEY:0 "value"\n'
+    assert parser.calls == 1
+
+
+def test_get_or_parse_edited_file(tmp_path: Path, loc_file: Path):
+    cache = ParsedFileCache(tmp_path / "cache", 1024 * 1024)
+    parser = CountingParser()
+    cache.get_or_parse(loc_file, parser)
+    with open(loc_file, "w", encoding="utf8") as f:
+        f.write('\ufeffl_english:\n KEY:0 "value2"\n')
+    assert cache.get_or_parse(loc_file, parser) == '\ufeffl_english:\n KEY:0 "value2"\n'
+    assert parser.calls == 2
+
+
+def test_get_or_parse_same_size_edited_file(tmp_path: Path, loc_file: Path):
+    cache = ParsedFileCache(tmp_path / "cache", 1024 * 1024)
+    parser = CountingParser()
+    cache.get_or_parse(loc_file, parser)
+    with open(loc_file, "w", encoding="utf8") as f:
+        f.write('\ufeffl_english:\n KEY:0 "valu3"\n')
+    assert cache.get_or_parse(loc_file, parser) == '\ufeffl_english:\n KEY:0 "valu3"\n'
+    assert parser.calls == 2
+
+
+def test_evict_least_recently_used(tmp_path: Path):
+    cache = ParsedFileCache(tmp_path / "cache", 2500)
+    parser = CountingParser()
+    file_paths = [tmp_path / f"text{i}_l_english.yml" for i in range(3)]
+    for file_path in file_paths:
+        with open(file_path, "w", encoding="utf8") as f:
+            f.write("a" * 1000)
+    cache.get_or_parse(file_paths[0], parser)
+    cache.get_or_parse(file_paths[1], parser)
+    cache.get_or_parse(file_paths[0], parser)
+    cache.get_or_parse(file_paths[2], parser)
+    assert parser.calls == 3
+    cached_paths = {row[0] for row in cache.connection.execute("SELECT path FROM parsed_files")}
+    assert cached_paths == {str(file_paths[0]), str(file_paths[2])}
+
+
+def test_file_to_keys_and_values_with_cache(tmp_path: Path, loc_file: Path):
+    enable_parsed_file_cache(tmp_path / "cache")
+    try:
+        expected = ({"KEY": {"value": "value", "version": 0}}, "\ufeffl_english:\n")
+        assert file_to_keys_and_values(loc_file) == expected
+        assert file_to_keys_and_values(loc_file) == expected
+        assert get_parsed_file_cache().connection.execute("SELECT COUNT(*) FROM parsed_files").fetchone()[0] == 1
+    finally:
+        disable_parsed_file_cache()
+    assert get_parsed_file_cache() is None
+
+
+def test_file_to_keys_values_and_lines_with_cache(tmp_path: Path, loc_file: Path):
+    enable_parsed_file_cache(tmp_path / "cache")
+    try:
+        file_to_keys_and_values(loc_file)
+        expected = ({"KEY": {"value": "value", "version": 0}}, {"KEY": ' KEY:0 "value"\n'}, "\ufeffl_english:\n")
+        assert file_to_keys_values_and_lines(loc_file) == expected
+        assert file_to_keys_values_and_lines(loc_file) == expected
+        assert get_parsed_file_cache().connection.execute("SELECT COUNT(*) FROM parsed_files").fetchone()[0] == 2
+    finally:
+        disable_parsed_file_cache()
+
+
+def test_warnings_printed_with_cache(tmp_path: Path, capsys):
+    file_path = tmp_path / "text_l_english.yml"
+    with open(file_path, "w", encoding="utf8") as f:
+        f.write('\ufeffl_english:\n KEY:0 "value"\n KEY2:0 value\n')
+    enable_parsed_file_cache(tmp_path / "cache")
+    try:
+        for _ in range(2):
+            assert file_to_keys_and_values(file_path)[0] == {"KEY": {"value": "value", "version": 0}}
+            assert f"Missing double quote in file {file_path} line 2" in capsys.readouterr().out
+    finally:
+        disable_parsed_file_cache()
@@ -0,0 +1,167 @@
+import asyncio
+from email.utils import formatdate
+import time
+
+import httpx
+import pytest
+from pytest_mock import MockerFixture
+import respx
+
+from paradox_localization_utils.lib.rate_limit import (
+    AdaptiveConcurrencyLimiter,
+    RetryingSender,
+    TokenBucket,
+    compute_retry_delay,
+    parse_retry_after,
+)
+
+URL = "https://paratranz.cn/api/projects/42/files"
+
+
+@pytest.fixture
+def sleep_mock(mocker: MockerFixture):
+    yield mocker.patch("paradox_localization_utils.lib.rate_limit.sleep")
+
+
+def send(sender: RetryingSender, method: str = "GET") -> httpx.Response:
+    async def send_with_client():
+        async with httpx.AsyncClient() as client:
+            return await sender.send(lambda: client.request(method, URL), "send the request", method == "GET")
+
+    return asyncio.run(send_with_client())
+
+
+def test_token_bucket_limits_the_rate():
+    async def acquire_tokens():
+        bucket = TokenBucket(100, 1)
+        for _ in range(11):
+            await bucket.acquire()
+
+    start = time.monotonic()
+    asyncio.run(acquire_tokens())
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_token_bucket_rejects_non_positive_rate(rate: float):
+    with pytest.raises(ValueError):
+        TokenBucket(rate)
+
+
+def test_concurrency_limit_is_halved_then_recovers():
+    async def check_limit():
+        limiter = AdaptiveConcurrencyLimiter(8)
+        await limiter.acquire()
+        await limiter.release(overloaded=True)
+        assert limiter.limit == 4
+        await limiter.acquire()
+        await limiter.release(overloaded=True)
+        assert limiter.limit == 2
+        for _ in range(100):
+            await limiter.acquire()
+            await limiter.release(overloaded=False)
+        assert limiter.limit == 8
+
+    asyncio.run(check_limit())
+
+
+def test_concurrency_limit_bounds_requests_in_flight():
+    in_flight = [0, 0]  # current, maximum
+
+    async def call(limiter: AdaptiveConcurrencyLimiter):
+        await limiter.acquire()
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        await limiter.release(overloaded=False)
+
+    async def run_calls():
+        limiter = AdaptiveConcurrencyLimiter(3)
+        await asyncio.gather(*(call(limiter) for _ in range(20)))
+
+    asyncio.run(run_calls())
+    assert in_flight[1] == 3
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("invalid") is None
+    assert 5 < parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+
+
+def test_compute_retry_delay():
+    assert compute_retry_delay(0, 2, 60, 5) == 5
+    assert compute_retry_delay(0, 2, 60, 120) == 60
+    for attempt in range(10):
+        assert 0 <= compute_retry_delay(attempt, 2, 60, None) <= min(60, 2 * 2**attempt)
+
+
+@respx.mock
+def test_sender_retries_until_success(sleep_mock):
+    mock = respx.get(URL).mock(
+        side_effect=[
+            httpx.Response(429, headers={"Retry-After": "7"}),
+            httpx.Response(503),
+            httpx.Response(200, json=[]),
+        ]
+    )
+    sender = RetryingSender(4)
+    r = send(sender)
+    assert r.status_code == 200 and mock.call_count == 3
+    assert sleep_mock.call_args_list[0].args == (7,)  # Retry-After of the 429 response
+    assert sender.concurrency_limiter.limit == 1 + 1 / 1  # Halved twice, then one success
+
+
+@respx.mock
+def test_sender_returns_the_last_error(sleep_mock):
+    mock = respx.get(URL).respond(500)
+    r = send(RetryingSender(1, max_retries=2))
+    assert r.status_code == 500 and mock.call_count == 3
+
+
+@respx.mock
+def test_sender_does_not_retry_client_errors(sleep_mock):
+    mock = respx.get(URL).respond(404)
+    assert send(RetryingSender(1)).status_code == 404
+    assert mock.call_count == 1 and sleep_mock.call_count == 0
+
+
+@respx.mock
+def test_sender_raises_connection_error_after_retries(sleep_mock):
+    mock = respx.get(URL).mock(side_effect=httpx.ConnectError)
+    with pytest.raises(httpx.ConnectError):
+        send(RetryingSender(1, max_retries=1))
+    assert mock.call_count == 2
+
+
+@respx.mock
+def test_sender_does_not_retry_non_idempotent_requests_on_server_errors(sleep_mock):
+    mock = respx.post(URL).respond(500)
+    sender = RetryingSender(4)
+    assert send(sender, "POST").status_code == 500
+    assert mock.call_count == 1 and sleep_mock.call_count == 0
+    assert sender.concurrency_limiter.limit == 2  # Paratranz is still considered as overloaded
+
+
+@respx.mock
+def test_sender_retries_non_idempotent_requests_when_rate_limited(sleep_mock):
+    mock = respx.post(URL).mock(side_effect=[httpx.Response(429), httpx.Response(200)])
+    assert send(RetryingSender(1), "POST").status_code == 200
+    assert mock.call_count == 2
+
+
+@respx.mock
+def test_sender_retries_non_idempotent_requests_not_sent(sleep_mock):
+    mock = respx.post(URL).mock(side_effect=[httpx.ConnectError("refused"), httpx.Response(200)])
+    assert send(RetryingSender(1), "POST").status_code == 200
+    assert mock.call_count == 2
+
+
+@respx.mock
+def test_sender_does_not_retry_non_idempotent_requests_maybe_sent(sleep_mock):
+    mock = respx.post(URL).mock(side_effect=httpx.ReadTimeout("timeout"))
+    with pytest.raises(httpx.ReadTimeout):
+        send(RetryingSender(1), "POST")
+    assert mock.call_count == 1
@@ -4,7 +4,11 @@ import os
 from paradox_localization_utils.lib.read_localization_file import (
     get_key_value_and_version,
     BadLocalizationException,
+    file_to_keys_and_lines,
     file_to_keys_and_values,
+    file_to_keys_values_and_lines,
+    file_to_keys_values_and_repeated_keys,
+    iter_localization_entries,
 )
 from tests.utils import get_data_dir
 
@@ -59,6 +63,40 @@ class TestReadLocalizationFile(unittest.TestCase):
         self.assertEqual(0, keys_and_values["key2"]["version"])
         self.assertEqual("l_french:\n", first_line[1:])
 
+    def test_file_to_keys_and_lines(self):
+        absolute_file_path = os.path.abspath(os.path.join(get_data_dir(), "test.yml"))
+        keys_and_lines, first_line = file_to_keys_and_lines(absolute_file_path)
+        self.assertEqual({"key": ' key:0 "value"\n', "key2": ' key2:0 "value2"\n'}, keys_and_lines)
+        self.assertEqual("l_french:\n", first_line[1:])
+
+    def test_file_to_keys_values_and_lines(self):
+        absolute_file_path = os.path.abspath(os.path.join(get_data_dir(), "test.yml"))
+        keys_and_values, keys_and_lines, first_line = file_to_keys_values_and_lines(absolute_file_path)
+        self.assertEqual(file_to_keys_and_values(absolute_file_path), (keys_and_values, first_line))
+        self.assertEqual(file_to_keys_and_lines(absolute_file_path), (keys_and_lines, first_line))
+
+    def test_file_to_keys_values_and_repeated_keys(self):
+        absolute_file_path = os.path.abspath(os.path.join(get_data_dir(), "test.yml"))
+        keys_and_values, first_line, repeated_keys = file_to_keys_values_and_repeated_keys(absolute_file_path)
+        self.assertEqual(file_to_keys_and_values(absolute_file_path), (keys_and_values, first_line))
+        self.assertEqual([], repeated_keys)
+
+    def test_iter_localization_entries(self):
+        lines = ["\ufeffl_french:\n", " # Comment\n", ' key:12 "value:1"\n', "\n", 'key2: "value2\n']
+        entries = list(iter_localization_entries(lines))
+        self.assertEqual(3, len(entries))
+        self.assertEqual("\ufeffl_french", entries[0].key)
+        self.assertIsNone(entries[0].value)
+        self.assertEqual("key", entries[1].key)
+        self.assertEqual(12, entries[1].version)
+        self.assertEqual("value:1", entries[1].value)
+        self.assertEqual(lines[2], entries[1].line)
+        self.assertEqual(2, entries[1].line_number)
+        self.assertEqual("key2", entries[2].key)
+        self.assertIsNone(entries[2].version)
+        self.assertIsNone(entries[2].value_span)
+        self.assertEqual(4, entries[2].line_number)
+
 
 if __name__ == "__main__":
     unittest.main()
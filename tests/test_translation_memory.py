@@ -0,0 +1,60 @@
+from pathlib import Path
+import random
+import subprocess
+import sys
+
+import pytest
+
+from paradox_localization_utils.lib.translation_memory import TranslationMemory
+from tests.utils import generate_random_str
+
+
+def test_exact_match():
+    translation_memory = TranslationMemory({"Declare war": "Déclarer la guerre"})
+    assert "Declare war" in translation_memory
+    assert translation_memory.find("Declare war") == ("Déclarer la guerre", 1.0)
+
+
+def test_fuzzy_match():
+    translation_memory = TranslationMemory(
+        {
+            "The king has declared war on his neighbour.": "Le roi a déclaré la guerre à son voisin.",
+            "The queen has signed a peace treaty.": "La reine a signé un traité de paix.",
+        }
+    )
+    translation, similarity = translation_memory.find("The king has declared war on his neighbour!", 0.9)
+    assert translation == "Le roi a déclaré la guerre à son voisin."
+    assert 0.9 <= similarity < 1
+
+
+def test_no_match_under_min_similarity():
+    translation_memory = TranslationMemory({"The king has declared war on his neighbour.": "Le roi..."})
+    assert translation_memory.find("The queen has signed a peace treaty.", 0.9) is None
+    assert translation_memory.find("", 0.9) is None
+
+
+def test_best_match_among_random_texts():
+    random.seed(0)
+    translation_memory = TranslationMemory()
+    sources = [generate_random_str(40) for _ in range(2000)]
+    for i, source in enumerate(sources):
+        translation_memory.add(source, str(i))
+    # Entries added after a first lookup are indexed too
+    assert translation_memory.find(sources[0][:-1] + "#") == ("0", 0.975)
+    translation_memory.add("An added source text", "added")
+    for i in range(1, 2000, 100):
+        assert translation_memory.find(sources[i][:-2] + "##") == (str(i), 0.95)
+    assert translation_memory.find("An added source text!") == ("added", pytest.approx(20 / 21))
+
+
+def test_fuzzy_dependencies_imported_at_first_fuzzy_lookup():
+    code = (
+        "import sys\n"
+        + "from paradox_localization_utils.lib.translation_memory import TranslationMemory\n"
+        + "translation_memory = TranslationMemory({'Declare war': 'Déclarer la guerre'})\n"
+        + "assert translation_memory['Declare war'] == 'Déclarer la guerre'\n"
+        + "assert 'numpy' not in sys.modules and 'rapidfuzz' not in sys.modules\n"
+        + "assert translation_memory.find('Declare war!') is not None\n"
+        + "assert 'numpy' in sys.modules and 'rapidfuzz' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parent.parent)
@@ -0,0 +1,124 @@
+import json
+import os
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from paradox_localization_utils.extract_existing_translation import extract_existing_translation
+from paradox_localization_utils.lib.paratranz_json import read_paratranz_translations
+from paradox_localization_utils.lib.translation_memory_store import (
+    TranslationMemoryStore,
+    build_translation_memory,
+    compute_text_key,
+)
+from paradox_localization_utils.translation_memory_db import import_paratranz
+from tests.utils import get_data_dir
+
+
+def test_add_and_get(tmp_path: Path):
+    store = TranslationMemoryStore(tmp_path / "tm.sqlite")
+    assert store.add({"value0": "valeur0", "value1": "valeur1"}, "english", "french") == 2
+    # Already current translations are not added again
+    assert store.add({"value0": "valeur0", "value1": "valeur 1"}, "english", "french") == 1
+    assert store.get("value0", "english", "french") == "valeur0"
+    assert store.get("value1", "english", "french") == "valeur 1"
+    assert store.get("value1", "english", "german") is None
+    assert store.get("value2", "english", "french") is None
+    assert store.load("english", "french") == {"value0": "valeur0", "value1": "valeur 1"}
+
+
+def test_store_persists_between_connections(tmp_path: Path):
+    TranslationMemoryStore(tmp_path / "tm.sqlite").add({"value0": "valeur0"}, "english", "french")
+    assert TranslationMemoryStore(tmp_path / "tm.sqlite").get("value0", "english", "french") == "valeur0"
+
+
+def test_compact(tmp_path: Path):
+    store = TranslationMemoryStore(tmp_path / "tm.sqlite")
+    store.add({"value0": "valeur0", "value1": "valeur1"}, "english", "french")
+    store.add({"value0": "valeur 0"}, "english", "french")
+    store.add({"value0": "valeur zéro"}, "english", "french")
+    assert store.compact() == 2
+    assert store.load("english", "french") == {"value0": "valeur zéro", "value1": "valeur1"}
+
+
+def test_export(tmp_path: Path):
+    store = TranslationMemoryStore(tmp_path / "tm.sqlite")
+    store.add({"value0": "valeur zéro"}, "english", "french")
+    assert store.export(tmp_path / "export.json", "english", "french") == 1
+    with open(tmp_path / "export.json", "r", encoding="utf8") as f:
+        assert json.load(f) == [
+            {"key": compute_text_key("value0"), "original": "value0", "translation": "valeur zéro", "stage": 5}
+        ]
+    with open(tmp_path / "export.json", "r", encoding="utf8") as f:
+        assert read_paratranz_translations(f, False) == {compute_text_key("value0"): "valeur zéro"}
+
+
+def test_export_and_import_paratranz(tmp_path: Path):
+    store = TranslationMemoryStore(tmp_path / "tm.sqlite")
+    store.add({"value0": "valeur0", "value1": "valeur1"}, "english", "french")
+    os.makedirs(tmp_path / "paratranz")
+    store.export(tmp_path / "paratranz" / "export.json", "english", "french")
+    import_paratranz(str(tmp_path / "tm2.sqlite"), str(tmp_path / "paratranz"), "english", "french", False)
+    assert TranslationMemoryStore(tmp_path / "tm2.sqlite").load("english", "french") == {
+        "value0": "valeur0",
+        "value1": "valeur1",
+    }
+
+
+def test_import_paratranz(tmp_path: Path):
+    import_paratranz(
+        str(tmp_path / "tm.sqlite"),
+        os.path.join(get_data_dir(), "extract_paratranz_translation", "paratranz_dir2"),
+        "english",
+        "french",
+        False,
+    )
+    store = TranslationMemoryStore(tmp_path / "tm.sqlite")
+    assert len(store.load("english", "french")) > 0
+
+
+def test_build_translation_memory_looks_up_store(tmp_path: Path, mocker: MockerFixture):
+    TranslationMemoryStore(tmp_path / "tm.sqlite").add(
+        {"value0": "valeur0", "value1": "valeur1", "The king has declared war": "Le roi a déclaré la guerre"},
+        "english",
+        "french",
+    )
+    close_spy = mocker.spy(TranslationMemoryStore, "close")
+    with build_translation_memory(
+        {"value1": "valeur un"}, tmp_path / "tm.sqlite", "english", "french", False
+    ) as translation_memory:
+        assert translation_memory["value0"] == "valeur0"
+        assert translation_memory["value1"] == "valeur un"
+        assert "value2" not in translation_memory
+        assert close_spy.call_count == 0
+    assert close_spy.call_count == 1
+    assert translation_memory["value0"] == "valeur0"  # Already looked up
+    assert "value2" not in translation_memory
+    translation_memory = build_translation_memory(
+        {"value1": "valeur un"}, tmp_path / "tm.sqlite", "english", "french", True
+    )
+    assert translation_memory["value1"] == "valeur un"
+    assert translation_memory.find("The king has declared war!") == ("Le roi a déclaré la guerre", 1 - 1 / 26)
+
+
+def test_extract_existing_translation_from_store(tmp_path: Path, mocker: MockerFixture):
+    close_spy = mocker.spy(TranslationMemoryStore, "close")
+    TranslationMemoryStore(tmp_path / "tm.sqlite").add({"Declare war": "Déclarer la guerre"}, "english", "french")
+    (tmp_path / "extract").mkdir()
+    (tmp_path / "target").mkdir()
+    (tmp_path / "target" / "a_l_english.yml").write_text('\ufeffl_english:\n KEY0:0 "Declare war"\n', encoding="utf8")
+    (tmp_path / "target" / "a_l_french.yml").write_text('\ufeffl_french:\n KEY0:0 "Declare war"\n', encoding="utf8")
+    extract_existing_translation(
+        str(tmp_path / "extract"),
+        str(tmp_path / "extract"),
+        str(tmp_path / "target"),
+        str(tmp_path / "target"),
+        "english",
+        "french",
+        1,
+        2,
+        translation_memory_db=tmp_path / "tm.sqlite",
+    )
+    lines = (tmp_path / "target" / "a_l_french.yml").read_text(encoding="utf8").split("\n")
+    assert lines[1] == ' KEY0:0 "Déclarer la guerre"'
+    assert close_spy.call_count == 1
@@ -1,10 +1,11 @@
 ﻿from pathlib import Path
 import re
+import httpx
 import pytest
 from pytest_mock import MockerFixture
-import requests
-import responses
+import respx
 
+from paradox_localization_utils.lib.rate_limit import DEFAULT_MAX_RETRIES
 from paradox_localization_utils.update_paratranz import (
     create_or_update_file,
     create_or_update_files,
@@ -14,6 +15,11 @@ from paradox_localization_utils.update_paratranz import (
 from tests.utils import generate_random_str
 
 
+@pytest.fixture(autouse=True)
+def no_sleep_before_retry(mocker: MockerFixture):
+    mocker.patch("paradox_localization_utils.lib.rate_limit.sleep")
+
+
 @pytest.fixture(scope="module")
 def project_id():
     yield 42
@@ -65,99 +71,108 @@ def empty_file_in_replace_in_root(language: str, tmp_path: Path):
     yield file
 
 
-@responses.activate
+@respx.mock
 def test_get_project_files(project_id: int):
-    responses.get(
-        f"https://paratranz.cn/api/projects/{project_id}/files",
-        json=[{"id": "id1", "name": "name1"}, {"id": "id2", "name": "name2"}],
+    respx.get(f"https://paratranz.cn/api/projects/{project_id}/files").respond(
+        json=[{"id": "id1", "name": "name1"}, {"id": "id2", "name": "name2"}]
     )
     assert {"name1": "id1", "name2": "id2"} == get_project_files(project_id)
 
 
-@responses.activate
+@respx.mock
 def test_create_file(project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path):
     current_files = dict()
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files")
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files")
     create_or_update_file(token, project_id, tmp_path, language, str(empty_file), current_files, files_with_errors)
     assert mock.call_count == 1
-    assert empty_file.name in mock.calls[0].request.body.decode()
+    assert empty_file.name in mock.calls[0].request.content.decode()
     assert files_with_errors == []
 
 
-@responses.activate
+@respx.mock
 def test_update_file(project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path):
     file_id = 24
     current_files = {empty_file.name: file_id}
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
     create_or_update_file(token, project_id, tmp_path, language, str(empty_file), current_files, files_with_errors)
     assert mock.call_count == 1
-    assert empty_file.name in mock.calls[0].request.body.decode()
+    assert empty_file.name in mock.calls[0].request.content.decode()
     assert files_with_errors == []
 
 
-@responses.activate
+@respx.mock
 def test_create_file_error(project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path):
     current_files = dict()
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files", status=500)
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files").respond(500)
     create_or_update_file(token, project_id, tmp_path, language, str(empty_file), current_files, files_with_errors, 0)
-    assert mock.call_count == 2  # Retry is done
-    assert empty_file.name in mock.calls[0].request.body.decode()
+    assert mock.call_count == 1  # The file may have been created or updated, it is not sent again
+    assert empty_file.name in mock.calls[0].request.content.decode()
     assert files_with_errors == [empty_file.name]
 
 
-@responses.activate
+@respx.mock
 def test_update_file_error(project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path):
     file_id = 24
     current_files = {empty_file.name: file_id}
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}", status=500)
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}").respond(500)
     create_or_update_file(token, project_id, tmp_path, language, str(empty_file), current_files, files_with_errors, 0)
-    assert mock.call_count == 2  # Retry is done
-    assert empty_file.name in mock.calls[0].request.body.decode()
+    assert mock.call_count == 1  # The file may have been created or updated, it is not sent again
+    assert empty_file.name in mock.calls[0].request.content.decode()
     assert files_with_errors == [empty_file.name]
 
 
-@responses.activate
+@respx.mock
+def test_create_file_rate_limited(project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path):
+    current_files = dict()
+    files_with_errors = []
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files").respond(429)
+    create_or_update_file(token, project_id, tmp_path, language, str(empty_file), current_files, files_with_errors, 0)
+    assert mock.call_count == 1 + DEFAULT_MAX_RETRIES  # Retries are done
+    assert files_with_errors == [empty_file.name]
+
+
+@respx.mock
 def test_create_file_with_subdir(
     project_id: int, token: str, language: str, empty_file_with_subdir: Path, tmp_path: Path
 ):
     current_files = dict()
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files")
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files")
     create_or_update_file(
         token, project_id, tmp_path, language, str(empty_file_with_subdir), current_files, files_with_errors
     )
     assert mock.call_count == 1
-    assert empty_file_with_subdir.parent.name in mock.calls[0].request.body.decode()
+    assert empty_file_with_subdir.parent.name in mock.calls[0].request.content.decode()
     assert files_with_errors == []
 
 
-@responses.activate
+@respx.mock
 def test_update_file_with_subdir(
     project_id: int, token: str, language: str, empty_file_with_subdir: Path, tmp_path: Path
 ):
     file_id = 24
     current_files = {f"{empty_file_with_subdir.parent.name}/{empty_file_with_subdir.name}": file_id}
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
     create_or_update_file(
         token, project_id, tmp_path, language, str(empty_file_with_subdir), current_files, files_with_errors
     )
     assert mock.call_count == 1
-    assert empty_file_with_subdir.parent.name in mock.calls[0].request.body.decode()
+    assert empty_file_with_subdir.parent.name in mock.calls[0].request.content.decode()
     assert files_with_errors == []
 
 
-@responses.activate
+@respx.mock
 def test_create_file_in_replace_with_language_subdir(
     project_id: int, token: str, language: str, empty_file_in_replace_with_language_subdir: Path, tmp_path: Path
 ):
     current_files = dict()
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files")
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files")
     create_or_update_file(
         token,
         project_id,
@@ -168,20 +183,20 @@ def test_create_file_in_replace_with_language_subdir(
         files_with_errors,
     )
     assert mock.call_count == 1
-    assert "replace" in mock.calls[0].request.body.decode()
-    assert f"\\{language}" not in mock.calls[0].request.body.decode()
-    assert f"/{language}" not in mock.calls[0].request.body.decode()
+    assert "replace" in mock.calls[0].request.content.decode()
+    assert f"\\{language}" not in mock.calls[0].request.content.decode()
+    assert f"/{language}" not in mock.calls[0].request.content.decode()
     assert files_with_errors == []
 
 
-@responses.activate
+@respx.mock
 def test_update_file_in_replace_with_language_subdir(
     project_id: int, token: str, language: str, empty_file_in_replace_with_language_subdir: Path, tmp_path: Path
 ):
     file_id = 24
     current_files = {f"replace/{empty_file_in_replace_with_language_subdir.name}": file_id}
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
     create_or_update_file(
         token,
         project_id,
@@ -192,19 +207,19 @@ def test_update_file_in_replace_with_language_subdir(
         files_with_errors,
     )
     assert mock.call_count == 1
-    assert "replace" in mock.calls[0].request.body.decode()
-    assert f"\\{language}" not in mock.calls[0].request.body.decode()
-    assert f"/{language}" not in mock.calls[0].request.body.decode()
+    assert "replace" in mock.calls[0].request.content.decode()
+    assert f"\\{language}" not in mock.calls[0].request.content.decode()
+    assert f"/{language}" not in mock.calls[0].request.content.decode()
     assert files_with_errors == []
 
 
-@responses.activate
+@respx.mock
 def test_create_file_in_replace_in_root(
     project_id: int, token: str, language: str, empty_file_in_replace_in_root: Path, tmp_path: Path
 ):
     current_files = dict()
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files")
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files")
     create_or_update_file(
         token,
         project_id,
@@ -215,18 +230,18 @@ def test_create_file_in_replace_in_root(
         files_with_errors,
     )
     assert mock.call_count == 1
-    assert "replace" in mock.calls[0].request.body.decode()
+    assert "replace" in mock.calls[0].request.content.decode()
     assert files_with_errors == []
 
 
-@responses.activate
+@respx.mock
 def test_update_file_in_replace_in_root(
     project_id: int, token: str, language: str, empty_file_in_replace_in_root: Path, tmp_path: Path
 ):
     file_id = 24
     current_files = {f"replace/{empty_file_in_replace_in_root.name}": file_id}
     files_with_errors = []
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
     create_or_update_file(
         token,
         project_id,
@@ -237,28 +252,25 @@ def test_update_file_in_replace_in_root(
         files_with_errors,
     )
     assert mock.call_count == 1
-    assert "replace" in mock.calls[0].request.body.decode()
+    assert "replace" in mock.calls[0].request.content.decode()
     assert files_with_errors == []
 
 
-first_call = True
-
-
-def test_retry(project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path, mocker: MockerFixture):
-    def raise_error_first_call(url: str, headers: dict, filepath: str, paratranz_path: str):
-        global first_call
-        if first_call:
-            first_call = False
-            raise requests.HTTPError()
-
-    mocker.patch("paradox_localization_utils.update_paratranz.__post_file_to_paratranz", new=raise_error_first_call)
+@respx.mock
+def test_retry(project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path):
+    url = f"https://paratranz.cn/api/projects/{project_id}/files"
+    mock = respx.post(url).mock(
+        side_effect=[httpx.Response(429, headers={"Retry-After": "1"}), httpx.Response(200, json={})]
+    )
     current_files = dict()
     files_with_errors = []
     create_or_update_file(token, project_id, tmp_path, language, str(empty_file), current_files, files_with_errors)
+    assert mock.call_count == 2
+    assert empty_file.name in mock.calls[1].request.content.decode()  # The file is sent again
     assert files_with_errors == []
 
 
-@responses.activate
+@respx.mock
 def test_create_or_update_files(project_id: int, token: str, language: str, tmp_path: Path):
     # Files in root
     file_name1 = f"file1_{language}.yml"
@@ -297,50 +309,49 @@ def test_create_or_update_files(project_id: int, token: str, language: str, tmp_
     file4_id = 24
     file9_id = 25
     file10_id = 26
-    responses.get(
-        f"https://paratranz.cn/api/projects/{project_id}/files",
+    respx.get(f"https://paratranz.cn/api/projects/{project_id}/files").respond(
         json=[
             {"id": file4_id, "name": f"{subdir}/{file_name4}"},
             {"id": file9_id, "name": f"replace/{file_name9}"},
             {"id": file10_id, "name": f"replace/{file_name10}"},
-        ],
+        ]
     )
-    create_mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files")
-    update_mock_4 = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file4_id}")
-    update_mock_9 = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file9_id}")
-    update_mock_10 = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file10_id}")
+    create_mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files")
+    update_mock_4 = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file4_id}")
+    update_mock_9 = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file9_id}")
+    update_mock_10 = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/{file10_id}")
     res = create_or_update_files(project_id, token, tmp_path, language, 1)
     assert create_mock.call_count == 5
     for call in create_mock.calls:
         found = False
         for file_name in [file_name1, file_name2, file_name3, file_name7, file_name8]:
-            if file_name in call.request.body.decode():
+            if file_name in call.request.content.decode():
                 if file_name == file_name3:
-                    assert subdir in call.request.body.decode()
+                    assert subdir in call.request.content.decode()
                 found = True
                 break
         assert found
     assert update_mock_4.call_count == 1
-    assert file_name4 in update_mock_4.calls[0].request.body.decode()
-    assert subdir in update_mock_4.calls[0].request.body.decode()
+    assert file_name4 in update_mock_4.calls[0].request.content.decode()
+    assert subdir in update_mock_4.calls[0].request.content.decode()
     assert update_mock_9.call_count == 1
-    assert file_name9 in update_mock_9.calls[0].request.body.decode()
-    assert "replace" in update_mock_9.calls[0].request.body.decode()
+    assert file_name9 in update_mock_9.calls[0].request.content.decode()
+    assert "replace" in update_mock_9.calls[0].request.content.decode()
     assert update_mock_10.call_count == 1
-    assert file_name10 in update_mock_10.calls[0].request.body.decode()
-    assert "replace" in update_mock_10.calls[0].request.body.decode()
+    assert file_name10 in update_mock_10.calls[0].request.content.decode()
+    assert "replace" in update_mock_10.calls[0].request.content.decode()
     assert res == dict()
 
 
-@responses.activate
+@respx.mock
 def test_create_or_update_files_get_paratranz_files_error(
     project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path, capsys
 ):
-    responses.get(f"https://paratranz.cn/api/projects/{project_id}/files", status=500)
-    create_mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files")
+    respx.get(f"https://paratranz.cn/api/projects/{project_id}/files").respond(500)
+    create_mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files")
     res = create_or_update_files(project_id, token, tmp_path, language, 1)
     assert create_mock.call_count == 1
-    assert empty_file.name in create_mock.calls[0].request.body.decode()
+    assert empty_file.name in create_mock.calls[0].request.content.decode()
     captured = capsys.readouterr()
     logs = captured.out.split("\n")
     assert "WARNING: Fail to get the list of files from Paratranz" in logs
@@ -348,16 +359,31 @@ def test_create_or_update_files_get_paratranz_files_error(
     assert res == dict()
 
 
-@responses.activate
+@respx.mock
+def test_create_or_update_files_get_paratranz_files_transport_error(
+    project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path, capsys
+):
+    files_mock = respx.get(f"https://paratranz.cn/api/projects/{project_id}/files").mock(
+        side_effect=httpx.ReadTimeout("Timeout")
+    )
+    create_mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files")
+    res = create_or_update_files(project_id, token, tmp_path, language, 1)
+    assert files_mock.call_count == 1 + DEFAULT_MAX_RETRIES
+    assert create_mock.call_count == 1
+    assert "WARNING: Fail to get the list of files from Paratranz" in capsys.readouterr().out.split("\n")
+    assert res == dict()
+
+
+@respx.mock
 def test_create_or_update_files_create_error(
     project_id: int, token: str, language: str, empty_file: Path, tmp_path: Path, capsys
 ):
-    responses.get(f"https://paratranz.cn/api/projects/{project_id}/files", json=[])
-    mock = responses.post(f"https://paratranz.cn/api/projects/{project_id}/files", status=500)
+    respx.get(f"https://paratranz.cn/api/projects/{project_id}/files").respond(json=[])
+    mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files").respond(500)
     res = create_or_update_files(project_id, token, tmp_path, language, 1)
-    assert mock.call_count == 2  # Retry
+    assert mock.call_count == 1
     for i in range(mock.call_count):
-        assert empty_file.name in mock.calls[i].request.body.decode()
+        assert empty_file.name in mock.calls[i].request.content.decode()
     captured = capsys.readouterr()
     logs = captured.out.split("\n")
     assert "ERROR: Non updated files:" in logs
@@ -369,44 +395,77 @@ def test_create_or_update_files_create_error(
 
 
 def test_create_or_update_files_non_existing_dir(project_id: int, token: str, language: str):
-    responses.get(f"https://paratranz.cn/api/projects/{project_id}/files", json=[])
-    responses.post(f"https://paratranz.cn/api/projects/{project_id}/files")
     loc_dir = generate_random_str()
     with pytest.raises(ValueError, match=f"Directory {loc_dir} does not exist"):
         create_or_update_files(project_id, token, loc_dir, language, 1)
 
 
 def test_create_or_update_files_non_existing_language_dir(project_id: int, token: str, language: str, tmp_path: Path):
-    responses.get(f"https://paratranz.cn/api/projects/{project_id}/files", json=[])
-    responses.post(f"https://paratranz.cn/api/projects/{project_id}/files")
     with pytest.raises(ValueError, match=re.escape(f"Directory {tmp_path/language} does not exist")):
         create_or_update_files(project_id, token, tmp_path, language, 1)
 
 
-@responses.activate
+@respx.mock
 def test_delete_files(project_id: int, token: str, mocker: MockerFixture):
     mocker.patch("paradox_localization_utils.update_paratranz.input", return_value="y")
     file_name = generate_random_str()
     file_id = 24
     loc_dir = generate_random_str()
-    mock = responses.delete(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
+    mock = respx.delete(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
     delete_files_if_wanted(token, project_id, loc_dir, 1, {file_name: file_id}, 0)
     assert mock.call_count == 1
 
 
-@responses.activate
+@respx.mock
 def test_delete_files_no_files(project_id: int, token: str, mocker: MockerFixture):
     mocker.patch("paradox_localization_utils.update_paratranz.input", return_value="y")
     loc_dir = generate_random_str()
     delete_files_if_wanted(token, project_id, loc_dir, 1, dict(), 0)
 
 
-@responses.activate
+@respx.mock(assert_all_called=False)
 def test_delete_files_user_refuses(project_id: int, token: str, mocker: MockerFixture):
     mocker.patch("paradox_localization_utils.update_paratranz.input", return_value="n")
     file_name = generate_random_str()
     file_id = 24
     loc_dir = generate_random_str()
-    mock = responses.delete(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
+    mock = respx.delete(f"https://paratranz.cn/api/projects/{project_id}/files/{file_id}")
     delete_files_if_wanted(token, project_id, loc_dir, 1, {file_name: file_id}, 0)
     assert mock.call_count == 0
+
+
+@respx.mock
+def test_create_or_update_files_with_manifest(project_id: int, token: str, language: str, tmp_path: Path, capsys):
+    loc_dir = tmp_path / "loc"
+    manifest_path = tmp_path / "manifest.json"
+    file1 = loc_dir / language / f"file1_{language}.yml"
+    file2 = loc_dir / language / f"file2_{language}.yml"
+    file1.parent.mkdir(parents=True)
+    file1.write_text("content1", encoding="utf8")
+    file2.write_text("content2", encoding="utf8")
+    files_mock = respx.get(f"https://paratranz.cn/api/projects/{project_id}/files").respond(
+        json=[{"id": 1, "name": file1.name}, {"id": 2, "name": file2.name}]
+    )
+    update_mock_1 = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/1")
+    update_mock_2 = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files/2")
+    assert create_or_update_files(project_id, token, loc_dir, language, 1, manifest_path) == dict()
+    assert update_mock_1.call_count == 1 and update_mock_2.call_count == 1
+    # Only the changed file is sent, the unchanged file is not proposed for deletion
+    file2.write_text("content2 edited", encoding="utf8")
+    assert create_or_update_files(project_id, token, loc_dir, language, 1, manifest_path) == dict()
+    assert update_mock_1.call_count == 1 and update_mock_2.call_count == 2
+    logs = capsys.readouterr().out.split("\n")
+    assert "1 files sent (0.0 MB), 1 unchanged files skipped (0.0 MB saved)" in logs
+    # The skipped file is not counted in the statistics of the requests
+    assert "1 calls skipped without request" in logs
+    assert any(log.startswith("1 requests in") for log in logs)
+    # A file deleted from Paratranz is created again
+    files_mock.respond(json=[{"id": 2, "name": file2.name}])
+    create_mock = respx.post(f"https://paratranz.cn/api/projects/{project_id}/files")
+    create_or_update_files(project_id, token, loc_dir, language, 1, manifest_path)
+    assert create_mock.call_count == 1
+    assert file1.name in create_mock.calls[0].request.content.decode()
+    assert update_mock_2.call_count == 2
+    # All files are sent with force
+    create_or_update_files(project_id, token, loc_dir, language, 1, manifest_path, force=True)
+    assert create_mock.call_count == 2 and update_mock_2.call_count == 3
@@ -0,0 +1,115 @@
+import os
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from paradox_localization_utils.lib.parallel_parsing import load_localization_dir
+from paradox_localization_utils.lib.write_localization_file import (
+    edit_file_with_dict,
+    edit_files_with_dict,
+    group_edits_by_file,
+)
+
+CONTENT = """\ufeffl_french:
+ # Comment
+ KEY0:0 "valeur0"
+  KEY1: "value1"
+ KEY2:3 "valeur2" # Comment
+ KEY3:0 "missing double quote
+"""
+
+
+@pytest.fixture
+def localisation_file(tmp_path: Path):
+    file_path = tmp_path / "text_l_french.yml"
+    with open(file_path, "w", encoding="utf8") as f:
+        f.write(CONTENT)
+    yield file_path
+
+
+def test_edit_file_with_dict(localisation_file: Path):
+    nb_changed_lines = edit_file_with_dict(
+        localisation_file, {"KEY0": "valeur0", "KEY1": "valeur1", "KEY2": "nouvelle valeur2", "KEY3": "valeur3"}
+    )
+    assert nb_changed_lines == 2
+    with open(localisation_file, "r", encoding="utf8") as f:
+        assert f.read() == CONTENT.replace('  KEY1: "value1"', ' KEY1: "valeur1"').replace(
+            ' KEY2:3 "valeur2" # Comment', ' KEY2:3 "nouvelle valeur2"'
+        )
+    assert os.listdir(localisation_file.parent) == [localisation_file.name]
+
+
+def test_edit_file_with_dict_without_change(localisation_file: Path, mocker: MockerFixture):
+    open_mock = mocker.patch("paradox_localization_utils.lib.write_localization_file.open", wraps=open)
+    assert edit_file_with_dict(localisation_file, {"KEY0": "valeur0", "OTHER_KEY": "value"}) == 0
+    assert [call.args[1] for call in open_mock.call_args_list] == ["r"]  # Not written
+    with open(localisation_file, "r", encoding="utf8") as f:
+        assert f.read() == CONTENT
+
+
+def test_edit_file_with_dict_is_atomic(localisation_file: Path, mocker: MockerFixture):
+    mocker.patch("paradox_localization_utils.lib.write_localization_file.os.replace", side_effect=OSError)
+    with pytest.raises(OSError):
+        edit_file_with_dict(localisation_file, {"KEY0": "nouvelle valeur0"})
+    with open(localisation_file, "r", encoding="utf8") as f:
+        assert f.read() == CONTENT
+    assert os.listdir(localisation_file.parent) == [localisation_file.name]
+
+
+def test_edit_file_with_dict_with_versions(localisation_file: Path):
+    nb_changed_lines = edit_file_with_dict(
+        localisation_file, {"KEY0": "valeur0", "KEY1": "valeur1", "KEY2": "valeur2"}, {"KEY0": 8, "KEY2": None}
+    )
+    assert nb_changed_lines == 3
+    with open(localisation_file, "r", encoding="utf8") as f:
+        lines = f.read().split("\n")
+    assert lines[2:5] == [' KEY0:8 "valeur0"', ' KEY1: "valeur1"', ' KEY2: "valeur2"']
+
+
+def test_group_and_edit_files(tmp_path: Path):
+    for i, content in enumerate(
+        [' KEY0:0 "value0"\n KEY1:0 "value1"\n', ' KEY2:0 "value2"\n KEY3:0 "[code]"\n', ' KEY4:0 "value4"\n']
+    ):
+        with open(tmp_path / f"text{i}_l_french.yml", "w", encoding="utf8") as f:
+            f.write("\ufeffl_french:\n" + content)
+    with open(tmp_path / "text3_l_french.yml", "w", encoding="utf8") as f:
+        f.write('\ufeffl_french:\n KEY3:0 "value3"\n')  # Duplicated key
+    key_index = load_localization_dir(tmp_path, "l_french.yml")
+    edits_by_file = group_edits_by_file(
+        {"KEY0": "value0", "KEY1": "new value1", "KEY3": "[code]", "UNKNOWN_KEY": "value"}, key_index
+    )
+    assert edits_by_file == {
+        str(tmp_path / "text0_l_french.yml"): {"KEY1": "new value1"},
+        str(tmp_path / "text1_l_french.yml"): {"KEY3": "[code]"},
+        str(tmp_path / "text3_l_french.yml"): {"KEY3": "[code]"},
+    }
+    assert edit_files_with_dict(edits_by_file) == (2, 2)
+    with open(tmp_path / "text3_l_french.yml", "r", encoding="utf8") as f:
+        assert f.read() == '\ufeffl_french:\n KEY3:0 "[code]"\n'
+
+
+def test_group_and_edit_files_with_key_repeated_in_a_file(tmp_path: Path):
+    file_path = tmp_path / "text_l_french.yml"
+    with open(file_path, "w", encoding="utf8") as f:
+        f.write('\ufeffl_french:\n KEY0:0 "old value0"\n KEY1:0 "value1"\n KEY0:0 "value0"\n')
+    key_index = load_localization_dir(tmp_path, "l_french.yml")
+    # The last line of KEY0 already has the new value, but not the first one
+    edits_by_file = group_edits_by_file({"KEY0": "value0", "KEY1": "value1"}, key_index)
+    assert edits_by_file == {str(file_path): {"KEY0": "value0"}}
+    assert edit_files_with_dict(edits_by_file) == (1, 1)
+    with open(file_path, "r", encoding="utf8") as f:
+        assert f.read() == '\ufeffl_french:\n KEY0:0 "value0"\n KEY1:0 "value1"\n KEY0:0 "value0"\n'
+
+
+def test_group_and_edit_files_with_changed_version_only(tmp_path: Path):
+    file_path = tmp_path / "text_l_french.yml"
+    with open(file_path, "w", encoding="utf8") as f:
+        f.write('\ufeffl_french:\n KEY0:8 "value0"\n KEY1:0 "value1"\n')
+    key_index = load_localization_dir(tmp_path, "l_french.yml")
+    versions = {"KEY0": 3, "KEY1": 0}
+    edits_by_file = group_edits_by_file({"KEY0": "value0", "KEY1": "value1"}, key_index, versions)
+    assert edits_by_file == {str(file_path): {"KEY0": "value0"}}
+    assert edit_files_with_dict(edits_by_file, versions) == (1, 1)
+    with open(file_path, "r", encoding="utf8") as f:
+        assert f.read() == '\ufeffl_french:\n KEY0:3 "value0"\n KEY1:0 "value1"\n'